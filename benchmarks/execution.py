@@ -0,0 +1,138 @@
+"""
+Сравнение скорости исполнения сигналов в бэктесте.
+
+Прежний путь — исполнение каждого сигнала отдельно со словарем сделки
+(как `_execute_signal` бэктестера до пакетного исполнения), новый —
+`Backtester._execute_signals` для всех сигналов бара с плоской и
+реалистичной моделями исполнения. Оба пути работают с одним счетом
+симуляции и одними барами.
+
+Запуск: python -m benchmarks.execution
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.account import SimulatedAccount
+from src.core.backtesting import Backtester
+from src.core.execution import ExecutionModel, RealisticExecution
+from src.core.ledger import TradeLedger
+from src.core.metrics import OnlineMetrics
+from src.core.replay import ReplayEngine
+
+
+class BenchmarkConfig:
+    risk_per_trade = 0.01
+
+
+def previous_execute_signal(
+        signal: Dict,
+        portfolio: SimulatedAccount,
+        current_price: float,
+        risk_per_trade: float,
+) -> Optional[Dict]:
+    """Исполнение одного сигнала прежним бэктестером."""
+    if not signal or not portfolio:
+        return None
+
+    figi = signal['figi']
+    direction = signal['direction']
+    size = signal['size']
+
+    risk_amount = portfolio.get_balance('USD') * risk_per_trade
+    position_size = min(size, risk_amount / current_price)
+    if position_size < 1:
+        return None
+
+    trade = {
+        'figi': figi,
+        'direction': direction,
+        'entry_price': current_price,
+        'size': position_size,
+        'timestamp': datetime.utcnow(),
+        'commission': current_price * position_size * 0.0005
+    }
+
+    if direction == 'buy':
+        portfolio.update_position(figi, position_size, current_price)
+        portfolio.update_balance('USD', -current_price * position_size)
+    else:
+        portfolio.update_position(figi, -position_size, current_price)
+        portfolio.update_balance('USD', current_price * position_size)
+
+    return trade
+
+
+def make_replay(n_bars: int, n_instruments: int, seed: int) -> ReplayEngine:
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2024-01-01', periods=n_bars, freq='1h')
+    historical_data = {}
+    for number in range(n_instruments):
+        close = 1.1 + np.cumsum(rng.normal(0, 0.001, n_bars))
+        historical_data[f'FIGI{number}'] = pd.DataFrame({
+            'time': times,
+            'close': close,
+            'high': close + 0.0005,
+            'low': close - 0.0005,
+            'volume': rng.uniform(100, 1000, n_bars),
+        })
+    return ReplayEngine(historical_data, min_bars=1)
+
+
+def benchmark(n_bars: int = 20000, n_instruments: int = 4, seed: int = 0) -> Dict[str, float]:
+    """
+    Время исполнения сигналов по каждому варианту.
+
+    На каждом баре у каждого инструмента есть сигнал; направление
+    случайное, объем 10.
+
+    Args:
+        n_bars: Количество баров
+        n_instruments: Количество инструментов (сигналов на баре)
+        seed: Зерно генератора
+
+    Returns:
+        Время в секундах по вариантам
+    """
+    sides = np.random.default_rng(seed).choice([-1.0, 1.0], (n_bars, n_instruments))
+    bar_sides = sides.tolist()
+    config = BenchmarkConfig()
+    timings = {}
+
+    replay = make_replay(n_bars, n_instruments, seed)
+    portfolio = SimulatedAccount(10000)
+    trades = []
+    started = time.perf_counter()
+    for bar, current_time in enumerate(replay.clock(pd.Timestamp.min, pd.Timestamp.max, skip_closed=False)):
+        for column, (figi, cursor) in enumerate(replay.step(current_time)):
+            signal = {'figi': figi, 'direction': 'buy' if sides[bar, column] > 0 else 'sell', 'size': 10}
+            trade = previous_execute_signal(signal, portfolio, cursor.last_close, config.risk_per_trade)
+            if trade:
+                trades.append(trade)
+    timings['per_signal'] = time.perf_counter() - started
+
+    for name, execution in (('flat', ExecutionModel()), ('realistic', RealisticExecution())):
+        replay = make_replay(n_bars, n_instruments, seed)
+        backtester = Backtester(None, None, config, execution=execution)
+        backtester.ledger = TradeLedger(list(replay.cursors))
+        tracker = OnlineMetrics(n_bars)
+        portfolio = SimulatedAccount(10000)
+        started = time.perf_counter()
+        for bar, current_time in enumerate(replay.clock(pd.Timestamp.min, pd.Timestamp.max, skip_closed=False)):
+            orders = [
+                (figi, side, 10.0, cursor)
+                for (figi, cursor), side in zip(replay.step(current_time), bar_sides[bar])
+            ]
+            backtester._execute_signals(current_time, orders, portfolio, tracker)
+        timings[name] = time.perf_counter() - started
+
+    return timings
+
+
+if __name__ == '__main__':
+    for variant, seconds in benchmark().items():
+        print(f"{variant:>12}: {seconds:.3f}s")
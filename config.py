@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     FOREX_API_KEY: str = Field(..., env="FOREX_API_KEY")
     FOREX_API_SECRET: str = Field(..., env="FOREX_API_SECRET")
     FOREX_API_URL: str = Field("https://api.forex-broker.com/v1", env="FOREX_API_URL")
+    # Лимит запросов свечей к API в минуту (AdaptiveRateLimiter)
+    CANDLE_REQUESTS_PER_MINUTE: int = Field(300, env="CANDLE_REQUESTS_PER_MINUTE")
+    # Количество последних свечей потока в памяти на инструмент (CandleRingBuffer)
+    CANDLE_BUFFER_DEPTH: int = Field(100, env="CANDLE_BUFFER_DEPTH")
 
     # Параметры торговой стратегии
     RISK_PER_TRADE: float = Field(0.01, env="RISK_PER_TRADE")
@@ -26,6 +30,7 @@ class Settings(BaseSettings):
     BOLLINGER_PERIOD: int = Field(20, env="BOLLINGER_PERIOD")
 
     # База данных
+    DB_BACKEND: str = Field("files", env="DB_BACKEND")  # "files" или "postgres"
     DB_HOST: str = Field("localhost", env="DB_HOST")
     DB_PORT: int = Field(5432, env="DB_PORT")
     DB_NAME: str = Field("forex_robot", env="DB_NAME")
@@ -35,6 +40,7 @@ class Settings(BaseSettings):
     # Redis
     REDIS_HOST: str = Field("localhost", env="REDIS_HOST")
     REDIS_PORT: int = Field(6379, env="REDIS_PORT")
+    HOT_CACHE_ENABLED: bool = Field(False, env="HOT_CACHE_ENABLED")
 
     # Логирование
     LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
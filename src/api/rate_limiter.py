@@ -0,0 +1,93 @@
+"""
+Адаптивное ограничение частоты запросов к API брокера.
+
+Брокер ограничивает число unary-запросов к сервису в минуту. Ограничитель
+считает запросы в скользящем окне и снижает допустимую частоту вдвое,
+когда брокер отвечает превышением лимита, а после успешных запросов
+постепенно возвращает ее к исходной.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+# Лимит запросов свечей в минуту по умолчанию (с запасом от квоты брокера)
+DEFAULT_REQUESTS_PER_MINUTE = 300
+
+
+class AdaptiveRateLimiter:
+    """
+    Ограничитель частоты запросов со скользящим окном.
+
+    Использование:
+        async with limiter:
+            await client.request()
+
+    Выход из блока без исключения считается успешным запросом.
+
+    Attributes:
+        max_rate (int): Квота запросов за период
+        min_rate (int): Нижняя граница квоты после снижений
+        rate (float): Текущая квота запросов за период
+        period (float): Длина окна в секундах
+        recovery (float): Прибавка к квоте за успешный запрос
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+            min_requests_per_minute: int = 10,
+            recovery: float = 1.0,
+            period: float = 60.0,
+    ):
+        self.max_rate = requests_per_minute
+        self.min_rate = min(min_requests_per_minute, requests_per_minute)
+        self.rate = float(requests_per_minute)
+        self.period = period
+        self.recovery = recovery
+        self._sent: deque = deque()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Ожидание, пока запрос укладывается в квоту."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.period:
+                    self._sent.popleft()
+
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if len(self._sent) < int(self.rate):
+                        break
+                    wait = self._sent[0] + self.period - now
+                await asyncio.sleep(wait)
+
+            self._sent.append(now)
+
+    def success(self):
+        """Учет успешного запроса: квота постепенно восстанавливается."""
+        self.rate = min(float(self.max_rate), self.rate + self.recovery)
+
+    def throttled(self, retry_after: Optional[float] = None):
+        """
+        Учет ответа о превышении лимита: квота снижается вдвое.
+
+        Args:
+            retry_after: Через сколько секунд брокер снимет ограничение
+                (None — до конца текущего окна)
+        """
+        self.rate = max(float(self.min_rate), self.rate / 2)
+        pause = retry_after if retry_after is not None else self.period
+        self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.success()
+        return False
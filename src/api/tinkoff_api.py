@@ -11,18 +11,20 @@
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
+import numpy as np
+from grpc import StatusCode
 from loguru import logger
 from tinkoff.invest import (
     AsyncClient,
     CandleInterval,
-    HistoricCandle,
     MarketDataResponse,
     OrderDirection,
     OrderType,
     PostOrderResponse,
+    RequestError,
     SecurityTradingStatus,
     Share,
 )
@@ -31,9 +33,23 @@ from tinkoff.invest.retrying.settings import RetryClientSettings
 from tinkoff.invest.retrying.aio.client import AsyncRetryingClient
 from tinkoff.invest.schemas import InstrumentIdType
 
+from src.api.rate_limiter import DEFAULT_REQUESTS_PER_MINUTE, AdaptiveRateLimiter
 from src.utils.config import Config
 from src.models.trade import Trade
 from src.data.schemas import CandleData
+from src.data.candle_store import CANDLE_DTYPE
+from src.data.ring_buffer import DEFAULT_DEPTH, CandleRingBuffer
+
+NS_PER_SECOND = 1_000_000_000
+
+# Максимальный период одного запроса свечей для интервала
+CANDLE_REQUEST_WINDOWS = {
+    CandleInterval.CANDLE_INTERVAL_1_MIN: timedelta(days=1),
+    CandleInterval.CANDLE_INTERVAL_5_MIN: timedelta(days=1),
+    CandleInterval.CANDLE_INTERVAL_15_MIN: timedelta(days=1),
+    CandleInterval.CANDLE_INTERVAL_HOUR: timedelta(days=7),
+    CandleInterval.CANDLE_INTERVAL_DAY: timedelta(days=365),
+}
 
 
 class TinkoffAPI:
@@ -44,7 +60,10 @@ class TinkoffAPI:
         config (Config): Конфигурация приложения
         client (AsyncRetryingClient): Клиент Tinkoff API с механизмом повтора
         instruments (Dict[str, Share]): Кэшированная информация об инструментах
-        last_candles (Dict[str, List[HistoricCandle]]): Последние полученные свечи
+        last_candles (Dict[str, CandleRingBuffer]): Последние свечи потока по инструментам
+        candle_callbacks (List[Callable[[str, CandleData], None]]): Обработчики закрытых свечей
+        price_callbacks (List[Callable[[str, float], None]]): Обработчики последних цен
+        candle_limiter (AdaptiveRateLimiter): Ограничитель частоты запросов свечей
     """
 
     def __init__(self, config: Config):
@@ -57,7 +76,13 @@ class TinkoffAPI:
         self.config = config
         self.client: Optional[AsyncRetryingClient] = None
         self.instruments: Dict[str, Share] = {}
-        self.last_candles: Dict[str, List[HistoricCandle]] = {}
+        self.candle_depth = getattr(config, "CANDLE_BUFFER_DEPTH", DEFAULT_DEPTH)
+        self.last_candles: Dict[str, CandleRingBuffer] = {}
+        self.candle_callbacks: List[Callable[[str, CandleData], None]] = []
+        self.price_callbacks: List[Callable[[str, float], None]] = []
+        self.candle_limiter = AdaptiveRateLimiter(
+            getattr(config, "CANDLE_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)
+        )
         self._market_data_stream: Optional[AsyncServices.MarketDataStream] = None
 
     async def connect(self):
@@ -159,16 +184,29 @@ class TinkoffAPI:
 
         candles = []
 
-        async for candle in self.client.get_all_candles(
-            figi=figi,
-            from_=from_dt,
-            to=to_dt,
-            interval=interval,
-        ):
-            candles.append(candle)
-
-        # Кэширование последних свечей
-        self.last_candles[figi] = candles[-100:]  # Сохраняем последние 100 свечей
+        # Диапазон делится на окна одного запроса, каждый запрос проходит
+        # через ограничитель частоты
+        window = CANDLE_REQUEST_WINDOWS.get(interval, timedelta(days=1))
+        window_start = from_dt
+        while window_start < to_dt:
+            window_end = min(window_start + window, to_dt)
+            try:
+                async with self.candle_limiter:
+                    async for candle in self.client.get_all_candles(
+                        figi=figi,
+                        from_=window_start,
+                        to=window_end,
+                        interval=interval,
+                    ):
+                        candles.append(candle)
+            except RequestError as e:
+                if e.code == StatusCode.RESOURCE_EXHAUSTED:
+                    reset = getattr(e.metadata, "ratelimit_reset", None)
+                    self.candle_limiter.throttled(float(reset) if reset else None)
+                    logger.warning(f"Превышен лимит запросов свечей, квота снижена до "
+                                   f"{int(self.candle_limiter.rate)} в минуту")
+                raise
+            window_start = window_end
 
         return [
             CandleData(
@@ -238,28 +276,124 @@ class TinkoffAPI:
             logger.error(f"Не удалось разместить ордер: {e}")
             return False, None
 
-    async def subscribe_to_market_data(self, figi_list: List[str]):
+    async def subscribe_to_market_data(
+            self,
+            figi_list: List[str],
+            interval: CandleInterval = CandleInterval.CANDLE_INTERVAL_1_MIN,
+    ):
         """
         Подписка на рыночные данные в реальном времени для указанных инструментов.
 
         Аргументы:
             figi_list: Список идентификаторов FIGI для подписки
+            interval: Интервал свечей потока
         """
         if not self.client:
             raise RuntimeError("Клиент API не подключен")
 
         self._market_data_stream = self.client.create_market_data_stream()
 
-        # Подписка на свечи и обновления стакана
+        # Подписка на свечи, обновления стакана и последние цены
         await self._market_data_stream.candles.subscribe(
-            [(figi, CandleInterval.CANDLE_INTERVAL_1_MIN) for figi in figi_list]
+            [(figi, interval) for figi in figi_list]
         )
 
         await self._market_data_stream.order_book.subscribe(figi_list, depth=10)
+        await self._market_data_stream.last_price.subscribe(figi_list)
 
         # Начало обработки входящих данных
         asyncio.create_task(self._process_market_data())
 
+    def add_candle_callback(self, callback: Callable[[str, CandleData], None]):
+        """
+        Регистрация обработчика закрытых свечей из потока рыночных данных.
+
+        Аргументы:
+            callback: Функция, получающая FIGI и закрытую свечу
+        """
+        self.candle_callbacks.append(callback)
+
+    def add_price_callback(self, callback: Callable[[str, float], None]):
+        """
+        Регистрация обработчика последних цен из потока рыночных данных.
+
+        Аргументы:
+            callback: Функция, получающая FIGI и цену
+        """
+        self.price_callbacks.append(callback)
+
+    def get_last_candles(self, figi: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        Последние свечи инструмента из потока (включая формирующуюся).
+
+        Аргументы:
+            figi: FIGI инструмента
+            n: Количество свечей (None — все в буфере)
+
+        Возвращает:
+            Массив CANDLE_DTYPE по возрастанию времени (срез без копирования)
+        """
+        buffer = self.last_candles.get(figi)
+        if buffer is None:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return buffer.last(n)
+
+    def _on_stream_candle(self, figi: str, candle):
+        """
+        Учет обновления свечи из потока.
+
+        Поток присылает текущую свечу несколько раз, пока она формируется:
+        обновления заменяют последнюю запись кольцевого буфера. Свеча
+        считается закрытой, когда приходит свеча со следующим временем,
+        и только тогда передается обработчикам. Запоздавшие обновления
+        более ранних свечей пропускаются.
+
+        Аргументы:
+            figi: FIGI инструмента
+            candle: Свеча из потока
+        """
+        buffer = self.last_candles.get(figi)
+        if buffer is None:
+            buffer = self.last_candles[figi] = CandleRingBuffer(self.candle_depth)
+
+        time = int(candle.time.timestamp()) * NS_PER_SECOND + candle.time.microsecond * 1000
+        previous_time = buffer.last_time
+        if previous_time is not None and time < previous_time:
+            return
+        if previous_time is not None and previous_time != time:
+            self._emit_closed_candle(figi, buffer.last(1)[0])
+
+        buffer.append(
+            time,
+            self._price_to_float(candle.open),
+            self._price_to_float(candle.high),
+            self._price_to_float(candle.low),
+            self._price_to_float(candle.close),
+            candle.volume,
+        )
+
+    def _emit_closed_candle(self, figi: str, record):
+        """
+        Передача закрытой свечи обработчикам.
+
+        Аргументы:
+            figi: FIGI инструмента
+            record: Запись свечи CANDLE_DTYPE
+        """
+        closed = CandleData(
+            open=float(record['open']),
+            high=float(record['high']),
+            low=float(record['low']),
+            close=float(record['close']),
+            volume=int(record['volume']),
+            time=datetime.fromtimestamp(int(record['time']) / NS_PER_SECOND, tz=timezone.utc),
+        )
+        for callback in self.candle_callbacks:
+            try:
+                callback(figi, closed)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика свечи {figi}: {e}")
+
     async def _process_market_data(self):
         """Обработка входящих рыночных данных из потока."""
         if not self._market_data_stream:
@@ -268,16 +402,7 @@ class TinkoffAPI:
         async for market_data in self._market_data_stream:
             if market_data.candle:
                 # Обработка обновления свечи
-                figi = market_data.candle.figi
-                candle = market_data.candle
-
-                if figi not in self.last_candles:
-                    self.last_candles[figi] = []
-
-                self.last_candles[figi].append(candle)
-                # Сохраняем только последние 100 свечей
-                if len(self.last_candles[figi]) > 100:
-                    self.last_candles[figi] = self.last_candles[figi][-100:]
+                self._on_stream_candle(market_data.candle.figi, market_data.candle)
 
             elif market_data.orderbook:
                 # Обработка обновления стакана
@@ -285,7 +410,24 @@ class TinkoffAPI:
 
             elif market_data.last_price:
                 # Обработка обновления последней цены
-                pass
+                self._emit_price(
+                    market_data.last_price.figi,
+                    self._price_to_float(market_data.last_price.price),
+                )
+
+    def _emit_price(self, figi: str, price: float):
+        """
+        Передача последней цены обработчикам.
+
+        Аргументы:
+            figi: FIGI инструмента
+            price: Цена
+        """
+        for callback in self.price_callbacks:
+            try:
+                callback(figi, price)
+            except Exception as e:
+                logger.error(f"Ошибка обработчика цены {figi}: {e}")
 
     def _price_to_float(self, price) -> float:
         """Конвертация цены Tinkoff API в float."""
@@ -0,0 +1,117 @@
+"""
+Счет симуляции для бэктестинга.
+
+Хранит балансы по валютам и позиции по инструментам в памяти процесса
+без обращения к брокеру. Капитал — сумма балансов, а при переданных
+ценах — еще и рыночная стоимость открытых позиций. При сокращении
+позиции фиксируется прибыль от средней цены входа, которая меняется
+только при наращивании позиции.
+"""
+
+from typing import Dict, Mapping, Optional
+
+
+class SimulatedAccount:
+    """
+    Счет бэктеста.
+
+    Attributes:
+        balances (Dict[str, Dict[str, float]]): Балансы по валютам
+            ('total' и 'available')
+        positions (Dict[str, Dict]): Открытые позиции по FIGI
+            ('figi', 'quantity', 'average_price')
+    """
+
+    def __init__(self, initial_balance: float = 0.0, currency: str = 'USD'):
+        self.balances: Dict[str, Dict[str, float]] = {}
+        self.positions: Dict[str, Dict] = {}
+        if initial_balance:
+            self.update_balance(currency, initial_balance)
+
+    def get_balance(self, currency: str) -> float:
+        """
+        Баланс в валюте.
+
+        Args:
+            currency: Валюта
+
+        Returns:
+            Общий баланс (0, если валюты нет на счете)
+        """
+        balance = self.balances.get(currency)
+        return balance['total'] if balance else 0
+
+    def update_balance(self, currency: str, amount: float):
+        """
+        Изменение баланса.
+
+        Args:
+            currency: Валюта
+            amount: Сумма
+        """
+        if currency not in self.balances:
+            self.balances[currency] = {'total': 0, 'available': 0}
+
+        self.balances[currency]['total'] += amount
+        self.balances[currency]['available'] += amount
+
+    def update_position(self, figi: str, amount: float, price: float) -> float:
+        """
+        Изменение позиции по инструменту.
+
+        Args:
+            figi: Идентификатор инструмента
+            amount: Количество (со знаком направления)
+            price: Цена
+
+        Returns:
+            Прибыль закрытой части позиции (0, если позиция не сокращалась)
+        """
+        if figi not in self.positions:
+            self.positions[figi] = {
+                'figi': figi,
+                'quantity': 0,
+                'average_price': 0
+            }
+
+        current = self.positions[figi]
+        quantity = current['quantity']
+        new_quantity = quantity + amount
+
+        realized = 0.0
+        if quantity * amount < 0:
+            closed = min(abs(amount), abs(quantity))
+            realized = closed * (price - current['average_price']) * (1 if quantity > 0 else -1)
+
+        if new_quantity == 0:
+            self.positions.pop(figi)
+            return realized
+
+        if quantity * amount >= 0:
+            current['average_price'] = (
+                current['average_price'] * quantity + price * amount
+            ) / new_quantity
+        elif quantity * new_quantity < 0:
+            # Разворот: остаток открыт по цене сделки
+            current['average_price'] = price
+        current['quantity'] = new_quantity
+
+        return realized
+
+    def total_equity(self, prices: Optional[Mapping[str, float]] = None) -> float:
+        """
+        Капитал счета.
+
+        Args:
+            prices: Текущие цены открытых позиций по FIGI (None — без
+                переоценки позиций)
+
+        Returns:
+            Сумма балансов по всем валютам и, если переданы цены, рыночной
+            стоимости позиций
+        """
+        equity = sum(balance['total'] for balance in self.balances.values())
+        if prices is not None:
+            for figi, position in self.positions.items():
+                equity += position['quantity'] * prices[figi]
+        return equity
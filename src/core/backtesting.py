@@ -3,12 +3,28 @@
 Включает:
 - Тестирование на исторических данных
 - Оптимизацию параметров
+- Walk-forward оптимизацию
+- Портфельный бэктест всех инструментов на общей матрице цен
 - Оценку результатов через метрики
+- Анализ устойчивости методом Монте-Карло
+- Кэширование результатов бэктестов на диске
+- Пакетный запуск бэктестов по набору периодов и инструментов
 """
 
 import asyncio
+import copy
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Tuple
 import numpy as np
 import pandas as pd
 from loguru import logger
@@ -16,10 +32,185 @@ import optuna
 from optuna.samplers import TPESampler
 from sklearn.model_selection import ParameterGrid
 
-from src.strategies.base_strategy import BaseStrategy
-from src.data.data_manager import DataManager
-from src.models.portfolio import Portfolio
-from src.utils.config import Config
+from src.core.account import SimulatedAccount
+from src.core.execution import ExecutionModel, rollover_days
+from src.core.ledger import TradeLedger, closed_trade_profits, equity_records, save_ledger
+from src.core.metrics import OnlineMetrics, vectorized_metrics
+from src.core.monte_carlo import DEFAULT_SIMULATIONS, monte_carlo
+from src.core.portfolio_engine import PortfolioBacktest, align_instruments, decision_rows
+from src.core.replay import NS_PER_YEAR, BarCursor, ReplayEngine, time_index_ns
+from src.core.shared_data import SharedCandles
+from src.core.sweep import grid_metrics, grid_table, simulate_grid
+from src.core.walk_forward import Fold, make_folds, slice_until, stitch_equity
+
+if TYPE_CHECKING:
+    from src.strategies.base_strategy import BaseStrategy
+    from src.data.data_manager import DataManager
+    from src.utils.config import Config
+
+
+# Настройки симуляции по умолчанию (совпадают со значениями в run_backtest)
+DEFAULT_SIMULATION_OPTIONS = {
+    'initial_balance': 10000,
+    'decision_interval': None,
+    'skip_closed': True,
+}
+
+
+# Количество контрольных точек промежуточных метрик за прогон
+DEFAULT_CHECKPOINTS = 20
+
+# Доля кандидатов (1/eta), проходящих в следующий раунд successive halving
+HALVING_ETA = 3
+
+
+class BacktestJob(NamedTuple):
+    """Задание пакетного бэктеста: период и (необязательно) набор инструментов."""
+    name: str
+    start_date: datetime
+    end_date: datetime
+    instruments: Optional[List[str]] = None
+
+
+class BacktestResultCache:
+    """
+    Дисковый кэш результатов бэктестов с адресацией по содержимому.
+
+    Ключ — хэш класса и версии стратегии, ее параметров, списка
+    инструментов, диапазона дат, настроек симуляции и отпечатка свечей.
+    Записи хранятся в подкаталоге стратегии в файлах `<версия>-<ключ>.pkl`;
+    при превышении лимита размера удаляются давно не использованные.
+
+    Attributes:
+        directory (Path): Каталог кэша
+        max_bytes (int): Максимальный суммарный размер записей
+    """
+
+    def __init__(self, directory: str = 'data/backtest_cache', max_bytes: int = 512 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(
+            self,
+            strategy: 'BaseStrategy',
+            params: Dict,
+            fingerprint: str,
+            start_date: datetime,
+            end_date: datetime,
+            options: Dict,
+    ) -> str:
+        """
+        Ключ записи кэша.
+
+        Args:
+            strategy: Стратегия
+            params: Параметры стратегии
+            fingerprint: Отпечаток свечей (см. `data_fingerprint`)
+            start_date: Начальная дата
+            end_date: Конечная дата
+            options: Настройки симуляции
+
+        Returns:
+            Путь записи относительно каталога кэша
+        """
+        payload = json.dumps({
+            'strategy': _strategy_name(strategy),
+            'version': strategy_version(strategy),
+            'params': params,
+            'data': fingerprint,
+            'start': str(start_date),
+            'end': str(end_date),
+            'options': options,
+        }, sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode()).hexdigest()
+        return f"{_strategy_name(strategy)}/{strategy_version(strategy)}-{digest}.pkl"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Получение результата из кэша.
+
+        Args:
+            key: Ключ записи
+
+        Returns:
+            Словарь с 'metrics', 'equity_curve' и (если был сохранен)
+            'ledger' или None
+        """
+        path = self.directory / key
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+        os.utime(path)  # Отметка использования для вытеснения LRU
+        return result
+
+    def put(
+            self,
+            key: str,
+            metrics: Dict[str, float],
+            equity_curve: pd.DataFrame,
+            ledger: Optional[TradeLedger] = None,
+    ):
+        """
+        Сохранение результата в кэш.
+
+        Args:
+            key: Ключ записи
+            metrics: Метрики бэктеста
+            equity_curve: Кривая баланса
+            ledger: Журнал сделок
+        """
+        path = self.directory / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'metrics': metrics, 'equity_curve': equity_curve, 'ledger': ledger}, f)
+        os.replace(tmp_path, path)
+
+        self._evict()
+
+    def invalidate_stale(self, strategy: 'BaseStrategy') -> int:
+        """
+        Удаление записей стратегии, сохраненных другой версией ее кода.
+
+        Args:
+            strategy: Стратегия
+
+        Returns:
+            Количество удаленных записей
+        """
+        version = strategy_version(strategy)
+        removed = 0
+        for path in (self.directory / _strategy_name(strategy)).glob('*.pkl'):
+            if not path.name.startswith(f"{version}-"):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def clear(self):
+        """Удаление всех записей."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _evict(self):
+        """Удаление давно не использованных записей сверх лимита размера."""
+        entries = []
+        for path in self.directory.glob('*/*.pkl'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
 
 
 class Backtester:
@@ -30,101 +221,445 @@ class Backtester:
         strategy (BaseStrategy): Стратегия для тестирования
         data_manager (DataManager): Менеджер данных
         config (Config): Конфигурация
-        results (pd.DataFrame): Результаты тестов
+        cache (BacktestResultCache): Кэш результатов (необязательно)
+        execution (ExecutionModel): Модель исполнения ордеров
+        results (pd.DataFrame): Кривая баланса последнего бэктеста
+        ledger (TradeLedger): Журнал сделок последнего бэктеста
     """
 
-    def __init__(self, strategy: BaseStrategy, data_manager: DataManager, config: Config):
+    def __init__(
+            self,
+            strategy: 'BaseStrategy',
+            data_manager: 'DataManager',
+            config: 'Config',
+            cache: Optional[BacktestResultCache] = None,
+            execution: Optional[ExecutionModel] = None,
+    ):
         self.strategy = strategy
         self.data_manager = data_manager
         self.config = config
+        self.cache = cache
+        self.execution = execution or ExecutionModel()
         self.results = pd.DataFrame()
+        self.ledger: Optional[TradeLedger] = None
         self._best_params = {}
+        self._tracker: Optional[OnlineMetrics] = None
+
+        if self.cache:
+            self.cache.invalidate_stale(strategy)
 
     async def run_backtest(
             self,
             start_date: datetime,
             end_date: datetime,
             initial_balance: float = 10000,
+            decision_interval: Optional[timedelta] = None,
+            skip_closed: bool = True,
     ) -> Dict[str, float]:
         """
         Запуск бэктеста стратегии на исторических данных.
 
+        Шаги симуляции идут по реальным временным меткам свечей всех
+        инструментов, а не по календарным дням.
+
         Args:
             start_date: Начальная дата
             end_date: Конечная дата
             initial_balance: Начальный баланс
+            decision_interval: Интервал принятия решений (None — каждый бар)
+            skip_closed: Пропускать выходные рынка FX
 
         Returns:
             Словарь с метриками производительности
         """
         logger.info(f"Running backtest from {start_date} to {end_date}")
 
-        # Инициализация портфеля
-        portfolio = Portfolio(self.config, None)
-        await portfolio.initialize()
-        portfolio.update_balance('USD', initial_balance)
-
         # Получение исторических данных
-        historical_data = {}
-        for figi in self.strategy.instruments:
-            candles = await self.data_manager.get_historical_candles(
-                figi=figi,
-                start_date=start_date,
-                end_date=end_date,
-                interval='1h'
+        historical_data = await self._load_historical_data(start_date, end_date)
+
+        if not historical_data:
+            raise ValueError("No historical data available for backtesting")
+
+        options = {
+            'initial_balance': initial_balance,
+            'decision_interval': decision_interval,
+            'skip_closed': skip_closed,
+        }
+
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.key(
+                self.strategy,
+                _strategy_params(self.strategy),
+                data_fingerprint(historical_data),
+                start_date,
+                end_date,
+                _cache_options(options, self.execution, self.config),
             )
-            if candles:
-                historical_data[figi] = candles
+            cached = self.cache.get(cache_key)
+            # Записи без журнала сделок (старые) считаются промахом
+            if cached and cached.get('ledger') is not None:
+                self.results = cached['equity_curve']
+                self.ledger = cached.get('ledger')
+                logger.info("Backtest result loaded from cache")
+                return cached['metrics']
 
+        metrics = await self._simulate(historical_data, start_date, end_date, **options)
+        self.results = self._tracker.equity_curve()
+
+        if cache_key:
+            self.cache.put(cache_key, metrics, self.results, self.ledger)
+
+        logger.success(f"Backtest completed. Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
+        return metrics
+
+    async def run_backtests(self, jobs: List[BacktestJob], n_jobs: int = 1) -> pd.DataFrame:
+        """
+        Пакетный бэктест стратегии на наборе периодов и инструментов.
+
+        Свечи объединения всех заданий загружаются один раз, а каждое
+        задание получает срезы без копирования. При `n_jobs` > 1 задания
+        выполняются параллельно в пуле процессов.
+
+        Args:
+            jobs: Задания (BacktestJob или словари с теми же полями)
+            n_jobs: Количество процессов (-1 — все ядра)
+
+        Returns:
+            Таблица: одна строка на задание с его границами, инструментами
+            и метриками, в порядке заданий
+        """
+        jobs = [job if isinstance(job, BacktestJob) else BacktestJob(**job) for job in jobs]
+        if not jobs:
+            raise ValueError("No backtest jobs given")
+
+        logger.info(f"Running {len(jobs)} backtests")
+
+        instruments = list(dict.fromkeys(
+            [*self.strategy.instruments, *(figi for job in jobs for figi in job.instruments or [])]
+        ))
+        historical_data = await self._load_historical_data(
+            min(job.start_date for job in jobs),
+            max(job.end_date for job in jobs),
+            instruments,
+        )
         if not historical_data:
             raise ValueError("No historical data available for backtesting")
 
+        n_jobs = min(_resolve_n_jobs(n_jobs), len(jobs))
+        if n_jobs <= 1:
+            results = [await self._run_job(historical_data, job) for job in jobs]
+        else:
+            loop = asyncio.get_running_loop()
+            with SharedCandles.publish(historical_data) as candles, self._worker_pool(n_jobs, candles) as pool:
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _run_batch_job, job) for job in jobs
+                ))
+
+        table = pd.DataFrame([
+            {
+                'job': job.name,
+                'start_date': job.start_date,
+                'end_date': job.end_date,
+                'instruments': ','.join(used),
+                **metrics,
+            }
+            for job, (used, metrics) in zip(jobs, results)
+        ])
+        logger.success(f"Completed {len(jobs)} backtests")
+        return table
+
+    async def _run_job(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            job: BacktestJob,
+    ) -> Tuple[List[str], Dict[str, float]]:
+        """
+        Бэктест одного задания на срезах загруженных данных.
+
+        Args:
+            historical_data: Свечи объединения всех заданий
+            job: Задание
+
+        Returns:
+            Кортеж (использованные инструменты, метрики)
+        """
+        figis = job.instruments or self.strategy.instruments
+        data = slice_until(
+            {figi: historical_data[figi] for figi in figis if figi in historical_data},
+            job.end_date,
+        )
+        return list(data), await self._simulate(data, job.start_date, job.end_date)
+
+    async def _simulate(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            start_date: datetime,
+            end_date: datetime,
+            initial_balance: float = 10000,
+            decision_interval: Optional[timedelta] = None,
+            skip_closed: bool = True,
+            checkpoint: Optional[Callable[[int, Dict[str, float]], None]] = None,
+            n_checkpoints: int = DEFAULT_CHECKPOINTS,
+            include_end: bool = True,
+    ) -> Dict[str, float]:
+        """
+        Симуляция торговли на уже загруженных данных.
+
+        Args:
+            historical_data: Свечи по инструментам
+            start_date: Начальная дата
+            end_date: Конечная дата
+            initial_balance: Начальный баланс
+            decision_interval: Интервал принятия решений (None — каждый бар)
+            skip_closed: Пропускать выходные рынка FX
+            checkpoint: Функция, получающая номер контрольной точки и
+                промежуточные метрики; исключение из нее прерывает симуляцию
+            n_checkpoints: Количество контрольных точек за прогон
+            include_end: Включать бар ровно на `end_date`
+
+        Returns:
+            Словарь с метриками производительности
+        """
+        # Инициализация счета симуляции
+        portfolio = SimulatedAccount(initial_balance)
+
         # Симуляция торговли
-        trades = []
-        equity_curve = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            for figi, data in historical_data.items():
-                # Получаем данные для текущей даты
-                current_data = data[data['time'] <= current_date].tail(100)
-                if len(current_data) < 20:
+        replay = ReplayEngine(historical_data)
+        clock = replay.clock(start_date, end_date, decision_interval, skip_closed, include_end)
+        batch_signals = self._batch_signals(replay)
+        if batch_signals is not None:
+            # Списки Python: чтение по одному элементу быстрее, чем из массива
+            batch_signals = {figi: values.tolist() for figi, values in batch_signals.items()}
+        tracker = OnlineMetrics(len(clock), clock.periods_per_year())
+        self._tracker = tracker
+        self.ledger = TradeLedger(list(historical_data))
+        checkpoint_every = max(1, len(clock) // max(1, n_checkpoints))
+
+        previous_time = None
+        for step, current_time in enumerate(clock, start=1):
+            # Ордера всех инструментов бара: (FIGI, направление, объем, курсор)
+            orders = []
+            for figi, cursor in replay.step(current_time):
+                if batch_signals is not None:
+                    size = batch_signals[figi][cursor.position - 1]
+                    if size:
+                        orders.append((figi, 1.0 if size > 0 else -1.0, abs(size), cursor))
                     continue
 
-                # Генерируем сигналы
-                signals = await self.strategy.generate_signals(figi, current_data)
+                # Окно данных на текущую дату (срез без копирования)
+                for signal in await self.strategy.generate_signals(figi, cursor.view()):
+                    if not signal:
+                        continue
+                    side = 1.0 if signal['direction'] == 'buy' else -1.0
+                    orders.append((signal['figi'], side, signal['size'], cursor))
 
-                # Исполнение сигналов
-                for signal in signals:
-                    trade = await self._execute_signal(
-                        signal=signal,
-                        portfolio=portfolio,
-                        current_price=current_data.iloc[-1]['close']
-                    )
-                    if trade:
-                        trades.append(trade)
+            # Исполнение сигналов
+            if orders:
+                self._execute_signals(current_time, orders, portfolio, tracker)
 
-            # Запись состояния портфеля
-            equity_curve.append({
-                'date': current_date,
-                'balance': portfolio.get_balance('USD'),
-                'equity': portfolio.total_equity()
-            })
+            # Своп за перенос открытых позиций через 22:00 UTC
+            if previous_time is not None and portfolio.positions:
+                self._charge_swap(portfolio, replay, previous_time, current_time)
+            previous_time = current_time
 
-            current_date += timedelta(days=1)
+            # Запись состояния портфеля: капитал с переоценкой открытых позиций
+            prices = {figi: replay.cursors[figi].last_close for figi in portfolio.positions}
+            tracker.update(current_time, portfolio.get_balance('USD'), portfolio.total_equity(prices))
 
-        # Расчет метрик
-        metrics = self._calculate_metrics(trades, equity_curve)
+            if checkpoint and step % checkpoint_every == 0 and step < len(clock):
+                checkpoint(step // checkpoint_every, tracker.snapshot())
 
-        logger.success(f"Backtest completed. Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
+        return tracker.snapshot()
+
+    async def run_portfolio_backtest(
+            self,
+            start_date: datetime,
+            end_date: datetime,
+            initial_balance: float = 10000,
+            decision_interval: Optional[timedelta] = None,
+            skip_closed: bool = True,
+            max_leverage: float = 10.0,
+    ) -> Dict[str, float]:
+        """
+        Бэктест всех инструментов одним портфелем.
+
+        Свечи выравниваются в матрицу T×N, а ордера всех инструментов на
+        каждом шаге исполняются одной векторной операцией с общим балансом
+        и лимитом маржи. Капитал включает переоценку открытых позиций,
+        поэтому просадки по коррелированным парам складываются.
+        Требуется пакетный режим стратегии (`generate_signals_batch`).
+
+        Args:
+            start_date: Начальная дата
+            end_date: Конечная дата
+            initial_balance: Начальный баланс
+            decision_interval: Интервал принятия решений (None — каждый бар)
+            skip_closed: Пропускать выходные рынка FX
+            max_leverage: Максимальное плечо по портфелю
+
+        Returns:
+            Словарь с метриками производительности
+        """
+        logger.info(f"Running portfolio backtest from {start_date} to {end_date}")
+
+        historical_data = await self._load_historical_data(start_date, end_date)
+        if not historical_data:
+            raise ValueError("No historical data available for backtesting")
+
+        replay = ReplayEngine(historical_data)
+        batch_signals = self._batch_signals(replay)
+        if batch_signals is None:
+            raise ValueError("Portfolio backtest requires a strategy with generate_signals_batch")
+
+        prices = align_instruments({figi: cursor.data for figi, cursor in replay.cursors.items()})
+        clock = replay.clock(start_date, end_date, decision_interval, skip_closed)
+        engine = PortfolioBacktest(
+            prices,
+            risk_per_trade=self.config.risk_per_trade,
+            execution=self.execution,
+            max_leverage=max_leverage,
+            min_bars=replay.min_bars,
+        )
+        tracker = engine.run(
+            PortfolioBacktest.orders_from_signals(prices, batch_signals),
+            decision_rows(prices, clock.events),
+            initial_balance,
+            clock.periods_per_year(),
+        )
+
+        self._tracker = tracker
+        self.results = tracker.equity_curve()
+        metrics = tracker.snapshot()
+
+        logger.success(f"Portfolio backtest completed. Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
         return metrics
 
+    def assess_robustness(
+            self,
+            n_simulations: int = DEFAULT_SIMULATIONS,
+            method: str = 'bootstrap',
+            seed: Optional[int] = None,
+            level: str = 'equity',
+    ) -> Dict:
+        """
+        Анализ устойчивости последнего бэктеста методом Монте-Карло.
+
+        На уровне 'equity' пересэмплируются доходности кривой капитала из
+        `self.results`, на уровне 'trades' — прибыли закрытых сделок из
+        журнала `self.ledger`. По путям считаются доверительные интервалы
+        Sharpe, максимальной просадки и доходности, а также вероятность
+        разорения.
+
+        Args:
+            n_simulations: Количество путей
+            method: 'bootstrap' или 'shuffle'
+            seed: Зерно генератора
+            level: 'equity' или 'trades'
+
+        Returns:
+            Результаты анализа
+        """
+        if self.results.empty:
+            raise ValueError("Run a backtest before assessing robustness")
+
+        equity = self.results['equity'].to_numpy(dtype=float)
+        times = time_index_ns(self.results['date'])
+        span = times[-1] - times[0] if len(times) > 1 else 0
+
+        if level == 'trades':
+            if self.ledger is None:
+                raise ValueError("Trade-level analysis requires the trade ledger of the backtest")
+            profits = closed_trade_profits(self.ledger.trades)
+            # Нормировка Sharpe по числу сделок в году
+            periods_per_year = len(profits) * NS_PER_YEAR / span if span > 0 else 252
+            return monte_carlo(
+                profits=profits,
+                initial_balance=equity[0],
+                n_simulations=n_simulations,
+                method=method,
+                periods_per_year=periods_per_year,
+                seed=seed,
+            )
+        if level != 'equity':
+            raise ValueError(f"Unknown robustness level: {level}")
+
+        periods_per_year = (len(times) - 1) * NS_PER_YEAR / span if span > 0 else 252
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = equity[1:] / equity[:-1] - 1
+        return monte_carlo(
+            returns,
+            n_simulations=n_simulations,
+            method=method,
+            periods_per_year=periods_per_year,
+            seed=seed,
+        )
+
+    def _batch_signals(self, replay: ReplayEngine) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Расчет сигналов по всей истории, если стратегия поддерживает пакетный режим.
+
+        Args:
+            replay: Движок воспроизведения с курсорами инструментов
+
+        Returns:
+            Словарь FIGI -> массив размеров сделок по барам или None
+        """
+        generate_batch = getattr(self.strategy, 'generate_signals_batch', None)
+        if generate_batch is None:
+            return None
+
+        batch_signals = {}
+        for figi, cursor in replay.cursors.items():
+            signals = generate_batch(figi, cursor.columns())
+            if signals is None:
+                return None
+            batch_signals[figi] = np.nan_to_num(np.asarray(signals, dtype=float))
+
+        return batch_signals
+
+    async def _load_historical_data(
+            self,
+            start_date: datetime,
+            end_date: datetime,
+            instruments: Optional[List[str]] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Загрузка свечей по инструментам.
+
+        Args:
+            start_date: Начальная дата
+            end_date: Конечная дата
+            instruments: Инструменты (по умолчанию — все инструменты стратегии)
+
+        Returns:
+            Словарь FIGI -> DataFrame с колонкой 'time'
+        """
+        historical_data = {}
+        for figi in instruments or self.strategy.instruments:
+            candles = await self.data_manager.get_historical_candles(
+                figi=figi,
+                start_date=start_date,
+                end_date=end_date,
+                interval='1h'
+            )
+            if candles is None or candles.empty:
+                continue
+            if 'time' not in candles.columns:
+                candles = candles.reset_index()
+            historical_data[figi] = candles
+
+        return historical_data
+
     async def optimize_parameters(
             self,
             start_date: datetime,
             end_date: datetime,
             optimization_method: str = 'optuna',
             n_trials: int = 100,
+            n_jobs: int = 1,
+            storage: Optional[str] = None,
+            pruner: Optional[str] = None,
     ) -> Dict:
         """
         Оптимизация параметров стратегии.
@@ -132,175 +667,606 @@ class Backtester:
         Args:
             start_date: Начальная дата
             end_date: Конечная дата
-            optimization_method: Метод оптимизации (optuna/grid)
+            optimization_method: Метод оптимизации (optuna/grid/sweep/halving)
             n_trials: Количество испытаний для Optuna
+            n_jobs: Количество процессов (-1 — все ядра)
+            storage: URL хранилища исследования Optuna (по умолчанию
+                временный файл SQLite при n_jobs > 1)
+            pruner: Досрочная остановка испытаний Optuna (median/hyperband)
 
         Returns:
             Оптимальные параметры
         """
         logger.info(f"Optimizing strategy parameters using {optimization_method}")
 
+        # Данные загружаются один раз для всех испытаний
+        historical_data = await self._load_historical_data(start_date, end_date)
+        if not historical_data:
+            raise ValueError("No historical data available for backtesting")
+
         if optimization_method == 'optuna':
-            study = optuna.create_study(
-                direction='maximize',
-                sampler=TPESampler()
+            self._best_params = await self._run_optuna(
+                historical_data, start_date, end_date, n_trials, n_jobs, storage, pruner
             )
-            study.optimize(
-                lambda trial: self._objective(trial, start_date, end_date),
-                n_trials=n_trials
-            )
-            self._best_params = study.best_params
+        elif optimization_method == 'sweep':
+            self._best_params = self._run_sweep(historical_data, start_date, end_date)
+        elif optimization_method == 'halving':
+            self._best_params = await self._run_halving(historical_data, start_date, end_date, n_jobs)
         else:
-            param_grid = self.strategy.get_parameter_grid()
-            grid = ParameterGrid(param_grid)
+            grid = list(ParameterGrid(self.strategy.get_parameter_grid()))
 
             best_metric = -np.inf
-            for params in grid:
-                self.strategy.set_parameters(**params)
-                metrics = await self.run_backtest(start_date, end_date)
-
-                if metrics['sharpe_ratio'] > best_metric:
+            best_index = len(grid)
+            async for index, params, metrics in self._run_grid(
+                    grid, historical_data, start_date, end_date, n_jobs
+            ):
+                logger.info(f"Grid point {params}: Sharpe Ratio {metrics['sharpe_ratio']:.2f}")
+                # При равенстве метрик побеждает более ранняя точка сетки,
+                # чтобы результат не зависел от порядка завершения процессов
+                if (metrics['sharpe_ratio'] > best_metric
+                        or (metrics['sharpe_ratio'] == best_metric and index < best_index)):
                     best_metric = metrics['sharpe_ratio']
+                    best_index = index
                     self._best_params = params
 
         logger.success(f"Optimization complete. Best params: {self._best_params}")
         return self._best_params
 
-    def _calculate_metrics(
+    async def _run_grid(
             self,
-            trades: List[Dict],
-            equity_curve: List[Dict]
-    ) -> Dict[str, float]:
+            grid: List[Dict],
+            historical_data: Dict[str, pd.DataFrame],
+            start_date: datetime,
+            end_date: datetime,
+            n_jobs: int = 1,
+    ) -> AsyncIterator[Tuple[int, Dict, Dict[str, float]]]:
         """
-        Расчет метрик производительности.
+        Прогон бэктестов по точкам сетки параметров.
+
+        При `n_jobs` > 1 точки распределяются по пулу процессов. Свечи
+        публикуются один раз через memory map, а результаты возвращаются
+        по мере готовности.
 
         Args:
-            trades: Список сделок
-            equity_curve: Кривая баланса
+            grid: Точки сетки параметров
+            historical_data: Свечи по инструментам
+            start_date: Начальная дата
+            end_date: Конечная дата
+            n_jobs: Количество процессов (-1 — все ядра)
+
+        Yields:
+            Кортежи (номер точки, параметры, метрики); точки из кэша
+            возвращаются первыми
+        """
+        cache_keys = {}
+        pending = list(enumerate(grid))
+        if self.cache:
+            fingerprint = data_fingerprint(historical_data)
+            base_params = _strategy_params(self.strategy)
+            pending = []
+            for index, params in enumerate(grid):
+                cache_keys[index] = self.cache.key(
+                    self.strategy, {**base_params, **params}, fingerprint, start_date, end_date,
+                    _cache_options(DEFAULT_SIMULATION_OPTIONS, self.execution, self.config),
+                )
+                cached = self.cache.get(cache_keys[index])
+                if cached:
+                    yield index, params, cached['metrics']
+                else:
+                    pending.append((index, params))
+
+        if not pending:
+            return
+
+        n_jobs = min(_resolve_n_jobs(n_jobs), len(pending))
+
+        if n_jobs <= 1:
+            for index, params in pending:
+                self.strategy.set_parameters(**params)
+                metrics = await self._simulate(historical_data, start_date, end_date)
+                if self.cache:
+                    self.cache.put(cache_keys[index], metrics, self._tracker.equity_curve(), self.ledger)
+                yield index, params, metrics
+            return
+
+        loop = asyncio.get_running_loop()
+        with SharedCandles.publish(historical_data) as candles, self._worker_pool(n_jobs, candles) as pool:
+            futures = [
+                loop.run_in_executor(pool, _run_grid_point, index, params, start_date, end_date)
+                for index, params in pending
+            ]
+            for future in asyncio.as_completed(futures):
+                index, params, metrics, equity_curve, ledger = await future
+                if self.cache:
+                    self.cache.put(cache_keys[index], metrics, equity_curve, ledger)
+                yield index, params, metrics
+
+    async def _run_optuna(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            start_date: datetime,
+            end_date: datetime,
+            n_trials: int,
+            n_jobs: int = 1,
+            storage: Optional[str] = None,
+            pruner: Optional[str] = None,
+    ) -> Dict:
+        """
+        Оптимизация через Optuna без блокировки цикла событий.
+
+        В одном процессе испытания выполняются в отдельном потоке. При
+        `n_jobs` > 1 исследование хранится в общем хранилище (SQLite),
+        а испытания параллельно выполняют процессы-исполнители.
+
+        Args:
+            historical_data: Свечи по инструментам
+            start_date: Начальная дата
+            end_date: Конечная дата
+            n_trials: Общее количество испытаний
+            n_jobs: Количество процессов (-1 — все ядра)
+            storage: URL хранилища исследования
+            pruner: Досрочная остановка испытаний (median/hyperband)
 
         Returns:
-            Словарь с метриками
-        """
-        if not trades or not equity_curve:
-            return {
-                'sharpe_ratio': 0,
-                'max_drawdown': 0,
-                'win_rate': 0,
-                'profit_factor': 0,
-                'total_return': 0,
-                'sortino_ratio': 0
-            }
+            Лучшие параметры
+        """
+        n_jobs = min(_resolve_n_jobs(n_jobs), n_trials)
+
+        if n_jobs <= 1:
+            study = optuna.create_study(
+                direction='maximize',
+                sampler=TPESampler(),
+                pruner=_make_pruner(pruner),
+                storage=_make_storage(storage)
+            )
+            await asyncio.to_thread(
+                study.optimize,
+                lambda trial: self._objective(trial, historical_data, start_date, end_date),
+                n_trials=n_trials
+            )
+            return study.best_params
+
+        workdir = None
+        if storage is None:
+            workdir = tempfile.mkdtemp(prefix='backtest-optuna-')
+            storage = f"sqlite:///{Path(workdir) / 'study.db'}"
+
+        try:
+            study = optuna.create_study(
+                direction='maximize',
+                sampler=TPESampler(),
+                pruner=_make_pruner(pruner),
+                storage=_make_storage(storage),
+                study_name=f"backtest-{uuid.uuid4().hex}"
+            )
+            trials_per_worker = [
+                n_trials // n_jobs + (1 if worker < n_trials % n_jobs else 0)
+                for worker in range(n_jobs)
+            ]
+
+            loop = asyncio.get_running_loop()
+            with SharedCandles.publish(historical_data) as candles, self._worker_pool(n_jobs, candles) as pool:
+                await asyncio.gather(*(
+                    loop.run_in_executor(
+                        pool, _run_optuna_trials, study.study_name, storage, count, start_date, end_date, pruner
+                    )
+                    for count in trials_per_worker
+                ))
+
+            return study.best_params
+        finally:
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
 
-        # Конвертируем в DataFrame
-        trades_df = pd.DataFrame(trades)
-        equity_df = pd.DataFrame(equity_curve)
-        equity_df.set_index('date', inplace=True)
+    async def _run_halving(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            start_date: datetime,
+            end_date: datetime,
+            n_jobs: int = 1,
+            eta: int = HALVING_ETA,
+    ) -> Dict:
+        """
+        Перебор сетки методом последовательного деления (successive halving).
+
+        Все точки сетки оцениваются на коротком начальном отрезке, дальше
+        проходит лучшая 1/eta часть, а отрезок удлиняется в eta раз, пока
+        оставшиеся кандидаты не будут оценены на всем диапазоне.
+
+        Args:
+            historical_data: Свечи по инструментам
+            start_date: Начальная дата
+            end_date: Конечная дата
+            n_jobs: Количество процессов (-1 — все ядра)
+            eta: Во сколько раз сокращается число кандидатов за раунд
 
-        # Рассчитываем доходности
-        equity_df['returns'] = equity_df['equity'].pct_change()
-        equity_df['cum_returns'] = (1 + equity_df['returns']).cumprod()
+        Returns:
+            Лучшие параметры
+        """
+        grid = list(ParameterGrid(self.strategy.get_parameter_grid()))
+        candidates = list(range(len(grid)))
+        rounds = max(1, int(np.ceil(np.log(len(grid)) / np.log(eta)))) if len(grid) > 1 else 1
+        span = end_date - start_date
+
+        for round_number in range(rounds):
+            window_end = start_date + span / eta ** (rounds - 1 - round_number)
+            scores = {}
+            async for index, params, metrics in self._run_grid(
+                    [grid[i] for i in candidates],
+                    slice_until(historical_data, window_end),
+                    start_date,
+                    window_end,
+                    n_jobs
+            ):
+                sharpe = metrics['sharpe_ratio']
+                scores[candidates[index]] = sharpe if np.isfinite(sharpe) else -np.inf
 
-        # Sharpe Ratio
-        sharpe_ratio = np.sqrt(252) * equity_df['returns'].mean() / equity_df['returns'].std()
+            # При равенстве метрик выше остается более ранняя точка сетки
+            ranked = sorted(candidates, key=lambda i: (-scores[i], i))
+            keep = len(ranked) if round_number == rounds - 1 else max(1, int(np.ceil(len(ranked) / eta)))
+            candidates = ranked[:keep]
+            logger.info(
+                f"Halving round {round_number + 1}/{rounds} up to {window_end}: "
+                f"{len(ranked)} candidates, {keep} kept"
+            )
 
-        # Sortino Ratio
-        downside_returns = equity_df[equity_df['returns'] < 0]['returns']
-        sortino_ratio = np.sqrt(252) * equity_df['returns'].mean() / downside_returns.std()
+        return grid[candidates[0]]
 
-        # Max Drawdown
-        roll_max = equity_df['cum_returns'].cummax()
-        drawdown = equity_df['cum_returns'] / roll_max - 1
-        max_drawdown = drawdown.min()
+    async def walk_forward(
+            self,
+            start_date: datetime,
+            end_date: datetime,
+            train_period: timedelta,
+            test_period: timedelta,
+            anchored: bool = False,
+            n_jobs: int = 1,
+    ) -> Dict:
+        """
+        Walk-forward оптимизация.
+
+        На каждом обучающем отрезке параметры подбираются перебором сетки,
+        затем проверяются на следующем тестовом отрезке. Данные загружаются
+        один раз, фолды получают срезы без копирования, независимые фолды
+        выполняются в пуле процессов.
+
+        Args:
+            start_date: Начальная дата
+            end_date: Конечная дата
+            train_period: Длина обучающего отрезка
+            test_period: Длина тестового отрезка
+            anchored: Обучение всегда с начала истории (иначе скользящее окно)
+            n_jobs: Количество процессов (-1 — все ядра)
+
+        Returns:
+            Словарь с результатами фолдов ('folds'), склеенной внеобразцовой
+            кривой баланса ('equity_curve') и ее метриками ('metrics')
+        """
+        logger.info(f"Walk-forward optimization from {start_date} to {end_date}")
 
-        # Win Rate
-        if 'profit' in trades_df.columns:
-            win_rate = (trades_df['profit'] > 0).mean()
+        folds = make_folds(start_date, end_date, train_period, test_period, anchored)
+        if not folds:
+            raise ValueError("Date range is shorter than the training period")
+
+        historical_data = await self._load_historical_data(start_date, end_date)
+        if not historical_data:
+            raise ValueError("No historical data available for backtesting")
+
+        grid = list(ParameterGrid(self.strategy.get_parameter_grid()))
+        n_jobs = min(_resolve_n_jobs(n_jobs), len(folds))
+
+        if n_jobs <= 1:
+            results = [await self._evaluate_fold(historical_data, fold, grid) for fold in folds]
         else:
-            win_rate = 0
+            loop = asyncio.get_running_loop()
+            with SharedCandles.publish(historical_data) as candles, self._worker_pool(n_jobs, candles) as pool:
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _run_walk_forward_fold, fold, grid)
+                    for fold in folds
+                ))
+
+        equity_curve = stitch_equity([result['equity_curve'] for result in results])
+        returns = equity_curve['equity'].pct_change().to_numpy()[1:]
+        periods_per_year = ReplayEngine(historical_data).clock(start_date, end_date).periods_per_year()
+        metrics = {
+            name: float(values[0])
+            for name, values in vectorized_metrics(returns, periods_per_year).items()
+        }
+        metrics['num_trades'] = sum(result['test_metrics'].get('num_trades', 0) for result in results)
 
-        # Profit Factor
-        gross_profit = trades_df[trades_df['profit'] > 0]['profit'].sum()
-        gross_loss = abs(trades_df[trades_df['profit'] < 0]['profit'].sum()
-        profit_factor = gross_profit / gross_loss if gross_loss > 0 else np.inf
+        self.results = equity_curve
+        logger.success(f"Walk-forward completed. Out-of-sample Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
+        return {'folds': results, 'equity_curve': equity_curve, 'metrics': metrics}
 
-        # Total Return
-        initial_equity = equity_df.iloc[0]['equity']
-        final_equity = equity_df.iloc[-1]['equity']
-        total_return = (final_equity - initial_equity) / initial_equity
+    async def _evaluate_fold(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            fold: Fold,
+            grid: List[Dict],
+    ) -> Dict:
+        """
+        Оптимизация на обучающем отрезке фолда и проверка на тестовом.
+
+        Отрезки полуоткрытые: бар на границе относится к следующему отрезку,
+        поэтому склеенная кривая не содержит повторяющихся моментов.
+
+        Args:
+            historical_data: Свечи по инструментам
+            fold: Границы фолда
+            grid: Точки сетки параметров
+
+        Returns:
+            Словарь с границами, лучшими параметрами, метриками и кривой
+            баланса тестового отрезка
+        """
+        train_data = slice_until(historical_data, fold.train_end)
+
+        best_metric = -np.inf
+        best_params = grid[0] if grid else {}
+        best_train_metrics: Dict[str, float] = {}
+        for params in grid:
+            self.strategy.set_parameters(**params)
+            metrics = await self._simulate(train_data, fold.train_start, fold.train_end, include_end=False)
+            if metrics['sharpe_ratio'] > best_metric:
+                best_metric = metrics['sharpe_ratio']
+                best_params = params
+                best_train_metrics = metrics
+
+        self.strategy.set_parameters(**best_params)
+        test_metrics = await self._simulate(
+            slice_until(historical_data, fold.test_end), fold.test_start, fold.test_end, include_end=False
+        )
 
         return {
-            'sharpe_ratio': sharpe_ratio,
-            'max_drawdown': max_drawdown,
-            'win_rate': win_rate,
-            'profit_factor': profit_factor,
-            'total_return': total_return,
-            'sortino_ratio': sortino_ratio,
-            'num_trades': len(trades_df),
-            'avg_trade': trades_df['profit'].mean() if 'profit' in trades_df.columns else 0
+            'fold': fold,
+            'params': best_params,
+            'train_metrics': best_train_metrics,
+            'test_metrics': test_metrics,
+            'equity_curve': self._tracker.equity_curve(),
         }
 
-    async def _execute_signal(
+    def _run_sweep(
             self,
-            signal: Dict,
-            portfolio: Portfolio,
-            current_price: float
-    ) -> Optional[Dict]:
+            historical_data: Dict[str, pd.DataFrame],
+            start_date: datetime,
+            end_date: datetime,
+    ) -> Dict:
         """
-        Симуляция исполнения сигнала.
+        Векторный перебор сетки параметров.
+
+        Лучшим считается набор с максимальным Sharpe Ratio, при равенстве —
+        более ранняя точка сетки.
 
         Args:
-            signal: Торговый сигнал
-            portfolio: Портфель
-            current_price: Текущая цена
+            historical_data: Свечи по инструментам
+            start_date: Начальная дата
+            end_date: Конечная дата
 
         Returns:
-            Информация о сделке
+            Лучшие параметры
         """
-        if not signal or not portfolio:
-            return None
+        table = self._sweep_grid(historical_data, start_date, end_date)
+        scores = np.nan_to_num(table['sharpe_ratio'].to_numpy(dtype=float), nan=-np.inf)
+        best = int(np.argmax(scores))
+        return {name: table[name].iloc[best] for name in self.strategy.get_parameter_grid()}
+
+    def _sweep_grid(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            start_date: datetime,
+            end_date: datetime,
+    ) -> pd.DataFrame:
+        """
+        Оценка всей сетки параметров одной векторной симуляцией.
+
+        Сигналы считаются пакетно: сразу для всей сетки, если стратегия
+        умеет это делать (`generate_signals_grid`, индикаторы считаются один
+        раз на окно), иначе по точкам (`generate_signals_batch`). Затем
+        торговля симулируется сразу для всех точек с той же моделью учета и
+        исполнения, что и в `run_backtest` с настройками по умолчанию.
+
+        Args:
+            historical_data: Свечи по инструментам
+            start_date: Начальная дата
+            end_date: Конечная дата
+
+        Returns:
+            Таблица: параметры и метрики для каждой точки сетки
+        """
+        grid = list(ParameterGrid(self.strategy.get_parameter_grid()))
+        historical_data = slice_until(historical_data, end_date)
+
+        replay = ReplayEngine(historical_data)
+        signals = self._grid_signals(replay, grid)
+        if signals is None:
+            raise ValueError("Sweep optimization requires a strategy with generate_signals_batch")
+
+        clock = replay.clock(
+            start_date, end_date,
+            DEFAULT_SIMULATION_OPTIONS['decision_interval'],
+            DEFAULT_SIMULATION_OPTIONS['skip_closed'],
+        )
+        equity, num_trades, trade_pnl = simulate_grid(
+            replay,
+            signals,
+            clock.events,
+            self.execution,
+            self.config.risk_per_trade,
+            DEFAULT_SIMULATION_OPTIONS['initial_balance'],
+        )
+        return grid_table(grid, grid_metrics(equity, num_trades, trade_pnl, clock.periods_per_year()))
+
+    def _grid_signals(self, replay: ReplayEngine, grid: List[Dict]) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Матрицы сигналов всех точек сетки.
+
+        Args:
+            replay: Движок воспроизведения с курсорами инструментов
+            grid: Точки сетки параметров
+
+        Returns:
+            Словарь FIGI -> матрица размеров сделок (точка × бар) или None,
+            если стратегия не поддерживает пакетный режим
+        """
+        generate_grid = getattr(self.strategy, 'generate_signals_grid', None)
+        if generate_grid is not None:
+            signals = {}
+            for figi, cursor in replay.cursors.items():
+                values = generate_grid(figi, cursor.columns(), grid)
+                if values is None:
+                    break
+                signals[figi] = np.nan_to_num(np.asarray(values, dtype=float))
+            else:
+                return signals
+
+        rows: Dict[str, List[np.ndarray]] = {}
+        for params in grid:
+            self.strategy.set_parameters(**params)
+            batch_signals = self._batch_signals(replay)
+            if batch_signals is None:
+                return None
+            for figi, values in batch_signals.items():
+                rows.setdefault(figi, []).append(values)
+        return {figi: np.vstack(values) for figi, values in rows.items()}
+
+    def _worker_pool(self, n_jobs: int, candles: SharedCandles) -> ProcessPoolExecutor:
+        """
+        Пул процессов-исполнителей для оптимизации.
+
+        Args:
+            n_jobs: Количество процессов
+            candles: Опубликованные свечи
+
+        Returns:
+            Пул процессов
+        """
+        return ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_worker,
+            initargs=(self._portable_strategy(), self.config, candles, self.execution),
+        )
 
-        figi = signal['figi']
-        direction = signal['direction']
-        size = signal['size']
+    def _portable_strategy(self) -> 'BaseStrategy':
+        """
+        Копия настроенной стратегии для передачи в процессы-исполнители.
+
+        Сохраняются все атрибуты экземпляра, а не только параметры сетки,
+        поэтому исполнители считают то же, что и последовательный прогон.
+        Ссылки на менеджер данных обнуляются: в бэктесте свечи передаются
+        стратегии напрямую.
 
+        Returns:
+            Поверхностная копия стратегии
+        """
+        strategy = copy.copy(self.strategy)
+        if self.data_manager is not None:
+            for name, value in vars(strategy).items():
+                if value is self.data_manager:
+                    setattr(strategy, name, None)
+        return strategy
+
+    def _execute_signals(
+            self,
+            current_time: int,
+            orders: List[Tuple[str, float, float, BarCursor]],
+            portfolio: SimulatedAccount,
+            tracker: OnlineMetrics,
+    ) -> int:
+        """
+        Симуляция исполнения всех сигналов бара.
+
+        Ограничение риска считается от баланса на начало бара, цены и
+        комиссии — моделью исполнения. Ордеров на баре единицы, поэтому
+        они исполняются по одному через `ExecutionModel.fill_one`, без
+        накладных расходов на создание массивов. Сделки пишутся в журнал со
+        временем симуляции, а в метрики — с прибылью, если сделка сократила
+        позицию (за вычетом комиссии закрытой части).
+
+        Args:
+            current_time: Время шага в наносекундах
+            orders: Ордера (FIGI, направление 1/-1, запрошенный объем, курсор)
+            portfolio: Счет симуляции
+            tracker: Накопитель метрик
+
+        Returns:
+            Количество исполненных сделок
+        """
         # Проверяем риск
         risk_amount = portfolio.get_balance('USD') * self.config.risk_per_trade
-        position_size = min(size, risk_amount / current_price)
+        fill = self.execution.fill_one
+        positions = portfolio.positions
+        cash = 0.0
+        executed = 0
 
-        if position_size < 1:
-            return None
+        for figi, side, size, cursor in orders:
+            bar = cursor.position - 1
+            close = cursor.close.item(bar)
+            limit = risk_amount / close
+            if size > limit:
+                size = limit
+            if size < 1:
+                continue
 
-        # Исполняем сделку
-        trade = {
-            'figi': figi,
-            'direction': direction,
-            'entry_price': current_price,
-            'size': position_size,
-            'timestamp': datetime.utcnow(),
-            'commission': current_price * position_size * 0.0005  # 0.05% комиссия
-        }
+            size, price, commission = fill(
+                side, size, close, cursor.high.item(bar), cursor.low.item(bar), cursor.volume.item(bar)
+            )
+            if size <= 0:
+                continue
+            self.ledger.append(current_time, figi, side, size, price, commission)
 
-        # Обновляем портфель
-        if direction == 'buy':
-            portfolio.update_position(figi, position_size, current_price)
-            portfolio.update_balance('USD', -current_price * position_size)
-        else:
-            portfolio.update_position(figi, -position_size, current_price)
-            portfolio.update_balance('USD', current_price * position_size)
+            # Обновляем позицию и учитываем зафиксированную прибыль
+            position = positions.get(figi)
+            held = position['quantity'] if position else 0
+            realized = portfolio.update_position(figi, side * size, price)
+            if held * side < 0:
+                closed = size if size < abs(held) else abs(held)
+                tracker.record_trade({'figi': figi, 'profit': realized - commission * closed / size})
+            else:
+                tracker.record_trade({'figi': figi})
+            cash -= side * size * price + commission
+            executed += 1
+
+        if executed:
+            portfolio.update_balance('USD', cash)
+        return executed
+
+    def _charge_swap(self, portfolio: SimulatedAccount, replay: ReplayEngine, previous_time: int, current_time: int):
+        """
+        Списание свопа за позиции, перенесенные через 22:00 UTC.
 
-        return trade
+        Args:
+            portfolio: Портфель
+            replay: Движок воспроизведения с курсорами инструментов
+            previous_time: Время предыдущего шага в наносекундах
+            current_time: Время текущего шага в наносекундах
+        """
+        days = rollover_days(previous_time, current_time)
+        if not days:
+            return
+
+        figis = [figi for figi in portfolio.positions if figi in replay.cursors]
+        quantities = np.array([portfolio.positions[figi]['quantity'] for figi in figis], dtype=float)
+        prices = np.array([replay.cursors[figi].last_close for figi in figis])
+        swap = self.execution.swap(quantities, prices, days)
+        if swap.any():
+            portfolio.update_balance('USD', -float(swap.sum()))
 
     def _objective(
             self,
             trial: optuna.Trial,
+            historical_data: Dict[str, pd.DataFrame],
             start_date: datetime,
             end_date: datetime
     ) -> float:
         """
         Целевая функция для оптимизации Optuna.
 
+        Вызывается вне цикла событий (в отдельном потоке или процессе),
+        поэтому бэктест запускается в собственном цикле через asyncio.run.
+        В контрольных точках промежуточный Sharpe передается прунеру Optuna.
+
         Args:
             trial: Объект испытания Optuna
+            historical_data: Свечи по инструментам
             start_date: Начальная дата
             end_date: Конечная дата
 
@@ -311,19 +1277,48 @@ class Backtester:
         params = self.strategy.suggest_parameters(trial)
         self.strategy.set_parameters(**params)
 
+        def report(checkpoint: int, intermediate: Dict[str, float]):
+            # Промежуточный Sharpe для прунера; испытание прерывается исключением
+            value = intermediate['sharpe_ratio']
+            if np.isfinite(value):
+                trial.report(float(value), checkpoint)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
         # Запускаем бэктест
-        loop = asyncio.get_event_loop()
-        metrics = loop.run_until_complete(
-            self.run_backtest(start_date, end_date)
+        metrics = asyncio.run(
+            self._simulate(historical_data, start_date, end_date, checkpoint=report)
         )
 
         return metrics['sharpe_ratio']
 
     def save_results(self, filepath: str):
-        """Сохранение результатов в файл."""
-        if not self.results.empty:
+        """
+        Сохранение результатов последнего бэктеста.
+
+        Для пути '*.csv' сохраняется только кривая баланса. Иначе журнал
+        сделок и кривая баланса пишутся в колоночном виде (см. `save_ledger`):
+        '*.npz', '*.parquet' или каталог файлов .npy.
+
+        Args:
+            filepath: Путь к файлу или каталогу
+        """
+        if self.results.empty:
+            logger.warning("No backtest results to save")
+            return
+
+        if filepath.endswith('.csv'):
             self.results.to_csv(filepath, index=False)
-            logger.info(f"Results saved to {filepath}")
+        else:
+            ledger = self.ledger or TradeLedger()
+            save_ledger(
+                filepath,
+                ledger.trades,
+                equity_records(self.results),
+                ledger.instruments,
+                metadata={'strategy': _strategy_name(self.strategy), 'params': _strategy_params(self.strategy)},
+            )
+        logger.info(f"Results saved to {filepath}")
 
     def plot_equity_curve(self):
         """Визуализация кривой баланса."""
@@ -339,4 +1334,244 @@ class Backtester:
                 plt.grid(True)
                 plt.show()
         except ImportError:
-            logger.warning("Matplotlib not installed. Skipping plot.")
\ No newline at end of file
+            logger.warning("Matplotlib not installed. Skipping plot.")
+
+
+def data_fingerprint(historical_data: Dict[str, pd.DataFrame]) -> str:
+    """
+    Отпечаток свечей для ключа кэша.
+
+    Args:
+        historical_data: Свечи по инструментам
+
+    Returns:
+        Хэш времени и числовых колонок всех инструментов
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for figi in sorted(historical_data):
+        data = historical_data[figi]
+        digest.update(figi.encode())
+        digest.update(np.ascontiguousarray(time_index_ns(data['time'])).tobytes())
+        for column in sorted(c for c in data.columns if c != 'time' and data[c].dtype.kind in 'biuf'):
+            digest.update(column.encode())
+            digest.update(np.ascontiguousarray(data[column].to_numpy()).tobytes())
+    return digest.hexdigest()
+
+
+def strategy_version(strategy: 'BaseStrategy') -> str:
+    """
+    Версия кода стратегии.
+
+    Берется атрибут `version`, если он задан, иначе хэш исходного кода
+    класса стратегии и его базовых классов.
+
+    Args:
+        strategy: Стратегия
+
+    Returns:
+        Строка версии
+    """
+    version = getattr(strategy, 'version', None)
+    if version is not None:
+        return str(version)
+
+    digest = hashlib.sha256()
+    for cls in type(strategy).__mro__:
+        if cls is object:
+            continue
+        try:
+            digest.update(inspect.getsource(cls).encode())
+        except (OSError, TypeError):
+            digest.update(cls.__qualname__.encode())
+    return digest.hexdigest()[:16]
+
+
+def _strategy_name(strategy: 'BaseStrategy') -> str:
+    """Полное имя класса стратегии."""
+    cls = type(strategy)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _strategy_params(strategy: 'BaseStrategy') -> Dict:
+    """Текущие значения оптимизируемых (или всех простых публичных) параметров стратегии."""
+    get_grid = getattr(strategy, 'get_parameter_grid', None)
+    if get_grid:
+        return {name: getattr(strategy, name, None) for name in get_grid()}
+    return {
+        name: value
+        for name, value in vars(strategy).items()
+        if not name.startswith('_') and isinstance(value, (int, float, str, bool, type(None)))
+    }
+
+
+def _execution_key(execution: ExecutionModel) -> Dict:
+    """Описание модели исполнения для ключа кэша."""
+    return {'model': type(execution).__qualname__, **vars(execution)}
+
+
+def _cache_options(options: Dict, execution: ExecutionModel, config: 'Config') -> Dict:
+    """
+    Настройки симуляции для ключа кэша.
+
+    Кроме аргументов прогона включаются модель исполнения и все поля
+    конфигурации, которые читает симуляция.
+
+    Args:
+        options: Аргументы симуляции
+        execution: Модель исполнения
+        config: Конфигурация
+
+    Returns:
+        Словарь настроек
+    """
+    return {
+        **options,
+        'execution': _execution_key(execution),
+        'risk_per_trade': config.risk_per_trade,
+    }
+
+
+# Состояние процесса-исполнителя для параллельной оптимизации
+_worker_state: Dict = {}
+
+
+def _resolve_n_jobs(n_jobs: int) -> int:
+    """Количество процессов с учетом значения -1 (все ядра)."""
+    if n_jobs is None or n_jobs < 0:
+        return os.cpu_count() or 1
+    return max(1, n_jobs)
+
+
+def _make_pruner(pruner: Optional[str]) -> optuna.pruners.BasePruner:
+    """Прунер Optuna по имени (median/hyperband); без имени испытания не прерываются."""
+    if pruner is None:
+        return optuna.pruners.NopPruner()
+    if pruner == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=DEFAULT_CHECKPOINTS // 4)
+    if pruner == 'hyperband':
+        return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=DEFAULT_CHECKPOINTS)
+    raise ValueError(f"Unknown pruner: {pruner}")
+
+
+def _make_storage(storage: Optional[str]):
+    """Хранилище Optuna; для SQLite увеличено ожидание блокировки."""
+    if storage and storage.startswith('sqlite'):
+        return optuna.storages.RDBStorage(
+            storage,
+            engine_kwargs={'connect_args': {'timeout': 60}}
+        )
+    return storage
+
+
+def _init_worker(
+        strategy: 'BaseStrategy',
+        config: 'Config',
+        candles: SharedCandles,
+        execution: Optional[ExecutionModel] = None,
+):
+    """
+    Инициализация процесса-исполнителя.
+
+    Стратегия приходит копией настроенного экземпляра (см.
+    `Backtester._portable_strategy`), поэтому ее состояние совпадает
+    с состоянием в основном процессе.
+
+    Args:
+        strategy: Стратегия
+        config: Конфигурация
+        candles: Опубликованные свечи (только для чтения)
+        execution: Модель исполнения
+    """
+    _worker_state['backtester'] = Backtester(strategy, None, config, execution=execution)
+    _worker_state['historical_data'] = candles.load()
+
+
+def _run_grid_point(
+        index: int,
+        params: Dict,
+        start_date: datetime,
+        end_date: datetime,
+) -> Tuple[int, Dict, Dict[str, float], pd.DataFrame, TradeLedger]:
+    """
+    Бэктест одной точки сетки в процессе-исполнителе.
+
+    Args:
+        index: Номер точки сетки
+        params: Параметры стратегии
+        start_date: Начальная дата
+        end_date: Конечная дата
+
+    Returns:
+        Кортеж (номер точки, параметры, метрики, кривая баланса, журнал сделок)
+    """
+    backtester = _worker_state['backtester']
+    backtester.strategy.set_parameters(**params)
+    metrics = asyncio.run(
+        backtester._simulate(_worker_state['historical_data'], start_date, end_date)
+    )
+    return index, params, metrics, backtester._tracker.equity_curve(), backtester.ledger
+
+
+def _run_optuna_trials(
+        study_name: str,
+        storage: str,
+        n_trials: int,
+        start_date: datetime,
+        end_date: datetime,
+        pruner: Optional[str] = None,
+):
+    """
+    Выполнение части испытаний общего исследования Optuna.
+
+    Args:
+        study_name: Имя исследования
+        storage: URL общего хранилища
+        n_trials: Количество испытаний для этого процесса
+        start_date: Начальная дата
+        end_date: Конечная дата
+        pruner: Досрочная остановка испытаний (median/hyperband)
+    """
+    backtester = _worker_state['backtester']
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=_make_storage(storage),
+        sampler=TPESampler(),
+        pruner=_make_pruner(pruner)
+    )
+    study.optimize(
+        lambda trial: backtester._objective(
+            trial, _worker_state['historical_data'], start_date, end_date
+        ),
+        n_trials=n_trials
+    )
+
+
+def _run_batch_job(job: BacktestJob) -> Tuple[List[str], Dict[str, float]]:
+    """
+    Обработка одного задания пакетного бэктеста в процессе-исполнителе.
+
+    Args:
+        job: Задание
+
+    Returns:
+        Кортеж (использованные инструменты, метрики)
+    """
+    backtester = _worker_state['backtester']
+    return asyncio.run(backtester._run_job(_worker_state['historical_data'], job))
+
+
+def _run_walk_forward_fold(fold: Fold, grid: List[Dict]) -> Dict:
+    """
+    Обработка одного фолда walk-forward в процессе-исполнителе.
+
+    Args:
+        fold: Границы фолда
+        grid: Точки сетки параметров
+
+    Returns:
+        Результат фолда (см. `Backtester._evaluate_fold`)
+    """
+    backtester = _worker_state['backtester']
+    return asyncio.run(
+        backtester._evaluate_fold(_worker_state['historical_data'], fold, grid)
+    )
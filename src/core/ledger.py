@@ -0,0 +1,288 @@
+"""
+Колоночный журнал сделок и кривой баланса бэктеста.
+
+Сделки пишутся в заранее выделенный структурированный массив NumPy со
+временем симуляции (по одной сделке — сначала в список, который
+переносится в массив при чтении журнала). Журнал сохраняется в каталог файлов .npy (загрузка
+через memory map), в один файл .npz или в Parquet.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.account import SimulatedAccount
+from src.core.replay import time_index_ns
+
+TRADE_DTYPE = np.dtype([
+    ('time', 'i8'),  # время симуляции в наносекундах
+    ('instrument', 'i4'),  # номер инструмента в TradeLedger.instruments
+    ('side', 'i1'),  # 1 — покупка, -1 — продажа
+    ('size', 'f8'),
+    ('price', 'f8'),
+    ('commission', 'f8'),
+])
+
+EQUITY_DTYPE = np.dtype([
+    ('time', 'i8'),
+    ('balance', 'f8'),
+    ('equity', 'f8'),
+    ('drawdown', 'f8'),
+])
+
+
+class TradeLedger:
+    """
+    Журнал сделок бэктеста.
+
+    Attributes:
+        instruments (List[str]): FIGI инструментов (по номерам в записях)
+    """
+
+    def __init__(self, instruments: Optional[List[str]] = None, capacity: int = 1024):
+        self.instruments = list(instruments or [])
+        self._stored = 0
+        self._records = np.empty(max(1, capacity), dtype=TRADE_DTYPE)
+        self._index = {figi: number for number, figi in enumerate(self.instruments)}
+        self._pending: List[tuple] = []
+
+    @property
+    def size(self) -> int:
+        """Количество записанных сделок."""
+        return self._stored + len(self._pending)
+
+    def instrument_numbers(self, figis: List[str]) -> np.ndarray:
+        """
+        Номера инструментов (новые FIGI добавляются в справочник).
+
+        Args:
+            figis: Список FIGI
+
+        Returns:
+            Массив номеров
+        """
+        for figi in figis:
+            if figi not in self._index:
+                self._index[figi] = len(self.instruments)
+                self.instruments.append(figi)
+        return np.array([self._index[figi] for figi in figis], dtype=np.int32)
+
+    def record(
+            self,
+            time: int,
+            figis: List[str],
+            sides: np.ndarray,
+            sizes: np.ndarray,
+            prices: np.ndarray,
+            commissions: np.ndarray,
+    ):
+        """
+        Запись сделок одного шага симуляции.
+
+        Args:
+            time: Время симуляции в наносекундах
+            figis: Инструменты сделок
+            sides: Направления (1 — покупка, -1 — продажа)
+            sizes: Объемы
+            prices: Цены исполнения
+            commissions: Комиссии
+        """
+        self._flush()
+        self._write(time, figis, sides, sizes, prices, commissions)
+
+    def append(self, time: int, figi: str, side: float, size: float, price: float, commission: float):
+        """
+        Запись одной сделки за O(1) без операций над массивом.
+
+        Args:
+            time: Время симуляции в наносекундах
+            figi: Инструмент
+            side: Направление (1 — покупка, -1 — продажа)
+            size: Объем
+            price: Цена исполнения
+            commission: Комиссия
+        """
+        self._pending.append((time, figi, side, size, price, commission))
+
+    @property
+    def trades(self) -> np.ndarray:
+        """Записанные сделки (срез без копирования)."""
+        self._flush()
+        return self._records[:self._stored]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Сделки в виде DataFrame.
+
+        Returns:
+            DataFrame с колонками time, figi, direction, size, price, commission
+        """
+        return trades_frame(self.trades, self.instruments)
+
+    def _flush(self):
+        """Перенос сделок, записанных по одной, в массив."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        times, figis, sides, sizes, prices, commissions = zip(*pending)
+        self._write(np.array(times), list(figis), sides, sizes, prices, commissions)
+
+    def _write(self, time, figis: List[str], sides, sizes, prices, commissions):
+        """Запись блока сделок в конец массива."""
+        count = len(figis)
+        while self._stored + count > len(self._records):
+            self._grow()
+
+        block = self._records[self._stored:self._stored + count]
+        block['time'] = time
+        block['instrument'] = self.instrument_numbers(figis)
+        block['side'] = sides
+        block['size'] = sizes
+        block['price'] = prices
+        block['commission'] = commissions
+        self._stored += count
+
+    def _grow(self):
+        """Увеличение емкости массива вдвое."""
+        grown = np.empty(2 * len(self._records), dtype=TRADE_DTYPE)
+        grown[:self._stored] = self._records[:self._stored]
+        self._records = grown
+
+
+def equity_records(equity_curve: pd.DataFrame) -> np.ndarray:
+    """
+    Кривая баланса в виде структурированного массива.
+
+    Args:
+        equity_curve: Кривая баланса (колонки date, balance, equity, drawdown)
+
+    Returns:
+        Массив с типом EQUITY_DTYPE
+    """
+    records = np.empty(len(equity_curve), dtype=EQUITY_DTYPE)
+    records['time'] = time_index_ns(equity_curve['date'])
+    for name in ('balance', 'equity', 'drawdown'):
+        records[name] = equity_curve[name].to_numpy(dtype=float) if name in equity_curve else np.nan
+    return records
+
+
+def closed_trade_profits(trades: np.ndarray) -> np.ndarray:
+    """
+    Прибыль закрытых сделок журнала.
+
+    Сделки проводятся через счет симуляции в порядке записи, поэтому
+    прибыль совпадает с учтенной в метриках бэктеста: от средней цены
+    входа за вычетом комиссии закрытой части.
+
+    Args:
+        trades: Сделки с типом TRADE_DTYPE
+
+    Returns:
+        Прибыль сделок, сокративших позицию, в порядке закрытия
+    """
+    account = SimulatedAccount()
+    profits = []
+    for instrument, side, size, price, commission in zip(
+            trades['instrument'].tolist(), trades['side'].tolist(), trades['size'].tolist(),
+            trades['price'].tolist(), trades['commission'].tolist(),
+    ):
+        position = account.positions.get(instrument)
+        held = position['quantity'] if position else 0
+        realized = account.update_position(instrument, side * size, price)
+        if held * side < 0:
+            closed = size if size < abs(held) else abs(held)
+            profits.append(realized - commission * closed / size)
+    return np.array(profits, dtype=float)
+
+
+def trades_frame(trades: np.ndarray, instruments: List[str]) -> pd.DataFrame:
+    """
+    Преобразование структурированного массива сделок в DataFrame.
+
+    Args:
+        trades: Сделки с типом TRADE_DTYPE
+        instruments: Справочник FIGI
+
+    Returns:
+        DataFrame сделок
+    """
+    return pd.DataFrame({
+        'time': pd.to_datetime(trades['time']),
+        'figi': np.asarray(instruments, dtype=object)[trades['instrument']] if len(trades) else [],
+        'direction': np.where(trades['side'] > 0, 'buy', 'sell'),
+        'size': trades['size'],
+        'price': trades['price'],
+        'commission': trades['commission'],
+    })
+
+
+def save_ledger(
+        path: str,
+        trades: np.ndarray,
+        equity: np.ndarray,
+        instruments: List[str],
+        metadata: Optional[Dict] = None,
+):
+    """
+    Сохранение журнала.
+
+    Формат определяется по пути: '*.npz' — один файл, '*.parquet' —
+    два файла Parquet рядом (сделки и кривая баланса), иначе — каталог
+    файлов .npy для загрузки через memory map.
+
+    Args:
+        path: Путь к файлу или каталогу
+        trades: Сделки с типом TRADE_DTYPE
+        equity: Кривая баланса с типом EQUITY_DTYPE
+        instruments: Справочник FIGI
+        metadata: Дополнительные сведения о прогоне (параметры, метрики)
+    """
+    path = Path(path)
+    info = json.dumps({'instruments': instruments, 'metadata': metadata or {}}, default=str)
+
+    if path.suffix == '.npz':
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, trades=trades, equity=equity, info=np.array(info))
+    elif path.suffix == '.parquet':
+        path.parent.mkdir(parents=True, exist_ok=True)
+        trades_frame(trades, instruments).to_parquet(path.with_suffix('.trades.parquet'), index=False)
+        pd.DataFrame(equity).to_parquet(path.with_suffix('.equity.parquet'), index=False)
+        path.with_suffix('.json').write_text(info)
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / 'trades.npy', trades)
+        np.save(path / 'equity.npy', equity)
+        (path / 'info.json').write_text(info)
+
+
+def load_ledger(path: str) -> Dict:
+    """
+    Загрузка журнала, сохраненного `save_ledger` в формате .npy или .npz.
+
+    Из каталога массивы открываются через memory map без чтения в память.
+
+    Args:
+        path: Путь к файлу .npz или каталогу
+
+    Returns:
+        Словарь с ключами trades, equity, instruments, metadata
+    """
+    path = Path(path)
+    if path.suffix == '.npz':
+        with np.load(path) as archive:
+            trades, equity, info = archive['trades'], archive['equity'], str(archive['info'])
+    else:
+        trades = np.load(path / 'trades.npy', mmap_mode='r')
+        equity = np.load(path / 'equity.npy', mmap_mode='r')
+        info = (path / 'info.json').read_text()
+
+    info = json.loads(info)
+    return {
+        'trades': trades,
+        'equity': equity,
+        'instruments': info['instruments'],
+        'metadata': info['metadata'],
+    }
@@ -0,0 +1,255 @@
+"""
+Метрики производительности для бэктестинга.
+
+Включает:
+- Потоковый расчет метрик по ходу бэктеста
+- Векторный расчет метрик сразу для многих рядов доходностей
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+EMPTY_METRICS = {
+    'sharpe_ratio': 0,
+    'max_drawdown': 0,
+    'win_rate': 0,
+    'profit_factor': 0,
+    'total_return': 0,
+    'sortino_ratio': 0
+}
+
+
+class OnlineMetrics:
+    """
+    Потоковый накопитель метрик бэктеста.
+
+    Баланс и капитал пишутся в заранее выделенные массивы, а среднее и
+    дисперсия доходностей (в том числе отрицательных) обновляются по
+    Уэлфорду на каждом шаге. Метрики доступны в любой момент без сборки
+    DataFrame, память не растет с количеством сделок.
+
+    Формулы совпадают с прежним расчетом по DataFrame: доходности —
+    `pct_change` капитала, отклонения несмещенные, просадка считается
+    от максимума начиная со второго шага.
+
+    Attributes:
+        times (np.ndarray): Время шагов в наносекундах
+        balance (np.ndarray): Баланс по шагам
+        equity (np.ndarray): Капитал по шагам
+        drawdown (np.ndarray): Просадка по шагам
+        size (int): Количество записанных шагов
+        periods_per_year (float): Число шагов в году
+        num_trades (int): Количество сделок
+    """
+
+    def __init__(self, capacity: int = 1024, periods_per_year: float = 252):
+        capacity = max(1, capacity)
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.balance = np.empty(capacity)
+        self.equity = np.empty(capacity)
+        self.drawdown = np.empty(capacity)
+        self.size = 0
+        self.periods_per_year = periods_per_year
+
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._down_count = 0
+        self._down_mean = 0.0
+        self._down_m2 = 0.0
+        self._peak = np.nan
+        self._max_drawdown = np.nan
+
+        self.num_trades = 0
+        self._closed_trades = 0
+        self._wins = 0
+        self._profit_sum = 0.0
+        self._gross_profit = 0.0
+        self._gross_loss = 0.0
+
+    def update(self, time: int, balance: float, equity: float):
+        """
+        Запись состояния портфеля на очередном шаге.
+
+        Args:
+            time: Время шага в наносекундах
+            balance: Баланс
+            equity: Капитал
+        """
+        if self.size == len(self.equity):
+            self._grow()
+
+        index = self.size
+        self.times[index] = time
+        self.balance[index] = balance
+        self.equity[index] = equity
+        self.drawdown[index] = np.nan
+        self.size += 1
+
+        if index == 0:
+            return
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.float64(equity) / self.equity[index - 1] - 1
+
+        self._count += 1
+        delta = value - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (value - self._mean)
+
+        if value < 0:
+            self._down_count += 1
+            delta = value - self._down_mean
+            self._down_mean += delta / self._down_count
+            self._down_m2 += delta * (value - self._down_mean)
+
+        if index == 1 or equity > self._peak:
+            self._peak = equity
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.float64(equity) / self._peak - 1
+        self.drawdown[index] = drawdown
+        if index == 1 or drawdown < self._max_drawdown:
+            self._max_drawdown = drawdown
+
+    def record_trade(self, trade: Dict):
+        """
+        Учет сделки.
+
+        Args:
+            trade: Сделка; прибыль учитывается, если есть ключ 'profit'
+        """
+        self.num_trades += 1
+        profit = trade.get('profit')
+        if profit is None:
+            return
+
+        self._closed_trades += 1
+        self._profit_sum += profit
+        if profit > 0:
+            self._wins += 1
+            self._gross_profit += profit
+        elif profit < 0:
+            self._gross_loss -= profit
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Текущие метрики производительности.
+
+        Returns:
+            Словарь с метриками
+        """
+        if not self.num_trades or not self.size:
+            return dict(EMPTY_METRICS)
+
+        annual = np.sqrt(self.periods_per_year)
+        mean = np.float64(self._mean) if self._count else np.float64(np.nan)
+        std = np.sqrt(self._m2 / (self._count - 1)) if self._count > 1 else np.nan
+        down_std = np.sqrt(self._down_m2 / (self._down_count - 1)) if self._down_count > 1 else np.nan
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe_ratio = annual * mean / std
+            sortino_ratio = annual * mean / down_std
+            total_return = (self.equity[self.size - 1] - self.equity[0]) / self.equity[0]
+
+        if self._closed_trades:
+            # Доля выигрышей среди закрытых сделок: открытия позиций не учитываются
+            win_rate = self._wins / self._closed_trades
+            avg_trade = self._profit_sum / self._closed_trades
+            profit_factor = self._gross_profit / self._gross_loss if self._gross_loss > 0 else np.inf
+        else:
+            win_rate = avg_trade = profit_factor = 0
+
+        return {
+            'sharpe_ratio': sharpe_ratio,
+            'max_drawdown': self._max_drawdown,
+            'win_rate': win_rate,
+            'profit_factor': profit_factor,
+            'total_return': total_return,
+            'sortino_ratio': sortino_ratio,
+            'num_trades': self.num_trades,
+            'avg_trade': avg_trade
+        }
+
+    def equity_curve(self) -> pd.DataFrame:
+        """
+        Кривая баланса в виде DataFrame (создается только по запросу).
+
+        Returns:
+            DataFrame с колонками date, balance, equity, drawdown
+        """
+        return pd.DataFrame({
+            'date': pd.to_datetime(self.times[:self.size]),
+            'balance': self.balance[:self.size],
+            'equity': self.equity[:self.size],
+            'drawdown': self.drawdown[:self.size],
+        })
+
+    def _grow(self):
+        """Увеличение емкости массивов вдвое."""
+        capacity = 2 * len(self.equity)
+        for name in ('times', 'balance', 'equity', 'drawdown'):
+            current = getattr(self, name)
+            grown = np.empty(capacity, dtype=current.dtype)
+            grown[:self.size] = current[:self.size]
+            setattr(self, name, grown)
+
+
+def vectorized_metrics(
+        returns: np.ndarray,
+        periods_per_year: float = 252,
+        active: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Расчет метрик для матрицы доходностей (набор параметров × время).
+
+    Формулы совпадают с `OnlineMetrics`: стандартные
+    отклонения несмещенные (ddof=1), просадка считается по накопленной
+    доходности. Profit factor и доля прибыльных считаются по барам,
+    на которых была открыта позиция.
+
+    Args:
+        returns: Доходности формы (P, T) или (T,)
+        periods_per_year: Число шагов в году для годовой нормировки
+        active: Маска баров с открытой позицией (по умолчанию returns != 0)
+
+    Returns:
+        Словарь метрика -> массив длины P
+    """
+    returns = np.atleast_2d(np.asarray(returns, dtype=float))
+    if active is None:
+        active = returns != 0
+    active = np.atleast_2d(active)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = returns.mean(axis=1)
+        std = returns.std(axis=1, ddof=1)
+        sharpe_ratio = np.sqrt(periods_per_year) * mean / std
+
+        downside = np.where(returns < 0, returns, np.nan)
+        downside_count = np.sum(returns < 0, axis=1)
+        downside_std = np.full(len(returns), np.nan)
+        enough = downside_count > 1
+        downside_std[enough] = np.nanstd(downside[enough], axis=1, ddof=1)
+        sortino_ratio = np.sqrt(periods_per_year) * mean / downside_std
+
+        cum_returns = np.cumprod(1 + returns, axis=1)
+        roll_max = np.maximum.accumulate(cum_returns, axis=1)
+        max_drawdown = (cum_returns / roll_max - 1).min(axis=1)
+
+        gross_profit = np.where(returns > 0, returns, 0).sum(axis=1)
+        gross_loss = -np.where(returns < 0, returns, 0).sum(axis=1)
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.inf)
+
+        wins = np.sum((returns > 0) & active, axis=1)
+        win_rate = np.where(active.any(axis=1), wins / active.sum(axis=1), 0)
+
+    return {
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'win_rate': win_rate,
+        'profit_factor': profit_factor,
+        'total_return': cum_returns[:, -1] - 1 if returns.shape[1] else np.zeros(len(returns)),
+        'sortino_ratio': sortino_ratio,
+    }
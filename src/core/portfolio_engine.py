@@ -0,0 +1,300 @@
+"""
+Портфельный бэктест нескольких инструментов на общей матрице цен.
+
+Включает:
+- Выравнивание инструментов на общую шкалу времени (матрица T×N)
+- Симуляцию портфеля с общим капиталом и маржой векторными операциями
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.execution import ExecutionModel, rollover_days
+from src.core.metrics import OnlineMetrics
+from src.core.replay import DEFAULT_MIN_BARS, time_index_ns
+
+
+class AlignedPrices(NamedTuple):
+    """Цены инструментов на общей шкале времени."""
+    times: np.ndarray  # (T,) наносекунды
+    figis: List[str]  # (N,)
+    close: np.ndarray  # (T, N) с протяжкой последней цены вперед
+    high: np.ndarray  # (T, N) с протяжкой вперед (close, если колонки нет)
+    low: np.ndarray  # (T, N) с протяжкой вперед (close, если колонки нет)
+    volume: np.ndarray  # (T, N), 0 там, где бара не было
+    observed: np.ndarray  # (T, N) True, если на шаге был бар инструмента
+    bar_count: np.ndarray  # (T, N) число баров инструмента к шагу включительно
+
+
+def forward_fill(values: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    Протяжка последнего наблюдения вперед по оси времени.
+
+    Args:
+        values: Матрица (T, N)
+        observed: Маска наблюдений (T, N)
+
+    Returns:
+        Матрица (T, N); до первого наблюдения — NaN
+    """
+    rows = np.arange(len(values))[:, None]
+    last = np.maximum.accumulate(np.where(observed, rows, -1), axis=0)
+    filled = np.take_along_axis(values, np.maximum(last, 0), axis=0)
+    return np.where(last >= 0, filled, np.nan)
+
+
+def align_instruments(historical_data: Dict[str, pd.DataFrame]) -> AlignedPrices:
+    """
+    Выравнивание свечей всех инструментов на объединенную шкалу времени.
+
+    Бары инструмента упорядочиваются по времени; из нескольких баров с
+    одной меткой в строку матрицы попадает последний (как и в курсоре
+    бэктестера), но в `bar_count` учитываются все.
+
+    Args:
+        historical_data: Свечи по инструментам
+
+    Returns:
+        Выровненные цены
+    """
+    figis = list(historical_data)
+    instrument_times = [time_index_ns(historical_data[figi]['time']) for figi in figis]
+    times = np.unique(np.concatenate(instrument_times)) if figis else np.empty(0, dtype=np.int64)
+
+    shape = (len(times), len(figis))
+    columns = {name: np.full(shape, np.nan) for name in ('close', 'high', 'low')}
+    volume = np.zeros(shape)
+    observed = np.zeros(shape, dtype=bool)
+    bar_number = np.full(shape, -1)
+
+    for column, (figi, figi_times) in enumerate(zip(figis, instrument_times)):
+        data = historical_data[figi]
+        order = np.argsort(figi_times, kind='stable')
+        sorted_times = figi_times[order]
+        last = np.append(sorted_times[1:] != sorted_times[:-1], True)
+        kept = order[last]
+        rows = np.searchsorted(times, sorted_times[last])
+
+        close = data['close'].to_numpy(dtype=float)[kept]
+        for name, values in columns.items():
+            values[rows, column] = data[name].to_numpy(dtype=float)[kept] if name in data.columns else close
+        if 'volume' in data.columns:
+            volume[rows, column] = data['volume'].to_numpy(dtype=float)[kept]
+        observed[rows, column] = True
+        bar_number[rows, column] = np.flatnonzero(last)
+
+    return AlignedPrices(
+        times=times,
+        figis=figis,
+        close=forward_fill(columns['close'], observed),
+        high=forward_fill(columns['high'], observed),
+        low=forward_fill(columns['low'], observed),
+        volume=volume,
+        observed=observed,
+        bar_count=np.maximum.accumulate(bar_number, axis=0) + 1,
+    )
+
+
+class PortfolioBacktest:
+    """
+    Симуляция портфеля по матрице цен.
+
+    На каждом шаге ордера всех инструментов обрабатываются одной векторной
+    операцией: ограничение риска на сделку, общий лимит маржи (валовая
+    экспозиция не больше `max_leverage` × капитал), исполнение моделью
+    исполнения бэктестера (цена, частичное исполнение, комиссия),
+    реализованная прибыль, своп и переоценка открытых позиций. Денежный
+    баланс и позиции хранятся в массивах длины N.
+
+    Attributes:
+        prices (AlignedPrices): Выровненные цены
+        risk_per_trade (float): Доля баланса, допустимая на одну сделку
+        execution (ExecutionModel): Модель исполнения ордеров
+        max_leverage (float): Максимальное плечо по портфелю
+        min_bars (int): Минимальное число баров для исполнения сигналов
+    """
+
+    def __init__(
+            self,
+            prices: AlignedPrices,
+            risk_per_trade: float,
+            execution: Optional[ExecutionModel] = None,
+            max_leverage: float = 10.0,
+            min_bars: int = DEFAULT_MIN_BARS,
+    ):
+        self.prices = prices
+        self.risk_per_trade = risk_per_trade
+        self.execution = execution or ExecutionModel()
+        self.max_leverage = max_leverage
+        self.min_bars = min_bars
+
+    def run(
+            self,
+            orders: np.ndarray,
+            rows: np.ndarray,
+            initial_balance: float = 10000,
+            periods_per_year: float = 252,
+    ) -> OnlineMetrics:
+        """
+        Прогон симуляции.
+
+        Args:
+            orders: Размеры ордеров (T, N): >0 — покупка, <0 — продажа
+            rows: Номера строк матрицы, на которых принимаются решения
+            initial_balance: Начальный баланс
+            periods_per_year: Число шагов в году
+
+        Returns:
+            Накопитель метрик с кривой баланса портфеля
+        """
+        prices = self.prices
+        n_instruments = len(prices.figis)
+        cash = float(initial_balance)
+        positions = np.zeros(n_instruments)
+        average_price = np.zeros(n_instruments)
+        tracker = OnlineMetrics(len(rows), periods_per_year)
+
+        previous_time = None
+        for row in rows:
+            marked = np.nan_to_num(prices.close[row])
+            ready = prices.observed[row] & (prices.bar_count[row] >= self.min_bars)
+            wanted = np.where(ready, orders[row], 0.0)
+
+            if wanted.any():
+                # Ограничение риска на сделку (как в Backtester._execute_signals)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    size = np.minimum(np.abs(wanted), cash * self.risk_per_trade / marked)
+                size = np.where(size >= 1, size, 0.0)
+                delta = np.sign(wanted) * size
+
+                # Общий лимит маржи: новые ордера урезаются пропорционально
+                equity = cash + positions @ marked
+                exposure = np.abs(positions) @ marked
+                new_exposure = np.abs(positions + delta) @ marked
+                limit = self.max_leverage * max(equity, 0.0)
+                if new_exposure > limit and new_exposure > exposure:
+                    delta *= max(0.0, (limit - exposure) / (new_exposure - exposure))
+                    delta = np.where(np.abs(delta) >= 1, delta, 0.0)
+
+                columns = np.flatnonzero(delta)
+                if len(columns):
+                    cash = self._fill(row, columns, delta[columns], cash, positions, average_price, tracker)
+
+            # Своп за перенос открытых позиций через 22:00 UTC
+            time = int(prices.times[row])
+            if previous_time is not None and positions.any():
+                days = rollover_days(previous_time, time)
+                if days:
+                    cash -= float(self.execution.swap(positions, marked, days).sum())
+            previous_time = time
+
+            tracker.update(time, cash, cash + positions @ marked)
+
+        return tracker
+
+    def _fill(
+            self,
+            row: int,
+            columns: np.ndarray,
+            delta: np.ndarray,
+            cash: float,
+            positions: np.ndarray,
+            average_price: np.ndarray,
+            tracker: OnlineMetrics,
+    ) -> float:
+        """
+        Исполнение ордеров шага моделью исполнения.
+
+        Позиции и средние цены обновляются на месте, сделки учитываются в
+        метриках с реализованной прибылью закрытой части (за вычетом ее
+        доли комиссии).
+
+        Args:
+            row: Строка матрицы цен
+            columns: Инструменты ордеров
+            delta: Объемы ордеров со знаком
+            cash: Денежный баланс
+            positions: Позиции по инструментам
+            average_price: Средние цены входа по инструментам
+            tracker: Накопитель метрик
+
+        Returns:
+            Денежный баланс после исполнения
+        """
+        prices = self.prices
+        sides = np.sign(delta)
+        fills = self.execution.fill(
+            sides,
+            np.abs(delta),
+            np.nan_to_num(prices.close[row, columns]),
+            prices.high[row, columns],
+            prices.low[row, columns],
+            prices.volume[row, columns],
+        )
+        filled = fills.size > 0
+        columns, sides = columns[filled], sides[filled]
+        size, price, fees = fills.size[filled], fills.price[filled], fills.commission[filled]
+
+        held = positions[columns]
+        average = average_price[columns]
+        quantity = sides * size
+        new_positions = held + quantity
+
+        reducing = (held != 0) & (sides != np.sign(held))
+        closed = np.where(reducing, np.minimum(size, np.abs(held)), 0.0)
+        realized = closed * (price - average) * np.sign(held)
+
+        flipped = reducing & (size > np.abs(held))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            blended = (average * np.abs(held) + price * size) / np.abs(new_positions)
+        average = np.where(reducing, average, blended)
+        average = np.where(flipped, price, average)
+        average_price[columns] = np.where(new_positions == 0, 0.0, average)
+        positions[columns] = new_positions
+
+        for column, traded, closed_size, profit, fill_size, fee in zip(
+                columns, quantity, closed, realized, size, fees
+        ):
+            trade = {'figi': prices.figis[column], 'size': traded}
+            if closed_size:
+                trade['profit'] = profit - fee * closed_size / fill_size
+            tracker.record_trade(trade)
+
+        return cash - float(quantity @ price + fees.sum())
+
+    @staticmethod
+    def orders_from_signals(prices: AlignedPrices, signals: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Перенос пакетных сигналов инструментов на общую шкалу времени.
+
+        Args:
+            prices: Выровненные цены
+            signals: FIGI -> размеры сделок по барам инструмента в порядке
+                времени (как у `BarCursor.columns`)
+
+        Returns:
+            Матрица ордеров (T, N); 0 там, где у инструмента не было бара.
+            Для нескольких баров с одной меткой берется сигнал последнего.
+        """
+        orders = np.zeros(prices.close.shape)
+        for column, figi in enumerate(prices.figis):
+            observed = prices.observed[:, column]
+            orders[observed, column] = np.asarray(signals[figi])[prices.bar_count[observed, column] - 1]
+        return orders
+
+
+def decision_rows(prices: AlignedPrices, events: np.ndarray) -> np.ndarray:
+    """
+    Номера строк матрицы, соответствующие шагам часов событий.
+
+    Args:
+        prices: Выровненные цены
+        events: Временные метки шагов в наносекундах
+
+    Returns:
+        Номера строк
+    """
+    return np.searchsorted(prices.times, events)
+
@@ -0,0 +1,280 @@
+"""
+Движок воспроизведения исторических баров для бэктестинга.
+
+Включает:
+- Курсор по отсортированным временным меткам инструмента
+- Окна данных для стратегий без копирования
+- Часы событий по объединению реальных временных меток свечей
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+Timestamp = Union[datetime, pd.Timestamp, np.datetime64]
+
+DEFAULT_WINDOW = 100
+DEFAULT_MIN_BARS = 20
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+NS_PER_YEAR = int(365.25 * NS_PER_DAY)
+
+# Рынок FX закрыт с 22:00 UTC пятницы до 22:00 UTC воскресенья
+FX_WEEK_CLOSE_HOUR = 22
+
+
+def to_ns(timestamp: Timestamp) -> int:
+    """
+    Перевод временной метки в наносекунды (UTC для меток с часовым поясом).
+
+    Args:
+        timestamp: Временная метка
+
+    Returns:
+        Количество наносекунд с начала эпохи
+    """
+    return pd.Timestamp(timestamp).value
+
+
+def fx_session_mask(times: np.ndarray) -> np.ndarray:
+    """
+    Маска временных меток, попадающих в торговую сессию FX.
+
+    Args:
+        times: Временные метки в наносекундах (UTC)
+
+    Returns:
+        Булев массив: True, если рынок открыт
+    """
+    days = times // NS_PER_DAY
+    weekday = (days + 3) % 7  # 1970-01-01 — четверг, понедельник = 0
+    hour = (times // NS_PER_HOUR) % 24
+    closed = (
+        (weekday == 5)
+        | ((weekday == 4) & (hour >= FX_WEEK_CLOSE_HOUR))
+        | ((weekday == 6) & (hour < FX_WEEK_CLOSE_HOUR))
+    )
+    return ~closed
+
+
+def time_index_ns(times: pd.Series) -> np.ndarray:
+    """
+    Перевод колонки времени в массив int64 наносекунд.
+
+    Args:
+        times: Колонка с временными метками
+
+    Returns:
+        Массив наносекунд
+    """
+    return pd.DatetimeIndex(times).as_unit('ns').asi8
+
+
+class BarCursor:
+    """
+    Курсор по барам одного инструмента.
+
+    Временные метки переводятся в массив наносекунд один раз, после чего
+    курсор двигается только вперед через `searchsorted`. Окно, которое
+    получает стратегия, — срез `iloc` исходного DataFrame, без копирования
+    данных и без булевой маски по всей истории.
+
+    Attributes:
+        data (pd.DataFrame): Свечи инструмента, отсортированные по времени
+        times (np.ndarray): Временные метки в наносекундах
+        close (np.ndarray): Цены закрытия
+        high (np.ndarray): Максимумы (цены закрытия, если колонки нет)
+        low (np.ndarray): Минимумы (цены закрытия, если колонки нет)
+        volume (np.ndarray): Объемы (NaN, если колонки нет)
+        window (int): Максимальная длина окна
+        position (int): Количество баров с временем не позже текущего
+    """
+
+    def __init__(self, data: pd.DataFrame, window: int = DEFAULT_WINDOW):
+        times = time_index_ns(data['time'])
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind='stable')
+            data = data.iloc[order]
+            times = times[order]
+
+        self.data = data
+        self.times = times
+        self.close = data['close'].to_numpy(dtype=float)
+        self.high = data['high'].to_numpy(dtype=float) if 'high' in data.columns else self.close
+        self.low = data['low'].to_numpy(dtype=float) if 'low' in data.columns else self.close
+        self.volume = (
+            data['volume'].to_numpy(dtype=float) if 'volume' in data.columns
+            else np.full(len(times), np.nan)
+        )
+        self.window = window
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def advance(self, timestamp: Timestamp) -> int:
+        """
+        Сдвиг курсора к последнему бару с временем не позже `timestamp`.
+
+        Args:
+            timestamp: Текущее время симуляции
+
+        Returns:
+            Новая позиция курсора
+        """
+        key = timestamp if isinstance(timestamp, (int, np.integer)) else to_ns(timestamp)
+        if self.position < len(self.times) and self.times[self.position] <= key:
+            self.position += int(np.searchsorted(self.times[self.position:], key, side='right'))
+        return self.position
+
+    def view(self) -> pd.DataFrame:
+        """Окно из последних `window` баров на текущей позиции (без копирования)."""
+        return self.data.iloc[max(0, self.position - self.window):self.position]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """
+        Числовые колонки всей истории инструмента в виде массивов.
+
+        Returns:
+            Словарь колонка -> массив ('time' — в наносекундах)
+        """
+        bars = {
+            column: self.data[column].to_numpy()
+            for column in self.data.columns
+            if column != 'time' and self.data[column].dtype.kind in 'biuf'
+        }
+        bars['time'] = self.times
+        return bars
+
+    @property
+    def last_close(self) -> float:
+        """Цена закрытия последнего доступного бара."""
+        return float(self.close[self.position - 1])
+
+
+class EventClock:
+    """
+    Часы событий бэктеста.
+
+    Шаги — объединение реальных временных меток свечей всех инструментов
+    в диапазоне дат. Закрытые периоды рынка FX отбрасываются маской, а не
+    пустыми итерациями. При заданном `decision_interval` остается последнее
+    событие каждого интервала, чтобы решения принимались реже, но по всем
+    уже закрытым барам.
+
+    Attributes:
+        events (np.ndarray): Временные метки шагов в наносекундах
+    """
+
+    def __init__(
+            self,
+            times: Dict[str, np.ndarray],
+            start_date: Timestamp,
+            end_date: Timestamp,
+            decision_interval: Optional[timedelta] = None,
+            skip_closed: bool = True,
+            include_end: bool = True,
+    ):
+        events = np.unique(np.concatenate(list(times.values()))) if times else np.empty(0, dtype=np.int64)
+        before_end = events <= to_ns(end_date) if include_end else events < to_ns(end_date)
+        events = events[(events >= to_ns(start_date)) & before_end]
+
+        if skip_closed:
+            events = events[fx_session_mask(events)]
+
+        if decision_interval is not None and len(events):
+            buckets = events // pd.Timedelta(decision_interval).value
+            events = events[np.append(buckets[1:] != buckets[:-1], True)]
+
+        self.events = events
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.events.tolist())
+
+    def periods_per_year(self, default: float = 252) -> float:
+        """
+        Число шагов в году для годовой нормировки метрик.
+
+        Args:
+            default: Значение, если шагов меньше двух
+
+        Returns:
+            Оценка количества шагов в году
+        """
+        if len(self.events) < 2:
+            return default
+        span = self.events[-1] - self.events[0]
+        return (len(self.events) - 1) * NS_PER_YEAR / span
+
+
+class ReplayEngine:
+    """
+    Воспроизведение исторических данных нескольких инструментов.
+
+    Attributes:
+        cursors (Dict[str, BarCursor]): Курсоры по инструментам
+        min_bars (int): Минимальное число баров для генерации сигналов
+    """
+
+    def __init__(
+            self,
+            historical_data: Dict[str, pd.DataFrame],
+            window: int = DEFAULT_WINDOW,
+            min_bars: int = DEFAULT_MIN_BARS,
+    ):
+        self.cursors = {
+            figi: BarCursor(data, window=window)
+            for figi, data in historical_data.items()
+        }
+        self.min_bars = min_bars
+
+    def clock(
+            self,
+            start_date: Timestamp,
+            end_date: Timestamp,
+            decision_interval: Optional[timedelta] = None,
+            skip_closed: bool = True,
+            include_end: bool = True,
+    ) -> EventClock:
+        """
+        Построение часов событий по свечам всех инструментов.
+
+        Args:
+            start_date: Начальная дата
+            end_date: Конечная дата
+            decision_interval: Интервал принятия решений (None — каждый бар)
+            skip_closed: Пропускать закрытые периоды рынка FX
+            include_end: Включать бар ровно на `end_date` (False — полуинтервал
+                [start_date, end_date), чтобы соседние отрезки не пересекались)
+
+        Returns:
+            Часы событий
+        """
+        return EventClock(
+            {figi: cursor.times for figi, cursor in self.cursors.items()},
+            start_date,
+            end_date,
+            decision_interval=decision_interval,
+            skip_closed=skip_closed,
+            include_end=include_end,
+        )
+
+    def step(self, timestamp: Timestamp) -> Iterator[Tuple[str, BarCursor]]:
+        """
+        Сдвиг всех курсоров к `timestamp`.
+
+        Args:
+            timestamp: Текущее время симуляции
+
+        Yields:
+            Пары (figi, курсор) для инструментов с достаточной историей
+        """
+        for figi, cursor in self.cursors.items():
+            if min(cursor.advance(timestamp), cursor.window) >= self.min_bars:
+                yield figi, cursor
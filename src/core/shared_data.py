@@ -0,0 +1,106 @@
+"""
+Общие для процессов данные бэктестинга.
+
+Свечи публикуются один раз в файлы .npy во временном каталоге, а процессы
+оптимизации открывают их через memory map: страницы берутся из общего
+кэша ОС, и каждый процесс не держит собственную копию истории.
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.replay import time_index_ns
+
+
+class SharedCandles:
+    """
+    Дескриптор свечей, опубликованных в отображаемых в память файлах.
+
+    Объект содержит только пути и описание колонок, поэтому дешево
+    передается в процессы-исполнители.
+
+    Attributes:
+        directory (Path): Каталог с файлами колонок
+        manifest (Dict[str, Dict]): Описание колонок и часового пояса по FIGI
+    """
+
+    def __init__(self, directory: Path, manifest: Dict[str, Dict]):
+        self.directory = Path(directory)
+        self.manifest = manifest
+
+    @classmethod
+    def publish(
+            cls,
+            historical_data: Dict[str, pd.DataFrame],
+            directory: Optional[str] = None,
+    ) -> 'SharedCandles':
+        """
+        Запись свечей в файлы колонок.
+
+        Args:
+            historical_data: Свечи по инструментам (колонка 'time' обязательна)
+            directory: Каталог для файлов (по умолчанию временный)
+
+        Returns:
+            Дескриптор опубликованных данных
+        """
+        root = Path(directory or tempfile.mkdtemp(prefix='backtest-candles-'))
+        root.mkdir(parents=True, exist_ok=True)
+
+        manifest = {}
+        for number, (figi, data) in enumerate(historical_data.items()):
+            columns: List[str] = [c for c in data.columns if c != 'time' and data[c].dtype.kind in 'biuf']
+            np.save(root / f'{number}_time.npy', time_index_ns(data['time']))
+            for column in columns:
+                np.save(root / f'{number}_{column}.npy', data[column].to_numpy())
+            manifest[figi] = {
+                'number': number,
+                'columns': columns,
+                'tz': str(data['time'].dt.tz) if data['time'].dt.tz is not None else None,
+            }
+
+        return cls(root, manifest)
+
+    def load(self) -> Dict[str, pd.DataFrame]:
+        """
+        Открытие свечей без копирования.
+
+        Колонки — массивы memory map только для чтения. Для данных с
+        часовым поясом копируется лишь колонка времени.
+
+        Returns:
+            Словарь FIGI -> DataFrame
+        """
+        historical_data = {}
+        for figi, meta in self.manifest.items():
+            number = meta['number']
+            times = self._open(f'{number}_time.npy')
+            frame = {'time': times.view('datetime64[ns]')}
+            for column in meta['columns']:
+                frame[column] = self._open(f'{number}_{column}.npy')
+
+            data = pd.DataFrame(frame, copy=False)
+            if meta['tz']:
+                data['time'] = data['time'].dt.tz_localize('UTC').dt.tz_convert(meta['tz'])
+            historical_data[figi] = data
+
+        return historical_data
+
+    def _open(self, name: str) -> np.ndarray:
+        """Открытие файла колонки как ndarray поверх memory map."""
+        return np.asarray(np.load(self.directory / name, mmap_mode='r'))
+
+    def close(self):
+        """Удаление опубликованных файлов."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> 'SharedCandles':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
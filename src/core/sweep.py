@@ -0,0 +1,311 @@
+"""
+Векторный перебор параметров стратегий с пакетными сигналами.
+
+Сигналы всех наборов параметров собираются в матрицы (набор × бар),
+а торговля симулируется один раз для всех наборов: на каждом шаге часов
+ордера всех строк исполняются одной операцией над массивами. Модель
+учета совпадает с `Backtester._simulate`: ограничение риска от текущего
+баланса, накопление позиций со средней ценой входа, модель исполнения и
+своп, капитал — баланс счета с переоценкой открытых позиций. Прибыль закрытых сделок собирается в
+матрицу (набор × сделка) для profit factor и доли выигрышей.
+
+Также здесь лежат матричные заготовки сигналов, которые стратегии могут
+использовать в `generate_signals_batch`.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.execution import ExecutionModel, rollover_days
+from src.core.metrics import EMPTY_METRICS, vectorized_metrics
+from src.core.replay import ReplayEngine
+
+
+def rolling_mean_std(close: np.ndarray, windows: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Скользящие среднее и стандартное отклонение для нескольких окон.
+
+    Используются накопленные суммы цены и ее квадрата, поэтому каждое окно
+    считается за O(T). Цены предварительно центрируются, чтобы разность
+    больших накопленных сумм не теряла точность.
+
+    Args:
+        close: Цены закрытия длины T
+        windows: Длины окон
+
+    Returns:
+        Кортеж (средние, стандартные отклонения) формы (W, T); бары до
+        заполнения окна равны NaN. Отклонение несмещенное (ddof=1).
+    """
+    close = np.asarray(close, dtype=float)
+    offset = close.mean() if len(close) else 0.0
+    centered = close - offset
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(centered ** 2)))
+
+    means = np.full((len(windows), len(close)), np.nan)
+    stds = np.full((len(windows), len(close)), np.nan)
+    for row, window in enumerate(windows):
+        if window > len(close):
+            continue
+        total = csum[window:] - csum[:-window]
+        total_sq = csum_sq[window:] - csum_sq[:-window]
+        variance = (total_sq - total ** 2 / window) / (window - 1)
+        means[row, window - 1:] = total / window + offset
+        stds[row, window - 1:] = np.sqrt(np.maximum(variance, 0))
+
+    return means, stds
+
+
+def mean_reversion_positions(
+        close: np.ndarray,
+        windows: List[int],
+        thresholds: List[float],
+) -> np.ndarray:
+    """
+    Матрица позиций правила возврата к среднему.
+
+    Позиция короткая, когда z-оценка цены выше порога, и длинная, когда
+    ниже минус порога.
+
+    Args:
+        close: Цены закрытия длины T
+        windows: Длины окон
+        thresholds: Пороги z-оценки
+
+    Returns:
+        Позиции (-1, 0, 1) формы (W * K, T): строки идут по окнам, внутри
+        окна — по порогам
+    """
+    means, stds = rolling_mean_std(close, windows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscore = (np.asarray(close, dtype=float) - means) / stds
+    zscore = np.nan_to_num(zscore, nan=0.0, posinf=0.0, neginf=0.0)[:, None, :]
+
+    levels = np.asarray(thresholds, dtype=float)[None, :, None]
+    positions = np.where(zscore > levels, -1, np.where(zscore < -levels, 1, 0))
+    return positions.reshape(len(windows) * len(thresholds), len(close))
+
+
+def mean_reversion_grid(
+        close: np.ndarray,
+        windows: List[int],
+        thresholds: List[float],
+) -> np.ndarray:
+    """
+    Позиции правила возврата к среднему для произвольных точек сетки.
+
+    Скользящие статистики считаются один раз на каждое уникальное окно,
+    а z-оценка окна сравнивается с порогами всех точек, где оно
+    встречается.
+
+    Args:
+        close: Цены закрытия длины T
+        windows: Окно каждой точки сетки (длина P)
+        thresholds: Порог каждой точки сетки (длина P)
+
+    Returns:
+        Позиции (-1, 0, 1) формы (P, T) в порядке точек
+    """
+    unique, rows = np.unique(np.asarray(windows, dtype=int), return_inverse=True)
+    means, stds = rolling_mean_std(close, unique.tolist())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscore = (np.asarray(close, dtype=float) - means) / stds
+    zscore = np.nan_to_num(zscore, nan=0.0, posinf=0.0, neginf=0.0)[rows]
+
+    levels = np.asarray(thresholds, dtype=float)[:, None]
+    return np.where(zscore > levels, -1, np.where(zscore < -levels, 1, 0))
+
+
+def simulate_grid(
+        replay: ReplayEngine,
+        signals: Dict[str, np.ndarray],
+        events: np.ndarray,
+        execution: ExecutionModel,
+        risk_per_trade: float,
+        initial_balance: float = 10000,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Симуляция торговли сразу для всех наборов параметров.
+
+    Прибыль закрытой части сделки считается от средней цены входа за
+    вычетом комиссии закрытой части, как в `Backtester._execute_signals`.
+
+    Args:
+        replay: Движок воспроизведения (курсоры в начальном положении)
+        signals: Размеры сделок по барам формы (P, T_figi) для каждого
+            инструмента (>0 — покупка, <0 — продажа)
+        events: Шаги часов в наносекундах
+        execution: Модель исполнения
+        risk_per_trade: Доля баланса, ограничивающая объем сделки
+        initial_balance: Начальный баланс
+
+    Returns:
+        Кортеж (капитал формы (P, S) по шагам, количество сделок формы (P,),
+        прибыль закрытых сделок формы (P, M) в порядке закрытия; строки
+        с меньшим числом закрытых сделок дополнены NaN)
+    """
+    figis = list(replay.cursors)
+    columns = {figi: column for column, figi in enumerate(figis)}
+    n_params = len(next(iter(signals.values())))
+
+    balance = np.full(n_params, float(initial_balance))
+    quantities = np.zeros((n_params, len(figis)))
+    average_prices = np.zeros((n_params, len(figis)))
+    equity = np.empty((n_params, len(events)))
+    num_trades = np.zeros(n_params, dtype=np.int64)
+    closed_rows: List[np.ndarray] = []
+    closed_profits: List[np.ndarray] = []
+
+    previous_time = None
+    for step, current_time in enumerate(events.tolist()):
+        active = list(replay.step(current_time))
+        if active:
+            bars = [cursor.position - 1 for _, cursor in active]
+            requested = np.column_stack([signals[figi][:, bar] for (figi, _), bar in zip(active, bars)])
+            close = np.array([cursor.close[bar] for (_, cursor), bar in zip(active, bars)])
+
+            # Ограничение риска от баланса строки на начало бара
+            sides = np.where(requested > 0, 1.0, -1.0)
+            sizes = np.minimum(np.abs(requested), (balance * risk_per_trade)[:, None] / close)
+            rows, orders = np.nonzero((requested != 0) & (sizes >= 1))
+
+            if len(rows):
+                fills = execution.fill(
+                    sides[rows, orders],
+                    sizes[rows, orders],
+                    close[orders],
+                    np.array([cursor.high[bar] for (_, cursor), bar in zip(active, bars)])[orders],
+                    np.array([cursor.low[bar] for (_, cursor), bar in zip(active, bars)])[orders],
+                    np.array([cursor.volume[bar] for (_, cursor), bar in zip(active, bars)])[orders],
+                )
+                instruments = np.array([columns[figi] for figi, _ in active])[orders]
+                filled = fills.size > 0
+                rows, instruments = rows[filled], instruments[filled]
+                size, price, commission = fills.size[filled], fills.price[filled], fills.commission[filled]
+                amount = sides[rows, orders[filled]] * size
+
+                balance -= np.bincount(rows, weights=amount * price + commission, minlength=n_params)
+                num_trades += np.bincount(rows, minlength=n_params)
+
+                # У строки не больше одного ордера на инструмент за бар,
+                # поэтому позиции обновляются без конфликтов индексов
+                held = quantities[rows, instruments]
+                average = average_prices[rows, instruments]
+                new_held = held + amount
+                closing = held * amount < 0
+                if closing.any():
+                    closed = np.minimum(np.abs(amount), np.abs(held))[closing]
+                    realized = closed * (price[closing] - average[closing]) * np.sign(held[closing])
+                    closed_rows.append(rows[closing])
+                    closed_profits.append(realized - commission[closing] * closed / size[closing])
+
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    average = np.where(
+                        ~closing, (average * held + price * amount) / new_held,
+                        np.where(held * new_held < 0, price, average),
+                    )
+                quantities[rows, instruments] = new_held
+                average_prices[rows, instruments] = np.where(new_held == 0, 0.0, average)
+
+        # Своп за перенос открытых позиций через 22:00 UTC
+        prices = np.array([replay.cursors[figi].last_close for figi in figis])
+        if previous_time is not None:
+            days = rollover_days(previous_time, current_time)
+            if days:
+                swap = execution.swap(quantities.ravel(), np.tile(prices, n_params), days)
+                balance -= swap.reshape(n_params, len(figis)).sum(axis=1)
+        previous_time = current_time
+
+        equity[:, step] = balance + quantities @ prices
+
+    return equity, num_trades, _pad_trades(closed_rows, closed_profits, n_params)
+
+
+def _pad_trades(rows: List[np.ndarray], profits: List[np.ndarray], n_params: int) -> np.ndarray:
+    """
+    Сборка прибылей закрытых сделок в матрицу по строкам.
+
+    Args:
+        rows: Номера строк сделок по шагам
+        profits: Прибыль сделок по шагам
+        n_params: Количество строк
+
+    Returns:
+        Матрица формы (P, M), дополненная NaN
+    """
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    profits = np.concatenate(profits) if profits else np.empty(0)
+    counts = np.bincount(rows, minlength=n_params)
+
+    order = np.argsort(rows, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    columns = np.arange(len(rows)) - starts[rows[order]]
+
+    matrix = np.full((n_params, counts.max() if len(rows) else 0), np.nan)
+    matrix[rows[order], columns] = profits[order]
+    return matrix
+
+
+def grid_metrics(
+        equity: np.ndarray,
+        num_trades: np.ndarray,
+        trade_pnl: np.ndarray,
+        periods_per_year: float = 252,
+) -> Dict[str, np.ndarray]:
+    """
+    Метрики строк матрицы капитала по формулам `OnlineMetrics`.
+
+    Args:
+        equity: Капитал формы (P, S)
+        num_trades: Количество сделок формы (P,)
+        trade_pnl: Прибыль закрытых сделок формы (P, M), дополненная NaN
+        periods_per_year: Число шагов в году
+
+    Returns:
+        Словарь метрика -> массив длины P; строки без сделок получают
+        нулевые метрики, как и `OnlineMetrics.snapshot`
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[:, 1:] / equity[:, :-1] - 1
+    metrics = vectorized_metrics(returns, periods_per_year)
+
+    traded = num_trades > 0
+    result = {}
+    for name in ('sharpe_ratio', 'max_drawdown', 'total_return', 'sortino_ratio'):
+        result[name] = np.where(traded, metrics[name], EMPTY_METRICS[name])
+
+    closed = np.count_nonzero(~np.isnan(trade_pnl), axis=1)
+    wins = np.count_nonzero(trade_pnl > 0, axis=1)
+    gross_profit = np.where(trade_pnl > 0, trade_pnl, 0).sum(axis=1)
+    gross_loss = -np.where(trade_pnl < 0, trade_pnl, 0).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = wins / closed
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss, np.inf)
+        avg_trade = np.nansum(trade_pnl, axis=1) / closed
+
+    has_closed = traded & (closed > 0)
+    result['win_rate'] = np.where(has_closed, win_rate, 0)
+    result['profit_factor'] = np.where(has_closed, profit_factor, 0)
+    result['num_trades'] = num_trades
+    result['avg_trade'] = np.where(has_closed, avg_trade, 0)
+    return result
+
+
+def grid_table(params: List[Dict], metrics: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Таблица результатов перебора.
+
+    Args:
+        params: Наборы параметров в порядке строк
+        metrics: Метрики строк (см. `grid_metrics`)
+
+    Returns:
+        Таблица: параметры и метрики для каждого набора
+    """
+    table = pd.DataFrame(params)
+    for name, values in metrics.items():
+        table[name] = values
+    return table
@@ -0,0 +1,110 @@
+"""
+Разбиение истории для walk-forward оптимизации.
+
+Включает:
+- Построение скользящих и якорных фолдов обучение/тест
+- Срезы загруженных данных по фолду без копирования
+- Склейку кривых баланса тестовых отрезков
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.replay import time_index_ns, to_ns
+
+
+class Fold(NamedTuple):
+    """Границы фолда: обучающий и следующий за ним тестовый отрезок."""
+    train_start: datetime
+    train_end: datetime
+    test_start: datetime
+    test_end: datetime
+
+
+def make_folds(
+        start_date: datetime,
+        end_date: datetime,
+        train_period: timedelta,
+        test_period: timedelta,
+        anchored: bool = False,
+) -> List[Fold]:
+    """
+    Построение фолдов walk-forward.
+
+    Тестовые отрезки идут подряд без перекрытия: границы полуоткрытые,
+    [test_start, test_end). В скользящем режиме
+    обучающее окно имеет фиксированную длину и сдвигается вместе с тестом,
+    в якорном — всегда начинается с `start_date`.
+
+    Args:
+        start_date: Начало истории
+        end_date: Конец истории
+        train_period: Длина обучающего отрезка
+        test_period: Длина тестового отрезка
+        anchored: Якорный режим
+
+    Returns:
+        Список фолдов
+    """
+    folds = []
+    test_start = start_date + train_period
+    while test_start < end_date:
+        test_end = min(test_start + test_period, end_date)
+        train_start = start_date if anchored else test_start - train_period
+        folds.append(Fold(train_start, test_start, test_start, test_end))
+        test_start = test_end
+    return folds
+
+
+def slice_until(historical_data: Dict[str, pd.DataFrame], end_date: datetime) -> Dict[str, pd.DataFrame]:
+    """
+    Срезы данных до `end_date` включительно без копирования.
+
+    Более ранняя история сохраняется, чтобы окна стратегии в начале
+    отрезка были заполнены, а более поздняя недоступна (нет заглядывания
+    в будущее). Данные должны быть отсортированы по времени.
+
+    Args:
+        historical_data: Свечи по инструментам
+        end_date: Граница среза
+
+    Returns:
+        Словарь FIGI -> срез DataFrame
+    """
+    key = to_ns(end_date)
+    return {
+        figi: data.iloc[:int(np.searchsorted(time_index_ns(data['time']), key, side='right'))]
+        for figi, data in historical_data.items()
+    }
+
+
+def stitch_equity(curves: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Склейка кривых баланса тестовых отрезков в одну.
+
+    Каждый отрезок масштабируется так, чтобы начинаться с капитала, на
+    котором закончился предыдущий.
+
+    Args:
+        curves: Кривые баланса отрезков (колонки date, balance, equity)
+
+    Returns:
+        Общая внеобразцовая кривая баланса
+    """
+    parts = []
+    scale = 1.0
+    for curve in curves:
+        if curve.empty:
+            continue
+        part = curve[['date', 'balance', 'equity']].copy()
+        if parts:
+            scale = parts[-1]['equity'].iloc[-1] / part['equity'].iloc[0]
+        part[['balance', 'equity']] *= scale
+        parts.append(part)
+
+    if not parts:
+        return pd.DataFrame(columns=['date', 'balance', 'equity'])
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,191 @@
+"""
+Локальный кэш исторических свечей с учетом покрытых периодов.
+
+Для каждой пары (FIGI, интервал) кэш хранит свечи в CandleStore и список
+уже загруженных периодов. Запрос диапазона скачивает у API только
+непокрытые промежутки и вставляет их в историю по порядку времени, поэтому
+повторные запуски и бэктесты на тех же периодах почти не обращаются к сети.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from src.data.candle_store import CandleStore, candles_to_records
+
+# Длительность свечи по имени интервала API
+INTERVAL_DURATIONS = {
+    'CANDLE_INTERVAL_1_MIN': pd.Timedelta(minutes=1),
+    'CANDLE_INTERVAL_5_MIN': pd.Timedelta(minutes=5),
+    'CANDLE_INTERVAL_15_MIN': pd.Timedelta(minutes=15),
+    'CANDLE_INTERVAL_HOUR': pd.Timedelta(hours=1),
+    'CANDLE_INTERVAL_DAY': pd.Timedelta(days=1),
+}
+
+
+def _interval_name(interval) -> str:
+    return getattr(interval, 'name', str(interval))
+
+
+def _utc(value) -> pd.Timestamp:
+    """Время в UTC (наивное время считается UTC)."""
+    value = pd.Timestamp(value)
+    return value.tz_localize('UTC') if value.tzinfo is None else value.tz_convert('UTC')
+
+
+class Coverage:
+    """
+    Набор непересекающихся полуинтервалов времени [start, end) в наносекундах.
+
+    Attributes:
+        ranges (List[Tuple[int, int]]): Периоды по возрастанию
+    """
+
+    def __init__(self, ranges: List[Tuple[int, int]] = None):
+        self.ranges: List[Tuple[int, int]] = []
+        for start, end in ranges or []:
+            self.add(start, end)
+
+    def add(self, start: int, end: int):
+        """Добавление периода с объединением соседних и пересекающихся."""
+        if end <= start:
+            return
+        merged = []
+        for low, high in self.ranges:
+            if high < start or low > end:
+                merged.append((low, high))
+            else:
+                start, end = min(start, low), max(end, high)
+        merged.append((start, end))
+        self.ranges = sorted(merged)
+
+    def missing(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Непокрытые промежутки периода [start, end).
+
+        Args:
+            start: Начало периода
+            end: Конец периода
+
+        Returns:
+            Список промежутков по возрастанию
+        """
+        gaps = []
+        cursor = start
+        for low, high in self.ranges:
+            if high <= cursor:
+                continue
+            if low >= end:
+                break
+            if low > cursor:
+                gaps.append((cursor, low))
+            cursor = max(cursor, high)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+
+class CandleCache:
+    """
+    Кэш свечей поверх функции загрузки из API.
+
+    Attributes:
+        root (Path): Каталог кэша
+        fetch: Загрузка свечей, сигнатура как у TinkoffAPI.get_candles
+        network_requests (int): Количество обращений к `fetch`
+    """
+
+    def __init__(
+            self,
+            fetch: Callable[..., Awaitable[List]],
+            root: str = 'data/cache',
+    ):
+        self.root = Path(root)
+        self.fetch = fetch
+        self.network_requests = 0
+        self._stores: Dict[str, CandleStore] = {}
+        self._coverage: Dict[Tuple[str, str], Coverage] = {}
+
+    async def get(
+            self,
+            figi: str,
+            interval,
+            start_date: datetime,
+            end_date: datetime,
+    ) -> pd.DataFrame:
+        """
+        Свечи инструмента за период с догрузкой недостающих промежутков.
+
+        Args:
+            figi: FIGI инструмента
+            interval: Интервал свечей (CandleInterval)
+            start_date: Начало периода
+            end_date: Конец периода (не включается)
+
+        Returns:
+            DataFrame свечей с колонкой 'time' (UTC)
+        """
+        name = _interval_name(interval)
+        store = self._store(name)
+        coverage = self._load_coverage(figi, name)
+
+        start, end = _utc(start_date), _utc(end_date)
+
+        # Свеча, которая еще формируется, не считается загруженной:
+        # ее период запрашивается снова при следующем обращении
+        duration = INTERVAL_DURATIONS.get(name)
+        now = pd.Timestamp.now(tz='UTC')
+        complete_until = now.floor(duration) if duration is not None else now
+
+        for gap_start, gap_end in coverage.missing(start.value, end.value):
+            candles = await self.fetch(
+                figi=figi,
+                interval=interval,
+                from_dt=pd.Timestamp(gap_start, tz='UTC').to_pydatetime(),
+                to_dt=pd.Timestamp(gap_end, tz='UTC').to_pydatetime(),
+            )
+            self.network_requests += 1
+            if candles:
+                store.merge(figi, candles_to_records(candles))
+            coverage.add(gap_start, min(gap_end, complete_until.value))
+            self._save_coverage(figi, name, coverage)
+
+        return store.read_frame(figi, start.value, end.value - 1)
+
+    def coverage(self, figi: str, interval) -> List[Tuple[int, int]]:
+        """Загруженные периоды инструмента (наносекунды UTC)."""
+        return list(self._load_coverage(figi, _interval_name(interval)).ranges)
+
+    def _store(self, name: str) -> CandleStore:
+        if name not in self._stores:
+            self._stores[name] = CandleStore(str(self.root / name))
+        return self._stores[name]
+
+    def _coverage_path(self, figi: str, name: str) -> Path:
+        return self.root / name / figi / 'coverage.json'
+
+    def _load_coverage(self, figi: str, name: str) -> Coverage:
+        key = (figi, name)
+        if key not in self._coverage:
+            path = self._coverage_path(figi, name)
+            ranges = []
+            if path.exists():
+                try:
+                    ranges = json.loads(path.read_text())
+                except ValueError:
+                    logger.warning(f"Поврежден файл покрытия {path}, период будет загружен заново")
+            self._coverage[key] = Coverage([tuple(item) for item in ranges])
+        return self._coverage[key]
+
+    def _save_coverage(self, figi: str, name: str, coverage: Coverage):
+        """Запись покрытия после записи свечей: при сбое период просто загрузится снова."""
+        path = self._coverage_path(figi, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + '.tmp')
+        temporary.write_text(json.dumps(coverage.ranges))
+        os.replace(temporary, path)
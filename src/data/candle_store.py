@@ -0,0 +1,328 @@
+"""
+Хранилище свечей из сегментов с двоичными записями фиксированной длины.
+
+Свечи каждого инструмента пишутся только в конец файлов-сегментов по
+месяцам: `{root}/{figi}/{YYYY-MM}.bin`. Рядом лежит разреженный индекс
+времени `{YYYY-MM}.idx` (время каждой INDEX_STRIDE-й записи). Чтение
+диапазона открывает сегменты через memory map и возвращает
+структурированный массив NumPy без разбора текста.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+CANDLE_DTYPE = np.dtype([
+    ('time', 'i8'),  # время открытия свечи, наносекунды UTC
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'i8'),
+])
+
+# Шаг разреженного индекса времени в записях
+INDEX_STRIDE = 256
+
+
+def segment_name(time_ns: int) -> str:
+    """Имя сегмента (месяц UTC) для времени в наносекундах."""
+    return str(np.datetime64(int(time_ns), 'ns').astype('datetime64[M]'))
+
+
+def candles_to_records(candles: List) -> np.ndarray:
+    """
+    Преобразование списка свечей (объекты с полями open, high, low, close,
+    volume, time) в массив записей.
+
+    Args:
+        candles: Свечи
+
+    Returns:
+        Массив с типом CANDLE_DTYPE
+    """
+    records = np.empty(len(candles), dtype=CANDLE_DTYPE)
+    records['time'] = [pd.Timestamp(candle.time).value for candle in candles]
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        records[name] = [getattr(candle, name) for candle in candles]
+    return records
+
+
+class CandleStore:
+    """
+    Хранилище свечей по инструментам.
+
+    Запись только добавляет байты в конец сегмента, поэтому ее стоимость не
+    зависит от объема истории. Незавершенная запись после сбоя (хвост короче
+    длины записи) отбрасывается при открытии сегмента.
+
+    Attributes:
+        root (Path): Каталог хранилища
+        fsync (bool): Сбрасывать данные на диск после каждой записи
+    """
+
+    def __init__(self, root: str = 'data/candles', fsync: bool = False):
+        self.root = Path(root)
+        self.fsync = fsync
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._last_time: Dict[str, int] = {}
+        self._checked: Set[Tuple[str, str]] = set()
+
+    def append(self, figi: str, candles: np.ndarray) -> int:
+        """
+        Добавление свечей инструмента.
+
+        Свечи не позже последней сохраненной (повторы из потока)
+        пропускаются.
+
+        Args:
+            figi: FIGI инструмента
+            candles: Свечи с типом CANDLE_DTYPE
+
+        Returns:
+            Количество записанных свечей
+        """
+        candles = np.asarray(candles, dtype=CANDLE_DTYPE)
+        if len(candles) > 1 and np.any(candles['time'][1:] <= candles['time'][:-1]):
+            # Сортировка по времени; из повторов остается последняя версия свечи
+            candles = candles[np.argsort(candles['time'], kind='stable')]
+            candles = candles[np.append(candles['time'][1:] != candles['time'][:-1], True)]
+
+        last_time = self.last_time(figi)
+        if last_time is not None:
+            candles = candles[candles['time'] > last_time]
+        if not len(candles):
+            return 0
+
+        months = candles['time'].astype('datetime64[ns]').astype('datetime64[M]')
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        for part in np.split(candles, boundaries):
+            self._write_segment(figi, segment_name(part['time'][0]), part)
+
+        self._last_time[figi] = int(candles['time'][-1])
+        return len(candles)
+
+    def merge(self, figi: str, candles: np.ndarray) -> int:
+        """
+        Вставка свечей в любое место истории с сохранением порядка времени.
+
+        Свечи новее последней сохраненной дописываются в конец, как в
+        `append`. Сегменты, в которые попадают более ранние свечи,
+        переписываются целиком (через временный файл и атомарную замену);
+        при совпадении времени остается новая версия свечи.
+
+        Args:
+            figi: FIGI инструмента
+            candles: Свечи с типом CANDLE_DTYPE
+
+        Returns:
+            Количество переданных свечей после удаления повторов
+        """
+        candles = np.asarray(candles, dtype=CANDLE_DTYPE)
+        if not len(candles):
+            return 0
+        candles = candles[np.argsort(candles['time'], kind='stable')]
+        candles = candles[np.append(candles['time'][1:] != candles['time'][:-1], True)]
+
+        last_time = self.last_time(figi)
+        if last_time is None or candles['time'][0] > last_time:
+            return self.append(figi, candles)
+
+        months = candles['time'].astype('datetime64[ns]').astype('datetime64[M]')
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        for part in np.split(candles, boundaries):
+            name = segment_name(part['time'][0])
+            existing = np.array(self._open_segment(figi, name))
+            if len(existing) and part['time'][0] > existing['time'][-1]:
+                self._write_segment(figi, name, part)
+                continue
+
+            # Новая версия свечи идет после сохраненной и вытесняет ее
+            combined = np.concatenate((existing, part))
+            combined = combined[np.argsort(combined['time'], kind='stable')]
+            combined = combined[np.append(combined['time'][1:] != combined['time'][:-1], True)]
+            self._rewrite_segment(figi, name, combined)
+
+        self._last_time[figi] = max(last_time, int(candles['time'][-1]))
+        return len(candles)
+
+    def read(
+            self,
+            figi: str,
+            start_time: Optional[int] = None,
+            end_time: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Чтение свечей инструмента за диапазон [start_time, end_time].
+
+        Если диапазон попадает в один сегмент, результат — срез memory map
+        без копирования.
+
+        Args:
+            figi: FIGI инструмента
+            start_time: Начало диапазона в наносекундах (None — с начала)
+            end_time: Конец диапазона в наносекундах (None — до конца)
+
+        Returns:
+            Свечи с типом CANDLE_DTYPE
+        """
+        first = segment_name(start_time) if start_time is not None else None
+        last = segment_name(end_time) if end_time is not None else None
+
+        parts = []
+        for name in self.segments(figi):
+            if (first and name < first) or (last and name > last):
+                continue
+            records = self._open_segment(figi, name)
+            if not len(records):
+                continue
+            index = self._index(figi, name, records)
+            low = 0 if start_time is None else self._search(records, index, start_time, 'left')
+            high = len(records) if end_time is None else self._search(records, index, end_time, 'right')
+            if high > low:
+                parts.append(records[low:high])
+
+        if not parts:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def read_frame(
+            self,
+            figi: str,
+            start_time: Optional[int] = None,
+            end_time: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Чтение свечей в виде DataFrame с колонкой 'time' (UTC).
+
+        Args:
+            figi: FIGI инструмента
+            start_time: Начало диапазона в наносекундах
+            end_time: Конец диапазона в наносекундах
+
+        Returns:
+            DataFrame свечей
+        """
+        records = self.read(figi, start_time, end_time)
+        frame = pd.DataFrame({name: records[name] for name in CANDLE_DTYPE.names if name != 'time'})
+        frame.insert(0, 'time', pd.to_datetime(records['time'], utc=True))
+        return frame
+
+    def segments(self, figi: str) -> List[str]:
+        """Имена сегментов инструмента по возрастанию."""
+        directory = self.root / figi
+        if not directory.exists():
+            return []
+        return sorted(path.stem for path in directory.glob('*.bin'))
+
+    def last_time(self, figi: str) -> Optional[int]:
+        """Время последней сохраненной свечи инструмента."""
+        if figi not in self._last_time:
+            for name in reversed(self.segments(figi)):
+                records = self._open_segment(figi, name)
+                if len(records):
+                    self._last_time[figi] = int(records['time'][-1])
+                    break
+        return self._last_time.get(figi)
+
+    def _path(self, figi: str, name: str, suffix: str) -> Path:
+        return self.root / figi / f'{name}{suffix}'
+
+    def _repair(self, figi: str, name: str):
+        """
+        Проверка сегмента после возможного сбоя.
+
+        Незавершенная последняя запись отрезается, а индекс перестраивается,
+        если он не соответствует данным.
+        """
+        key = (figi, name)
+        if key in self._checked:
+            return
+        self._checked.add(key)
+
+        path = self._path(figi, name, '.bin')
+        if not path.exists():
+            return
+
+        size = path.stat().st_size
+        tail = size % CANDLE_DTYPE.itemsize
+        if tail:
+            logger.warning(f"Отброшена незавершенная запись в сегменте {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(size - tail)
+
+        count = (size - tail) // CANDLE_DTYPE.itemsize
+        index_path = self._path(figi, name, '.idx')
+        expected = (count + INDEX_STRIDE - 1) // INDEX_STRIDE
+        if not index_path.exists() or index_path.stat().st_size != expected * 8:
+            records = np.memmap(path, dtype=CANDLE_DTYPE, mode='r') if count else np.empty(0, CANDLE_DTYPE)
+            np.ascontiguousarray(records['time'][::INDEX_STRIDE]).tofile(index_path)
+
+    def _write_segment(self, figi: str, name: str, records: np.ndarray):
+        """Добавление записей в конец сегмента и его индекса."""
+        path = self._path(figi, name, '.bin')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._repair(figi, name)
+
+        count = path.stat().st_size // CANDLE_DTYPE.itemsize if path.exists() else 0
+        offset = (-count) % INDEX_STRIDE
+        index_times = records['time'][offset::INDEX_STRIDE]
+
+        with open(path, 'ab') as f:
+            f.write(records.tobytes())
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        if len(index_times):
+            with open(self._path(figi, name, '.idx'), 'ab') as f:
+                f.write(np.ascontiguousarray(index_times).tobytes())
+
+    def _rewrite_segment(self, figi: str, name: str, records: np.ndarray):
+        """
+        Замена сегмента новыми записями.
+
+        Индекс удаляется до замены данных и пишется заново после нее:
+        после сбоя между шагами индекс будет перестроен при открытии.
+        """
+        self._path(figi, name, '.idx').unlink(missing_ok=True)
+        for suffix, data in (('.bin', records), ('.idx', records['time'][::INDEX_STRIDE])):
+            target = self._path(figi, name, suffix)
+            temporary = target.with_name(target.name + '.tmp')
+            with open(temporary, 'wb') as f:
+                f.write(np.ascontiguousarray(data).tobytes())
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(temporary, target)
+        self._checked.add((figi, name))
+
+    def _open_segment(self, figi: str, name: str) -> np.ndarray:
+        """Открытие сегмента через memory map."""
+        self._repair(figi, name)
+        path = self._path(figi, name, '.bin')
+        if not path.exists() or path.stat().st_size == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode='r')
+
+    def _index(self, figi: str, name: str, records: np.ndarray) -> np.ndarray:
+        """Разреженный индекс времени сегмента."""
+        index = np.fromfile(self._path(figi, name, '.idx'), dtype=np.int64)
+        expected = (len(records) + INDEX_STRIDE - 1) // INDEX_STRIDE
+        if len(index) != expected:
+            index = np.ascontiguousarray(records['time'][::INDEX_STRIDE])
+        return index
+
+    @staticmethod
+    def _search(records: np.ndarray, index: np.ndarray, time: int, side: str) -> int:
+        """Поиск позиции времени: сначала по индексу, затем внутри блока."""
+        block = max(0, int(np.searchsorted(index, time, side=side)) - 1)
+        low = block * INDEX_STRIDE
+        high = min(len(records), low + 2 * INDEX_STRIDE)
+        return low + int(np.searchsorted(records['time'][low:high], time, side=side))
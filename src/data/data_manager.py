@@ -10,17 +10,50 @@
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set
 import json
 from pathlib import Path
 
 import pandas as pd
 from loguru import logger
+from tinkoff.invest import CandleInterval
 
 from src.api.tinkoff_api import TinkoffAPI
 from src.utils.config import Config
 from src.data.schemas import CandleData, IndicatorData
 from src.data.database import DatabaseManager
+from src.data.candle_cache import CandleCache
+from src.data.candle_store import CandleStore, candles_to_records
+from src.data.hot_cache import HotCache, InMemoryRedis
+from src.data.indicator_store import IndicatorStore
+from src.data.indicators import INDICATOR_LABELS, IndicatorEngine
+from src.data.postgres import PostgresDatabaseManager
+from src.data.trade_journal import TradeJournal
+
+# Количество инструментов, история которых загружается одновременно
+HISTORY_CONCURRENCY = 8
+# Попытки загрузки истории инструмента и начальная пауза между ними, секунды
+HISTORY_ATTEMPTS = 3
+HISTORY_RETRY_DELAY = 1.0
+
+# Интервал истории и потока свечей, по которому считаются индикаторы
+INDICATOR_INTERVAL = CandleInterval.CANDLE_INTERVAL_HOUR
+INDICATOR_PERIOD = pd.Timedelta(hours=1)
+
+# Каталог кэша истории из API. Он отделен от свечей потока, которые
+# DatabaseManager сохраняет в data/candles (или в PostgreSQL): кэш хранит
+# историю по интервалам вместе с покрытыми периодами, а свечи потока могут
+# иметь пропуски и не должны считаться загруженной историей
+CANDLE_CACHE_DIR = "data/cache"
+
+# Интервалы свечей для get_historical_candles
+HISTORY_INTERVALS = {
+    '1m': CandleInterval.CANDLE_INTERVAL_1_MIN,
+    '5m': CandleInterval.CANDLE_INTERVAL_5_MIN,
+    '15m': CandleInterval.CANDLE_INTERVAL_15_MIN,
+    '1h': CandleInterval.CANDLE_INTERVAL_HOUR,
+    '1d': CandleInterval.CANDLE_INTERVAL_DAY,
+}
 
 
 class DataManager:
@@ -34,6 +67,11 @@ class DataManager:
         historical_data (Dict[str, pd.DataFrame]): Кэшированные исторические данные
         realtime_data (Dict[str, List[CandleData]]): Буферы данных в реальном времени
         indicators (Dict[str, Dict[str, IndicatorData]]): Рассчитанные индикаторы
+        indicator_engine (IndicatorEngine): Инкрементальный расчет индикаторов
+        candle_cache (CandleCache): Локальный кэш исторических свечей из API
+            (без API отдает только уже загруженные периоды)
+        work_counters (Dict[str, int]): Счетчики обработанных и пропущенных
+            инструментов при обновлении и сохранении индикаторов
     """
 
     def __init__(self, config: Config, api: TinkoffAPI):
@@ -46,10 +84,32 @@ class DataManager:
         """
         self.config = config
         self.api = api
-        self.db = DatabaseManager(config)
+        # Хранилище: файлы в data/ или PostgreSQL (DB_BACKEND=postgres)
+        if getattr(config, "DB_BACKEND", "files") == "postgres":
+            self.db = PostgresDatabaseManager(config)
+        else:
+            self.db = DatabaseManager(config)
+        # Общий кэш актуальных данных для других процессов (HOT_CACHE_ENABLED)
+        self.hot_cache: Optional[HotCache] = (
+            HotCache.from_url(config.redis_url) if getattr(config, "HOT_CACHE_ENABLED", False) else None
+        )
         self.historical_data: Dict[str, pd.DataFrame] = {}
         self.realtime_data: Dict[str, List[CandleData]] = {}
         self.indicators: Dict[str, Dict[str, IndicatorData]] = {}
+        self.indicator_engine = IndicatorEngine()
+        self.candle_cache = CandleCache(self._fetch_candles, root=CANDLE_CACHE_DIR)
+        self.work_counters = {
+            'indicators_processed': 0,
+            'indicators_skipped': 0,
+            'saves_processed': 0,
+            'saves_skipped': 0,
+        }
+        # Инструменты с новыми закрытыми свечами: индикаторы еще не
+        # обновлены и еще не сохранены соответственно
+        self._stale_indicators: Set[str] = set()
+        self._unsaved_indicators: Set[str] = set()
+        # Последние цены потока, еще не опубликованные в общий кэш
+        self._latest_prices: Dict[str, float] = {}
         self._running = False
 
     async def initialize(self):
@@ -58,12 +118,18 @@ class DataManager:
 
         # Инициализация подключения к базе данных
         await self.db.connect()
+        if self.hot_cache is not None:
+            await self._connect_hot_cache()
 
         # Загрузка исторических данных для настроенных инструментов
         await self.load_historical_data(days=30)
 
-        # Подписка на данные в реальном времени
-        await self.api.subscribe_to_market_data(list(self.api.instruments.keys()))
+        # Подписка на данные в реальном времени с интервалом истории, чтобы
+        # индикаторы обновлялись свечами того же размера
+        self.api.add_candle_callback(self.on_candle)
+        if self.hot_cache is not None:
+            self.api.add_price_callback(self.on_price)
+        await self.api.subscribe_to_market_data(list(self.api.instruments.keys()), INDICATOR_INTERVAL)
 
         logger.success("DataManager инициализирован")
 
@@ -72,39 +138,87 @@ class DataManager:
         logger.info("Завершение работы DataManager")
         self._running = False
         await self.db.disconnect()
+        if self.hot_cache is not None:
+            await self.hot_cache.client.aclose()
         logger.success("DataManager завершил работу")
 
-    async def load_historical_data(self, days: int = 30):
+    async def load_historical_data(
+            self,
+            days: int = 30,
+            progress: Optional[Callable[[str, int, int], None]] = None,
+    ) -> List[str]:
         """
         Загрузка исторических данных для всех инструментов.
 
+        Инструменты загружаются параллельно (не более HISTORY_CONCURRENCY
+        одновременно), частоту запросов ограничивает TinkoffAPI. Неудачная
+        загрузка инструмента повторяется с нарастающей паузой и не мешает
+        остальным.
+
         Аргументы:
             days: Количество дней истории для загрузки
+            progress: Вызывается после каждого инструмента с аргументами
+                (FIGI, загружено инструментов, всего инструментов)
+
+        Возвращает:
+            FIGI инструментов, историю которых загрузить не удалось
         """
         logger.info(f"Загрузка {days} дней исторических данных")
 
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
-
-        for figi, instrument in self.api.instruments.items():
-            candles = await self.api.get_candles(
-                figi=figi,
-                interval=CandleInterval.CANDLE_INTERVAL_1_HOUR,
-                from_dt=start_date,
-                to_dt=end_date,
-            )
-
-            if candles:
-                df = pd.DataFrame([c.dict() for c in candles])
-                df.set_index("time", inplace=True)
-                self.historical_data[figi] = df
+        semaphore = asyncio.Semaphore(HISTORY_CONCURRENCY)
+        total = len(self.api.instruments)
+        completed = 0
+        failed: List[str] = []
+
+        async def load(figi: str, instrument):
+            nonlocal completed
+            for attempt in range(1, HISTORY_ATTEMPTS + 1):
+                try:
+                    async with semaphore:
+                        # Из API загружаются только периоды, которых нет в кэше
+                        candles = await self.candle_cache.get(
+                            figi, INDICATOR_INTERVAL, start_date, end_date
+                        )
+                    break
+                except Exception as e:
+                    if attempt == HISTORY_ATTEMPTS:
+                        logger.error(f"Не удалось загрузить историю {instrument.name}: {e}")
+                        failed.append(figi)
+                        candles = None
+                        break
+                    delay = HISTORY_RETRY_DELAY * 2 ** (attempt - 1)
+                    logger.warning(
+                        f"Ошибка загрузки истории {instrument.name} (попытка {attempt}): {e}. "
+                        f"Повтор через {delay:.0f} с"
+                    )
+                    await asyncio.sleep(delay)
+
+            if candles is not None and not candles.empty:
+                self.historical_data[figi] = candles.set_index("time")
 
                 # Расчет начальных индикаторов
                 self._calculate_indicators(figi)
 
-                logger.info(f"Загружено {len(candles)} свечей для {instrument.name}")
+            completed += 1
+            if candles is not None and not candles.empty:
+                logger.info(f"[{completed}/{total}] Загружено {len(candles)} свечей для {instrument.name}")
+            if progress is not None:
+                progress(figi, completed, total)
+
+        await asyncio.gather(*(load(figi, instrument) for figi, instrument in self.api.instruments.items()))
+
+        if failed:
+            logger.warning(f"История не загружена для {len(failed)} из {total} инструментов")
+        logger.success(f"Исторические данные загружены для {total - len(failed)} инструментов")
+        return failed
 
-        logger.success(f"Исторические данные загружены для {len(self.api.instruments)} инструментов")
+    async def _fetch_candles(self, **kwargs) -> List:
+        """Загрузка недостающих в кэше свечей из API."""
+        if self.api is None:
+            raise RuntimeError("Клиент API не задан: недостающие в кэше свечи загрузить нельзя")
+        return await self.api.get_candles(**kwargs)
 
     async def run(self):
         """Основной цикл сбора и обработки данных."""
@@ -133,23 +247,123 @@ class DataManager:
         # Вызывается callback'ом потока рыночных данных в TinkoffAPI
         pass
 
+    def on_candle(self, figi: str, candle: CandleData):
+        """
+        Обработка закрытой свечи из потока рыночных данных.
+
+        Индикаторы обновляются инкрементально за O(1), свеча попадает в
+        буфер для сохранения. Свечи не новее последней учтенной в
+        индикаторах (уже полученные с историей) пропускаются.
+
+        Аргументы:
+            figi: FIGI инструмента
+            candle: Закрытая свеча
+        """
+        state = self.indicator_engine.instruments.get(figi)
+        if state is not None and state.size and pd.Timestamp(candle.time).to_datetime64() <= state.times[-1]:
+            return
+
+        self.realtime_data.setdefault(figi, []).append(candle)
+        self.indicator_engine.update(figi, candle.time, candle.close)
+        self._stale_indicators.add(figi)
+        self._unsaved_indicators.add(figi)
+
+    def on_price(self, figi: str, price: float):
+        """
+        Обработка последней цены из потока рыночных данных.
+
+        Цена публикуется в общий кэш в следующем цикле сохранения.
+
+        Аргументы:
+            figi: FIGI инструмента
+            price: Последняя цена
+        """
+        self._latest_prices[figi] = price
+
+    async def _connect_hot_cache(self):
+        """Проверка сервера общего кэша; без него кэш работает в памяти процесса."""
+        try:
+            await self.hot_cache.ping()
+        except Exception as e:
+            logger.warning(f"Redis недоступен ({e}), общий кэш работает в памяти процесса")
+            self.hot_cache = HotCache(InMemoryRedis())
+
     async def _update_indicators(self):
-        """Обновление технических индикаторов для всех инструментов."""
-        for figi in self.api.instruments:
-            if figi in self.historical_data:
-                self._calculate_indicators(figi)
+        """Обновление технических индикаторов инструментов с новыми свечами."""
+        stale, self._stale_indicators = self._stale_indicators, set()
+        for figi in stale:
+            self.indicators[figi] = self._indicator_data(figi)
+
+        self.work_counters['indicators_processed'] += len(stale)
+        self.work_counters['indicators_skipped'] += max(0, len(self.api.instruments) - len(stale))
+
+    def _indicator_data(self, figi: str) -> Dict[str, IndicatorData]:
+        """
+        Представление состояния движка индикаторов в виде IndicatorData.
+
+        Аргументы:
+            figi: FIGI инструмента
+
+        Возвращает:
+            Словарь имен индикаторов в IndicatorData (массивы без копирования)
+        """
+        state = self.indicator_engine.instruments[figi]
+        return {
+            name: IndicatorData(name=label, values=state.values(name), time=state.times)
+            for name, label in INDICATOR_LABELS.items()
+        }
 
     async def _save_data(self):
         """Сохранение собранных данных в базу данных."""
+        if self.hot_cache is not None:
+            await self._publish_hot_data()
+
         # Сохранение свечей
         for figi, candles in self.realtime_data.items():
             if candles:
                 await self.db.save_candles(figi, candles)
                 self.realtime_data[figi] = []  # Очистка буфера
 
-        # Сохранение индикаторов
-        for figi, indicators in self.indicators.items():
-            await self.db.save_indicators(figi, indicators)
+        # Сохранение индикаторов только изменившихся инструментов
+        unsaved, self._unsaved_indicators = self._unsaved_indicators, set()
+        unsaved = [figi for figi in unsaved if figi in self.indicators]
+        failed = 0
+        for figi in unsaved:
+            try:
+                await self.db.save_indicators(figi, self.indicators[figi])
+            except Exception as e:
+                # Инструмент будет сохранен в следующем цикле
+                logger.error(f"Ошибка сохранения индикаторов {figi}: {e}")
+                self._unsaved_indicators.add(figi)
+                failed += 1
+
+        self.work_counters['saves_processed'] += len(unsaved) - failed
+        self.work_counters['saves_skipped'] += len(self.indicators) - len(unsaved)
+
+    async def _publish_hot_data(self):
+        """Публикация новых свечей, последних цен и индикаторов в общий кэш."""
+        bars = {
+            figi: candles_to_records(candles)
+            for figi, candles in self.realtime_data.items() if candles
+        }
+        prices, self._latest_prices = self._latest_prices, {}
+        if not bars and not prices:
+            return
+
+        indicators = {}
+        for figi in bars:
+            state = self.indicator_engine.instruments.get(figi)
+            if state is not None and state.size:
+                indicators[figi] = {name: float(state.values(name)[-1]) for name in INDICATOR_LABELS}
+
+        try:
+            if bars:
+                await self.hot_cache.publish(bars, indicators)
+            # Цены потока новее цен закрытия свечей, поэтому пишутся после них
+            await self.hot_cache.set_prices(prices)
+        except Exception as e:
+            # Кэш не обязателен для работы бота: данные все равно сохраняются в базу
+            logger.warning(f"Ошибка публикации данных в кэш: {e}")
 
     def _calculate_indicators(self, figi: str):
         """
@@ -161,52 +375,15 @@ class DataManager:
         if figi not in self.historical_data:
             return
 
+        # Полный прогон истории только при загрузке; дальше индикаторы
+        # обновляются по закрытым свечам в on_candle. Последняя свеча
+        # истории может еще формироваться: она придет закрытой из потока
         df = self.historical_data[figi]
-
-        # Расчет индикаторов (упрощенные примеры)
-        indicators = {}
-
-        # Простые скользящие средние
-        indicators["sma_20"] = IndicatorData(
-            name="SMA_20",
-            values=df["close"].rolling(window=20).mean().values,
-            time=df.index,
-        )
-
-        indicators["sma_50"] = IndicatorData(
-            name="SMA_50",
-            values=df["close"].rolling(window=50).mean().values,
-            time=df.index,
-        )
-
-        # Индекс относительной силы
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-
-        indicators["rsi_14"] = IndicatorData(
-            name="RSI_14",
-            values=rsi.values,
-            time=df.index,
-        )
-
-        # Полосы Боллинджера
-        sma = df["close"].rolling(window=20).mean()
-        std = df["close"].rolling(window=20).std()
-        indicators["bollinger_upper"] = IndicatorData(
-            name="Bollinger_Upper",
-            values=(sma + 2 * std).values,
-            time=df.index,
-        )
-        indicators["bollinger_lower"] = IndicatorData(
-            name="Bollinger_Lower",
-            values=(sma - 2 * std).values,
-            time=df.index,
-        )
-
-        self.indicators[figi] = indicators
+        until = pd.Timestamp.now(tz="UTC").floor(INDICATOR_PERIOD)
+        self.indicator_engine.warm_up(figi, df.index, df["close"].to_numpy(), until=until)
+        self.indicators[figi] = self._indicator_data(figi)
+        self._stale_indicators.discard(figi)
+        self._unsaved_indicators.add(figi)
 
     async def get_latest_indicators(self, figi: str) -> Dict[str, IndicatorData]:
         """
@@ -243,6 +420,31 @@ class DataManager:
 
         return indicator.values[-lookback:]
 
+    async def get_historical_candles(
+            self,
+            figi: str,
+            start_date: datetime,
+            end_date: datetime,
+            interval: str = '1h'
+    ) -> pd.DataFrame:
+        """
+        Получение исторических данных свечей.
+
+        Свечи берутся из локального кэша; из API загружаются только
+        отсутствующие в нем периоды.
+
+        Аргументы:
+            figi: FIGI инструмента
+            start_date: Начальная дата
+            end_date: Конечная дата
+            interval: Интервал (1m, 5m, 15m, 1h, 1d)
+
+        Возвращает:
+            DataFrame свечей, индексированный по времени
+        """
+        candles = await self.candle_cache.get(figi, HISTORY_INTERVALS[interval], start_date, end_date)
+        return candles.set_index("time")
+
     async def save_trade_result(self, trade):
         """Сохранение результатов сделки в базу данных."""
         await self.db.save_trade(trade)
@@ -270,6 +472,11 @@ class DatabaseManager:
         self._connection = None
         self._data_dir = Path("data")
         self._ensure_data_directory()
+        self.candles = CandleStore(str(self._data_dir / "candles"))
+        self.trades = TradeJournal(str(self._data_dir / "trades.jsonl"))
+        self.indicator_store = IndicatorStore(str(self._data_dir / "indicators"))
+        self._journal_task: Optional[asyncio.Task] = None
+        self._import_legacy_trades()
 
     def _ensure_data_directory(self):
         """Обеспечение существования директории данных."""
@@ -279,79 +486,119 @@ class DatabaseManager:
         """Подключение к базе данных."""
         # В этой упрощенной версии используются JSON-файлы
         # В реальной реализации здесь было бы подключение к PostgreSQL
+        # Журнал сделок сбрасывается на диск фоновой задачей, а не при записи
+        self._journal_task = asyncio.create_task(self.trades.run())
         logger.info("DatabaseManager подключен (используются JSON-файлы)")
 
     async def disconnect(self):
         """Отключение от базы данных."""
+        if self._journal_task is not None:
+            self._journal_task.cancel()
+            await asyncio.gather(self._journal_task, return_exceptions=True)
+            self._journal_task = None
+        self.trades.close()
         logger.info("DatabaseManager отключен")
 
     async def save_candles(self, figi: str, candles: List[CandleData]):
         """
         Сохранение данных свечей в базу данных.
 
+        Свечи дописываются в конец сегментов хранилища; уже сохраненные
+        свечи пропускаются.
+
         Аргументы:
             figi: FIGI инструмента
             candles: Список данных свечей
         """
-        file_path = self._data_dir / f"{figi}_candles.json"
-
-        # Загрузка существующих данных
-        existing = []
-        if file_path.exists():
-            with open(file_path, "r") as f:
-                existing = json.load(f)
+        self.candles.append(figi, candles_to_records(candles))
+
+    async def load_candles(
+            self,
+            figi: str,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Загрузка сохраненных свечей за период.
 
-        # Добавление новых свечей
-        existing.extend([c.dict() for c in candles])
+        Аргументы:
+            figi: FIGI инструмента
+            start_date: Начальная дата (None — с начала истории)
+            end_date: Конечная дата (None — до конца истории)
 
-        # Сохранение обратно в файл
-        with open(file_path, "w") as f:
-            json.dump(existing, f)
+        Возвращает:
+            DataFrame свечей с колонкой 'time' (UTC)
+        """
+        return self.candles.read_frame(
+            figi,
+            pd.Timestamp(start_date).value if start_date else None,
+            pd.Timestamp(end_date).value if end_date else None,
+        )
 
     async def save_indicators(self, figi: str, indicators: Dict[str, IndicatorData]):
         """
         Сохранение данных индикаторов в базу данных.
 
+        В колонки хранилища дописываются только точки, рассчитанные после
+        последнего сохранения.
+
         Аргументы:
             figi: FIGI инструмента
             indicators: Словарь данных индикаторов
         """
-        file_path = self._data_dir / f"{figi}_indicators.json"
+        if not indicators:
+            return
+
+        times = next(iter(indicators.values())).time
+        self.indicator_store.append(
+            figi, times, {name: indicator.values for name, indicator in indicators.items()}
+        )
 
-        # Конвертация индикаторов в сериализуемый формат
-        data = {
-            name: {
-                "values": indicator.values.tolist() if hasattr(indicator.values, "tolist") else indicator.values,
-                "time": [t.isoformat() for t in indicator.time],
-            }
-            for name, indicator in indicators.items()
+    async def load_indicators(self, figi: str) -> Dict[str, IndicatorData]:
+        """
+        Загрузка сохраненной истории индикаторов.
+
+        Значения открываются через memory map и читаются с диска по мере
+        обращения.
+
+        Аргументы:
+            figi: FIGI инструмента
+
+        Возвращает:
+            Словарь имен индикаторов в IndicatorData
+        """
+        columns = self.indicator_store.load(figi)
+        times = columns.pop("time")
+        return {
+            name: IndicatorData(name=INDICATOR_LABELS.get(name, name), values=values, time=times)
+            for name, values in columns.items()
         }
 
-        # Сохранение в файл
-        with open(file_path, "w") as f:
-            json.dump(data, f)
+    def _import_legacy_trades(self):
+        """Перенос сделок из прежнего файла trades.json в журнал."""
+        legacy_path = self._data_dir / "trades.json"
+        if not legacy_path.exists() or self.trades.events:
+            return
+
+        with open(legacy_path, "r") as f:
+            for trade in json.load(f):
+                if trade.get("order_id") is not None:
+                    self.trades.record(trade)
+        self.trades.sync()
+        legacy_path.rename(legacy_path.with_suffix(".json.imported"))
+        logger.info(f"Сделки из {legacy_path} перенесены в журнал {self.trades.path}")
 
     async def save_trade(self, trade):
         """
         Сохранение данных сделки в базу данных.
 
+        В журнал дописывается только событие с изменившимися полями
+        сделки (по order_id), без перезаписи истории.
+
         Аргументы:
             trade: Объект Trade для сохранения
         """
-        file_path = self._data_dir / "trades.json"
-
-        # Загрузка существующих сделок
-        trades = []
-        if file_path.exists():
-            with open(file_path, "r") as f:
-                trades = json.load(f)
-
-        # Добавление новой сделки
-        trades.append(trade.dict())
-
-        # Сохранение обратно в файл
-        with open(file_path, "w") as f:
-            json.dump(trades, f)
+        self.trades.record(trade.dict())
 
     async def get_trade_history(self, days: int = 30) -> List[dict]:
         """
@@ -363,16 +610,8 @@ class DatabaseManager:
         Возвращает:
             Список словарей сделок
         """
-        file_path = self._data_dir / "trades.json"
-
-        if not file_path.exists():
-            return []
-
-        with open(file_path, "r") as f:
-            trades = json.load(f)
-
         # Фильтрация по дате (упрощенно)
-        return trades[-days:]
+        return self.trades.history(limit=days)
 
     async def get_portfolio_history(self, days: int = 30) -> List[dict]:
         """
@@ -394,30 +633,3 @@ class DatabaseManager:
 
         # Фильтрация по дате (упрощенно)
         return portfolio[-days:]
-
-# Добавление в файл из скрипта №13
-        async def get_historical_candles(
-                self,
-                figi: str,
-                start_date: datetime,
-                end_date: datetime,
-                interval: str = '1h'
-        ) -> pd.DataFrame:
-            """
-            Получение исторических данных свечей.
-
-            Args:
-                figi: Идентификатор инструмента
-                start_date: Начальная дата
-                end_date: Конечная дата
-                interval: Интервал (1m, 5m, 1h, 1d)
-
-            Returns:
-                DataFrame с историческими данными
-            """
-            if figi not in self.historical_data:
-                return pd.DataFrame()
-
-            df = self.historical_data[figi]
-            mask = (df.index >= start_date) & (df.index <= end_date)
-            return df.loc[mask].copy()
\ No newline at end of file
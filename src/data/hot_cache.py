@@ -0,0 +1,314 @@
+"""
+Общий кэш актуальных рыночных данных в Redis.
+
+Процесс бота публикует последние свечи, цены и значения индикаторов,
+а CLI, воркеры бэктеста и другие процессы стратегий читают их без
+собственных запросов к API. Ключи:
+- `{prefix}:candles:{figi}` — список последних свечей, по одной записи
+  CANDLE_DTYPE (48 байт) на элемент
+- `{prefix}:prices` — хэш FIGI -> цена (float64)
+- `{prefix}:indicators:{figi}` — хэш индикатор -> значение (float64)
+- канал `{prefix}:bars` — уведомления о новых свечах: время (int64) и FIGI
+
+Все записи одного цикла отправляются одним конвейером (pipeline).
+Для тестов и запуска без Redis есть InMemoryRedis с тем же подмножеством
+команд.
+"""
+
+import asyncio
+import struct
+from collections import defaultdict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.data.candle_store import CANDLE_DTYPE
+
+# Количество последних свечей инструмента в кэше по умолчанию
+DEFAULT_DEPTH = 500
+
+_FLOAT = struct.Struct('<d')
+_TIME = struct.Struct('<q')
+
+
+def _pack_float(value: float) -> bytes:
+    return _FLOAT.pack(value)
+
+
+def _unpack_float(value: Optional[bytes]) -> Optional[float]:
+    return _FLOAT.unpack(value)[0] if value is not None else None
+
+
+class HotCache:
+    """
+    Кэш последних свечей, цен и индикаторов.
+
+    Attributes:
+        client: Асинхронный клиент Redis (redis.asyncio.Redis или InMemoryRedis)
+        prefix (str): Префикс ключей
+        depth (int): Количество хранимых свечей на инструмент
+    """
+
+    def __init__(self, client, prefix: str = 'forex', depth: int = DEFAULT_DEPTH):
+        self.client = client
+        self.prefix = prefix
+        self.depth = depth
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'HotCache':
+        """
+        Кэш поверх сервера Redis.
+
+        Args:
+            url: Адрес сервера (redis://host:port)
+
+        Returns:
+            HotCache
+        """
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url), **kwargs)
+
+    @property
+    def channel(self) -> str:
+        """Канал уведомлений о новых свечах."""
+        return f'{self.prefix}:bars'
+
+    async def publish(
+            self,
+            bars: Dict[str, np.ndarray],
+            indicators: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        """
+        Публикация новых закрытых свечей и последних значений индикаторов.
+
+        Свечи дописываются в списки инструментов (старые обрезаются до
+        `depth`), цена закрытия последней свечи становится ценой
+        инструмента, подписчики канала получают уведомление.
+
+        Args:
+            bars: Новые свечи (CANDLE_DTYPE) по FIGI
+            indicators: Значения индикаторов по FIGI
+        """
+        pipe = self.client.pipeline(transaction=False)
+        prices = {}
+        for figi, records in bars.items():
+            records = np.asarray(records, dtype=CANDLE_DTYPE)
+            if not len(records):
+                continue
+            key = self._key('candles', figi)
+            pipe.rpush(key, *[record.tobytes() for record in records])
+            pipe.ltrim(key, -self.depth, -1)
+            prices[figi] = _pack_float(float(records['close'][-1]))
+
+        if prices:
+            pipe.hset(self._key('prices'), mapping=prices)
+        for figi, values in (indicators or {}).items():
+            pipe.hset(self._key('indicators', figi), mapping={
+                name: _pack_float(value) for name, value in values.items()
+            })
+        for figi, records in bars.items():
+            if len(records):
+                pipe.publish(self.channel, _TIME.pack(int(records['time'][-1])) + figi.encode())
+        await pipe.execute()
+
+    async def ping(self) -> bool:
+        """Проверка доступности сервера (исключение, если он недоступен)."""
+        return await self.client.ping()
+
+    async def set_prices(self, prices: Dict[str, float]):
+        """
+        Обновление последних цен.
+
+        Args:
+            prices: Цены по FIGI
+        """
+        if prices:
+            await self.client.hset(self._key('prices'), mapping={
+                figi: _pack_float(price) for figi, price in prices.items()
+            })
+
+    async def latest_candles(self, figi: str, count: Optional[int] = None) -> np.ndarray:
+        """
+        Последние свечи инструмента.
+
+        Args:
+            figi: FIGI инструмента
+            count: Количество свечей (None — все в кэше)
+
+        Returns:
+            Массив CANDLE_DTYPE по возрастанию времени
+        """
+        start = -count if count else 0
+        items = await self.client.lrange(self._key('candles', figi), start, -1)
+        return np.frombuffer(b''.join(items), dtype=CANDLE_DTYPE)
+
+    async def last_prices(self, figis: List[str]) -> Dict[str, float]:
+        """
+        Последние цены инструментов.
+
+        Args:
+            figis: Список FIGI
+
+        Returns:
+            Цены по FIGI (инструменты без цены пропускаются)
+        """
+        if not figis:
+            return {}
+        values = await self.client.hmget(self._key('prices'), figis)
+        return {figi: _unpack_float(value) for figi, value in zip(figis, values) if value is not None}
+
+    async def indicators(self, figi: str) -> Dict[str, float]:
+        """
+        Последние значения индикаторов инструмента.
+
+        Args:
+            figi: FIGI инструмента
+
+        Returns:
+            Значения по имени индикатора
+        """
+        values = await self.client.hgetall(self._key('indicators', figi))
+        return {
+            (name.decode() if isinstance(name, bytes) else name): _unpack_float(value)
+            for name, value in values.items()
+        }
+
+    async def bars(self) -> AsyncIterator[Tuple[str, int]]:
+        """
+        Подписка на уведомления о новых свечах.
+
+        Yields:
+            Пары (FIGI, время свечи в наносекундах)
+        """
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                data = message['data']
+                if message['type'] != 'message' or len(data) <= _TIME.size:
+                    continue
+                yield data[_TIME.size:].decode(), _TIME.unpack(data[:_TIME.size])[0]
+        finally:
+            await pubsub.unsubscribe(self.channel)
+
+    def _key(self, *parts: str) -> str:
+        return ':'.join((self.prefix,) + parts)
+
+
+class InMemoryRedis:
+    """
+    Замена Redis в памяти процесса для тестов и запуска без сервера.
+
+    Поддерживает команды, которые использует HotCache: списки, хэши,
+    конвейер и публикацию/подписку.
+    """
+
+    def __init__(self):
+        self._lists: Dict[str, List[bytes]] = defaultdict(list)
+        self._hashes: Dict[str, Dict[bytes, bytes]] = defaultdict(dict)
+        self._subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+
+    def pipeline(self, transaction: bool = True) -> '_InMemoryPipeline':
+        return _InMemoryPipeline(self)
+
+    def pubsub(self) -> '_InMemoryPubSub':
+        return _InMemoryPubSub(self)
+
+    async def rpush(self, key: str, *values: bytes) -> int:
+        self._lists[key].extend(values)
+        return len(self._lists[key])
+
+    async def ltrim(self, key: str, start: int, end: int) -> bool:
+        items = self._lists[key]
+        self._lists[key] = items[self._slice(len(items), start, end)]
+        return True
+
+    async def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        items = self._lists.get(key, [])
+        return items[self._slice(len(items), start, end)]
+
+    async def hset(self, key: str, mapping: Dict) -> int:
+        fields = {self._encode(name): value for name, value in mapping.items()}
+        added = len(fields.keys() - self._hashes[key].keys())
+        self._hashes[key].update(fields)
+        return added
+
+    async def hmget(self, key: str, fields: List[str]) -> List[Optional[bytes]]:
+        values = self._hashes.get(key, {})
+        return [values.get(self._encode(name)) for name in fields]
+
+    async def hgetall(self, key: str) -> Dict[bytes, bytes]:
+        return dict(self._hashes.get(key, {}))
+
+    async def publish(self, channel: str, message: bytes) -> int:
+        queues = self._subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({'type': 'message', 'channel': channel.encode(), 'data': message})
+        return len(queues)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def aclose(self):
+        pass
+
+    @staticmethod
+    def _slice(length: int, start: int, end: int) -> slice:
+        """Индексы Redis (включительно, с отрицательными значениями) в срез Python."""
+        start = max(0, start + length if start < 0 else start)
+        end = end + length if end < 0 else min(end, length - 1)
+        if end < start:
+            return slice(0, 0)
+        return slice(start, end + 1)
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        return value.encode() if isinstance(value, str) else value
+
+
+class _InMemoryPipeline:
+    """Конвейер InMemoryRedis: команды выполняются по порядку в execute()."""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class _InMemoryPubSub:
+    """Подписка InMemoryRedis."""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._channels: List[str] = []
+
+    async def subscribe(self, *channels: str):
+        for channel in channels:
+            self._client._subscribers[channel].append(self._queue)
+            self._channels.append(channel)
+            self._queue.put_nowait({'type': 'subscribe', 'channel': channel.encode(), 'data': 1})
+
+    async def unsubscribe(self, *channels: str):
+        for channel in channels or list(self._channels):
+            if self._queue in self._client._subscribers.get(channel, []):
+                self._client._subscribers[channel].remove(self._queue)
+            if channel in self._channels:
+                self._channels.remove(channel)
+
+    async def listen(self):
+        while self._channels:
+            yield await self._queue.get()
@@ -0,0 +1,175 @@
+"""
+Колоночное хранилище значений индикаторов.
+
+Для каждого инструмента в каталоге `{root}/{figi}/` лежат двоичные
+колонки: `time.bin` (наносекунды UTC, int64) и по файлу `{name}.bin`
+(float64) на индикатор. Сохранение дописывает в конец колонок только
+точки новее последней сохраненной, а загрузка открывает колонки через
+memory map без чтения в память.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from loguru import logger
+
+TIME_COLUMN = 'time'
+
+
+class IndicatorStore:
+    """
+    Хранилище индикаторов по инструментам.
+
+    Колонки значений пишутся раньше колонки времени. Ошибка записи
+    откатывает уже дописанные колонки, а при первом обращении к
+    инструменту все колонки обрезаются до общей длины, поэтому прерванная
+    запись не оставляет рассогласованных строк.
+
+    Attributes:
+        root (Path): Каталог хранилища
+        fsync (bool): Сбрасывать данные на диск после каждой записи
+    """
+
+    def __init__(self, root: str = 'data/indicators', fsync: bool = False):
+        self.root = Path(root)
+        self.fsync = fsync
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._rows: Dict[str, int] = {}
+        self._last_time: Dict[str, Optional[int]] = {}
+
+    def append(self, figi: str, times: Iterable, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Добавление новых точек индикаторов.
+
+        Точки не позже последней сохраненной пропускаются, поэтому можно
+        передавать всю историю значений: записан будет только хвост.
+        Сохраненные ранее индикаторы, не переданные в `columns`, получают
+        NaN на новых строках, так что все колонки остаются одной длины.
+
+        Args:
+            figi: FIGI инструмента
+            times: Время точек по возрастанию
+            columns: Значения по имени индикатора (той же длины, что и times)
+
+        Returns:
+            Количество записанных точек
+        """
+        times = np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+        last_time = self.last_time(figi)
+        start = 0 if last_time is None else int(np.searchsorted(times, last_time, side='right'))
+        if start >= len(times):
+            return 0
+
+        directory = self.root / figi
+        directory.mkdir(parents=True, exist_ok=True)
+        rows = self._rows[figi]
+        new_rows = rows + len(times) - start
+        paths = [self._path(figi, name) for name in columns]
+        omitted = [path for path in sorted(directory.glob('*.bin'))
+                   if path.stem != TIME_COLUMN and path.stem not in columns]
+        try:
+            for path, values in zip(paths, columns.values()):
+                missing = rows - self._length(path)
+                if missing > 0:
+                    # Индикатор появился позже остальных: пропуски заполняются NaN
+                    self._write(path, np.full(missing, np.nan))
+                self._write(path, np.asarray(values[start:], dtype=np.float64))
+            for path in omitted:
+                # Индикатор не передан: новые строки заполняются NaN
+                self._write(path, np.full(new_rows - self._length(path), np.nan))
+            self._write(self._path(figi, TIME_COLUMN), times[start:])
+        except Exception:
+            # Откат частично записанных колонок, чтобы повторная запись в
+            # этом же процессе не сдвинула их относительно времени
+            for path in paths + omitted + [self._path(figi, TIME_COLUMN)]:
+                self._truncate(path, rows)
+            raise
+
+        self._rows[figi] = new_rows
+        self._last_time[figi] = int(times[-1])
+        return len(times) - start
+
+    def load(self, figi: str, names: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Загрузка колонок инструмента через memory map.
+
+        Args:
+            figi: FIGI инструмента
+            names: Имена индикаторов (None — все сохраненные)
+
+        Returns:
+            Словарь колонок: 'time' (datetime64[ns]) и значения индикаторов
+        """
+        rows = self._open(figi)
+        if names is None:
+            names = [path.stem for path in sorted((self.root / figi).glob('*.bin'))
+                     if path.stem != TIME_COLUMN]
+
+        columns = {TIME_COLUMN: self._map(self._path(figi, TIME_COLUMN), np.int64, rows).view('datetime64[ns]')}
+        for name in names:
+            path = self._path(figi, name)
+            length = min(rows, self._length(path))
+            values = self._map(path, np.float64, length)
+            if length < rows:
+                # Колонка без последних строк (запись до выравнивания длин)
+                values = np.concatenate((values, np.full(rows - length, np.nan)))
+            columns[name] = values
+        return columns
+
+    def last_time(self, figi: str) -> Optional[int]:
+        """Время последней сохраненной точки инструмента в наносекундах."""
+        self._open(figi)
+        return self._last_time[figi]
+
+    def _path(self, figi: str, name: str) -> Path:
+        return self.root / figi / f'{name}.bin'
+
+    def _open(self, figi: str) -> int:
+        """Проверка колонок инструмента при первом обращении; число строк."""
+        if figi in self._rows:
+            return self._rows[figi]
+
+        rows = 0
+        time_path = self._path(figi, TIME_COLUMN)
+        if time_path.exists():
+            rows = self._length(time_path)
+            for path in (self.root / figi).glob('*.bin'):
+                if self._truncate(path, rows):
+                    logger.warning(f"Отброшены незавершенные записи в {path}")
+
+        self._rows[figi] = rows
+        self._last_time[figi] = (
+            int(self._map(time_path, np.int64, rows)[-1]) if rows else None
+        )
+        return rows
+
+    def _write(self, path: Path, values: np.ndarray):
+        """Добавление значений в конец колонки."""
+        with open(path, 'ab') as f:
+            f.write(np.ascontiguousarray(values).tobytes())
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _truncate(path: Path, rows: int) -> bool:
+        """Обрезка колонки до `rows` значений; True, если она была длиннее."""
+        if not path.exists() or path.stat().st_size <= rows * 8:
+            return False
+        with open(path, 'r+b') as f:
+            f.truncate(rows * 8)
+        return True
+
+    @staticmethod
+    def _length(path: Path) -> int:
+        """Количество значений в колонке."""
+        return path.stat().st_size // 8 if path.exists() else 0
+
+    @staticmethod
+    def _map(path: Path, dtype, rows: int) -> np.ndarray:
+        """Первые `rows` значений колонки через memory map."""
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
@@ -0,0 +1,252 @@
+"""
+Инкрементальный расчет технических индикаторов.
+
+Состояние каждого индикатора (кольцевой буфер окна, скользящие суммы,
+среднее и дисперсия по Уэлфорду) хранится по инструменту, поэтому новая
+закрытая свеча обрабатывается за O(1), без пересчета всей истории.
+Значения совпадают с пакетными формулами pandas `rolling` в
+`DataManager._calculate_indicators` с точностью до погрешности float.
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Индикаторы движка и их окна
+SMA_FAST = 20
+SMA_SLOW = 50
+RSI_PERIOD = 14
+BOLLINGER_WINDOW = 20
+BOLLINGER_WIDTH = 2
+
+# Ключи индикаторов и их отображаемые имена (как в IndicatorData.name)
+INDICATOR_LABELS = {
+    'sma_20': 'SMA_20',
+    'sma_50': 'SMA_50',
+    'rsi_14': 'RSI_14',
+    'bollinger_upper': 'Bollinger_Upper',
+    'bollinger_lower': 'Bollinger_Lower',
+}
+INDICATOR_NAMES = list(INDICATOR_LABELS)
+
+
+class RollingStats:
+    """
+    Скользящие среднее и несмещенное стандартное отклонение окна.
+
+    При сдвиге окна среднее и сумма квадратов отклонений обновляются по
+    Уэлфорду (добавление нового значения и удаление выпавшего).
+
+    Attributes:
+        window (int): Длина окна
+        count (int): Количество значений в окне
+        mean (float): Среднее окна
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._buffer = np.zeros(window)
+        self._head = 0
+
+    def update(self, value: float):
+        """
+        Добавление значения в окно.
+
+        Args:
+            value: Новое значение
+        """
+        if self.count < self.window:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        else:
+            old = self._buffer[self._head]
+            old_mean = self.mean
+            self.mean += (value - old) / self.window
+            self._m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        self._buffer[self._head] = value
+        self._head = (self._head + 1) % self.window
+
+    @property
+    def ready(self) -> bool:
+        """Окно заполнено."""
+        return self.count == self.window
+
+    @property
+    def std(self) -> float:
+        """Стандартное отклонение окна (ddof=1)."""
+        if self.count < 2:
+            return np.nan
+        return float(np.sqrt(max(self._m2, 0.0) / (self.count - 1)))
+
+
+class RollingRSI:
+    """
+    Индекс относительной силы по скользящим средним приростов и падений.
+
+    Как и пакетный расчет, использует простые скользящие средние за
+    `period` баров (а не сглаживание Уайлдера).
+
+    Attributes:
+        period (int): Период RSI
+    """
+
+    def __init__(self, period: int = RSI_PERIOD):
+        self.period = period
+        self._gains = RollingStats(period)
+        self._losses = RollingStats(period)
+        self._previous = np.nan
+
+    def update(self, close: float) -> float:
+        """
+        Обработка цены закрытия новой свечи.
+
+        Args:
+            close: Цена закрытия
+
+        Returns:
+            Значение RSI или NaN, пока окно не заполнено
+        """
+        # Как в pandas: разность для первой свечи не определена и
+        # учитывается в окне как нулевой прирост и нулевое падение
+        previous, self._previous = self._previous, close
+        delta = 0.0 if np.isnan(previous) else close - previous
+        self._gains.update(max(delta, 0.0))
+        self._losses.update(max(-delta, 0.0))
+        if not self._gains.ready:
+            return np.nan
+
+        gain, loss = self._gains.mean, self._losses.mean
+        if loss == 0:
+            return 100.0 if gain > 0 else np.nan
+        return 100 - 100 / (1 + gain / loss)
+
+
+class InstrumentIndicators:
+    """
+    Состояние индикаторов одного инструмента и история их значений.
+
+    Значения пишутся в заранее выделенные массивы, которые удваиваются
+    при заполнении.
+
+    Attributes:
+        size (int): Количество обработанных свечей
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self._fast = RollingStats(SMA_FAST)
+        self._slow = RollingStats(SMA_SLOW)
+        self._bollinger = self._fast if BOLLINGER_WINDOW == SMA_FAST else RollingStats(BOLLINGER_WINDOW)
+        self._rsi = RollingRSI(RSI_PERIOD)
+        self._times = np.empty(max(1, capacity), dtype='datetime64[ns]')
+        self._values = np.empty((len(INDICATOR_NAMES), max(1, capacity)))
+
+    def update(self, time, close: float) -> Dict[str, float]:
+        """
+        Обработка закрытой свечи.
+
+        Args:
+            time: Время свечи
+            close: Цена закрытия
+
+        Returns:
+            Последние значения индикаторов
+        """
+        self._fast.update(close)
+        if self._bollinger is not self._fast:
+            self._bollinger.update(close)
+        self._slow.update(close)
+        rsi = self._rsi.update(close)
+
+        sma_fast = self._fast.mean if self._fast.ready else np.nan
+        sma_slow = self._slow.mean if self._slow.ready else np.nan
+        band = BOLLINGER_WIDTH * self._bollinger.std if self._bollinger.ready else np.nan
+        middle = self._bollinger.mean
+
+        if self.size == self._values.shape[1]:
+            self._grow()
+        column = self._values[:, self.size]
+        column[:] = (sma_fast, sma_slow, rsi, middle + band, middle - band)
+        self._times[self.size] = pd.Timestamp(time).to_datetime64()
+        self.size += 1
+
+        return dict(zip(INDICATOR_NAMES, column.tolist()))
+
+    def values(self, name: str) -> np.ndarray:
+        """История значений индикатора (срез без копирования)."""
+        return self._values[INDICATOR_NAMES.index(name), :self.size]
+
+    @property
+    def times(self) -> np.ndarray:
+        """Время обработанных свечей."""
+        return self._times[:self.size]
+
+    def _grow(self):
+        """Увеличение емкости массивов вдвое."""
+        capacity = 2 * self._values.shape[1]
+        values = np.empty((len(INDICATOR_NAMES), capacity))
+        values[:, :self.size] = self._values[:, :self.size]
+        times = np.empty(capacity, dtype=self._times.dtype)
+        times[:self.size] = self._times[:self.size]
+        self._values, self._times = values, times
+
+
+class IndicatorEngine:
+    """
+    Инкрементальные индикаторы по всем инструментам.
+
+    Attributes:
+        instruments (Dict[str, InstrumentIndicators]): Состояние по FIGI
+    """
+
+    def __init__(self):
+        self.instruments: Dict[str, InstrumentIndicators] = {}
+
+    def warm_up(self, figi: str, times: Iterable, closes: Iterable[float], until=None):
+        """
+        Сброс состояния инструмента и прогон по истории.
+
+        Args:
+            figi: FIGI инструмента
+            times: Время свечей (по возрастанию)
+            closes: Цены закрытия
+            until: Свечи с временем не раньше этого (еще не закрытые) не
+                учитываются; None — учитываются все
+        """
+        closes = np.asarray(closes, dtype=float)
+        if until is not None:
+            times = pd.DatetimeIndex(times)
+            until = pd.Timestamp(until)
+            if until.tzinfo is None and times.tz is not None:
+                until = until.tz_localize('UTC')
+            elif until.tzinfo is not None and times.tz is None:
+                until = until.tz_convert('UTC').tz_localize(None)
+            closed = times < until
+            times, closes = times[closed], closes[closed]
+        state = InstrumentIndicators(capacity=max(1024, 2 * len(closes)))
+        for time, close in zip(times, closes.tolist()):
+            state.update(time, close)
+        self.instruments[figi] = state
+
+    def update(self, figi: str, time, close: float) -> Dict[str, float]:
+        """
+        Обработка новой закрытой свечи инструмента за O(1).
+
+        Args:
+            figi: FIGI инструмента
+            time: Время свечи
+            close: Цена закрытия
+
+        Returns:
+            Последние значения индикаторов
+        """
+        if figi not in self.instruments:
+            self.instruments[figi] = InstrumentIndicators()
+        return self.instruments[figi].update(time, close)
@@ -0,0 +1,355 @@
+"""
+Хранилище данных в PostgreSQL.
+
+Реализует интерфейс DatabaseManager поверх пула соединений asyncpg:
+- свечи — в таблице, секционированной по месяцам времени свечи,
+  с первичным ключом (figi, time) в каждой секции
+- свечи и индикаторы пишутся пакетно: COPY во временную таблицу и
+  INSERT ... ON CONFLICT в основную, поэтому повторная запись тех же
+  свечей не создает дубликатов, а обновленная свеча заменяет прежнюю
+- сделки — по order_id с объединением изменившихся полей (jsonb)
+"""
+
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import asyncpg
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.data.candle_store import CANDLE_DTYPE, candles_to_records
+from src.data.indicators import INDICATOR_LABELS
+from src.data.schemas import CandleData, IndicatorData
+
+CANDLE_COLUMNS = ('figi', 'time', 'open', 'high', 'low', 'close', 'volume')
+CANDLE_KEY = ('figi', 'time')
+INDICATOR_COLUMNS = ('figi', 'name', 'time', 'value')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    figi text NOT NULL,
+    time timestamptz NOT NULL,
+    open double precision NOT NULL,
+    high double precision NOT NULL,
+    low double precision NOT NULL,
+    close double precision NOT NULL,
+    volume bigint NOT NULL,
+    PRIMARY KEY (figi, time)
+) PARTITION BY RANGE (time);
+
+CREATE TABLE IF NOT EXISTS indicators (
+    figi text NOT NULL,
+    name text NOT NULL,
+    time timestamptz NOT NULL,
+    value double precision,
+    PRIMARY KEY (figi, name, time)
+);
+
+CREATE TABLE IF NOT EXISTS trades (
+    order_id text PRIMARY KEY,
+    figi text,
+    time timestamptz NOT NULL DEFAULT now(),
+    data jsonb NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_time_idx ON trades (time);
+
+CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+    time timestamptz PRIMARY KEY,
+    data jsonb NOT NULL
+);
+"""
+
+
+def partition_bounds(month: np.datetime64) -> tuple:
+    """
+    Имя секции свечей и границы ее диапазона.
+
+    Args:
+        month: Месяц (datetime64[M])
+
+    Returns:
+        Кортеж (имя таблицы, начало, конец)
+    """
+    start = pd.Timestamp(month).tz_localize('UTC')
+    end = pd.Timestamp(month + 1).tz_localize('UTC')
+    return f"candles_{start:%Y_%m}", start.to_pydatetime(), end.to_pydatetime()
+
+
+class PostgresDatabaseManager:
+    """
+    DatabaseManager с хранением в PostgreSQL.
+
+    Attributes:
+        config: Конфигурация приложения
+        dsn (str): Строка подключения к PostgreSQL
+        pool (asyncpg.Pool): Пул соединений (после connect)
+    """
+
+    def __init__(
+            self,
+            config,
+            dsn: Optional[str] = None,
+            min_size: int = 1,
+            max_size: int = 10,
+    ):
+        """
+        Args:
+            config: Конфигурация приложения
+            dsn: Строка подключения (по умолчанию config.database_url)
+            min_size: Минимальный размер пула
+            max_size: Максимальный размер пула
+        """
+        self.config = config
+        self.dsn = dsn or getattr(config, 'database_url', None)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool: Optional[asyncpg.Pool] = None
+        self._partitions: Set[str] = set()
+        self._indicator_last_time: Dict[str, Optional[datetime]] = {}
+
+    async def connect(self):
+        """Создание пула соединений и схемы."""
+        self.pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
+        async with self.pool.acquire() as connection:
+            await connection.execute(SCHEMA)
+        logger.info("DatabaseManager подключен к PostgreSQL")
+
+    async def disconnect(self):
+        """Закрытие пула соединений."""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        logger.info("DatabaseManager отключен")
+
+    async def save_candles(self, figi: str, candles: List[CandleData]):
+        """
+        Сохранение свечей одним пакетом.
+
+        Args:
+            figi: FIGI инструмента
+            candles: Список данных свечей
+        """
+        records = candles_to_records(candles)
+        if not len(records):
+            return
+
+        times = pd.to_datetime(records['time'], utc=True)
+        rows = list(zip(
+            [figi] * len(records),
+            times.to_pydatetime(),
+            records['open'].tolist(),
+            records['high'].tolist(),
+            records['low'].tolist(),
+            records['close'].tolist(),
+            records['volume'].tolist(),
+        ))
+
+        async with self.pool.acquire() as connection:
+            await self._ensure_partitions(connection, records['time'])
+            await self._bulk_insert(connection, 'candles', CANDLE_COLUMNS, rows, key=CANDLE_KEY)
+
+    async def load_candles(
+            self,
+            figi: str,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        Загрузка свечей за период.
+
+        Args:
+            figi: FIGI инструмента
+            start_date: Начальная дата (None — с начала истории)
+            end_date: Конечная дата (None — до конца истории)
+
+        Returns:
+            DataFrame свечей с колонкой 'time' (UTC)
+        """
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(
+                "SELECT time, open, high, low, close, volume FROM candles "
+                "WHERE figi = $1 AND ($2::timestamptz IS NULL OR time >= $2) "
+                "AND ($3::timestamptz IS NULL OR time <= $3) ORDER BY time",
+                figi, start_date, end_date,
+            )
+        columns = [name for name in CANDLE_DTYPE.names]
+        frame = pd.DataFrame([tuple(row) for row in rows], columns=columns)
+        frame['time'] = pd.to_datetime(frame['time'], utc=True)
+        return frame
+
+    async def save_indicators(self, figi: str, indicators: Dict[str, IndicatorData]):
+        """
+        Сохранение новых точек индикаторов.
+
+        Пишутся только точки после последней сохраненной для инструмента.
+
+        Args:
+            figi: FIGI инструмента
+            indicators: Словарь данных индикаторов
+        """
+        if not indicators:
+            return
+
+        async with self.pool.acquire() as connection:
+            if figi not in self._indicator_last_time:
+                self._indicator_last_time[figi] = await connection.fetchval(
+                    "SELECT max(time) FROM indicators WHERE figi = $1", figi
+                )
+            last_time = self._indicator_last_time[figi]
+
+            times = np.asarray(next(iter(indicators.values())).time, dtype='datetime64[ns]')
+            start = 0
+            if last_time is not None:
+                start = int(np.searchsorted(times, np.datetime64(pd.Timestamp(last_time).tz_convert(None)), 'right'))
+            if start >= len(times):
+                return
+
+            new_times = pd.to_datetime(times[start:], utc=True).to_pydatetime()
+            rows = [
+                (figi, name, time, value)
+                for name, indicator in indicators.items()
+                for time, value in zip(new_times, np.asarray(indicator.values, dtype=float)[start:].tolist())
+            ]
+            # Пишутся только точки новее сохраненных, повтор точки — те же значения
+            await self._bulk_insert(connection, 'indicators', INDICATOR_COLUMNS, rows)
+            self._indicator_last_time[figi] = new_times[-1]
+
+    async def load_indicators(self, figi: str) -> Dict[str, IndicatorData]:
+        """
+        Загрузка истории индикаторов.
+
+        Args:
+            figi: FIGI инструмента
+
+        Returns:
+            Словарь имен индикаторов в IndicatorData
+        """
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(
+                "SELECT name, time, value FROM indicators WHERE figi = $1 ORDER BY name, time", figi
+            )
+        frame = pd.DataFrame([tuple(row) for row in rows], columns=['name', 'time', 'value'])
+        return {
+            name: IndicatorData(
+                name=INDICATOR_LABELS.get(name, name),
+                values=group['value'].to_numpy(),
+                time=pd.to_datetime(group['time'], utc=True).to_numpy(),
+            )
+            for name, group in frame.groupby('name', sort=False)
+        }
+
+    async def save_trade(self, trade):
+        """
+        Сохранение сделки: новые поля объединяются с сохраненными по order_id.
+
+        Args:
+            trade: Объект Trade для сохранения
+        """
+        data = json.loads(json.dumps(trade.dict(), default=str))
+        async with self.pool.acquire() as connection:
+            await connection.execute(
+                "INSERT INTO trades (order_id, figi, data) VALUES ($1, $2, $3::jsonb) "
+                "ON CONFLICT (order_id) DO UPDATE SET data = trades.data || EXCLUDED.data",
+                str(data['order_id']), data.get('figi'), json.dumps(data),
+            )
+
+    async def get_trade_history(self, days: int = 30) -> List[dict]:
+        """
+        Получение истории сделок.
+
+        Args:
+            days: Количество последних сделок
+
+        Returns:
+            Список словарей сделок в порядке открытия
+        """
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(
+                "SELECT data FROM trades ORDER BY time DESC, order_id DESC LIMIT $1", days
+            )
+        return [json.loads(row['data']) for row in reversed(rows)]
+
+    async def save_portfolio_snapshot(self, snapshot: Dict):
+        """
+        Сохранение снимка портфеля.
+
+        Args:
+            snapshot: Данные снимка
+        """
+        async with self.pool.acquire() as connection:
+            await connection.execute(
+                "INSERT INTO portfolio_snapshots (time, data) VALUES (now(), $1::jsonb) "
+                "ON CONFLICT (time) DO UPDATE SET data = EXCLUDED.data",
+                json.dumps(snapshot, default=str),
+            )
+
+    async def get_portfolio_history(self, days: int = 30) -> List[dict]:
+        """
+        Получение истории портфеля.
+
+        Args:
+            days: Количество последних снимков
+
+        Returns:
+            Список снимков портфеля
+        """
+        async with self.pool.acquire() as connection:
+            rows = await connection.fetch(
+                "SELECT data FROM portfolio_snapshots ORDER BY time DESC LIMIT $1", days
+            )
+        return [json.loads(row['data']) for row in reversed(rows)]
+
+    async def _ensure_partitions(self, connection: asyncpg.Connection, times: np.ndarray):
+        """Создание недостающих месячных секций свечей."""
+        months = np.unique(times.astype('datetime64[ns]').astype('datetime64[M]'))
+        for month in months:
+            name, start, end = partition_bounds(month)
+            if name in self._partitions:
+                continue
+            await connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF candles "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            self._partitions.add(name)
+
+    @staticmethod
+    async def _bulk_insert(
+            connection: asyncpg.Connection,
+            table: str,
+            columns: tuple,
+            rows: List[tuple],
+            key: Optional[tuple] = None,
+    ):
+        """
+        Пакетная вставка: COPY во временную таблицу и перенос без дубликатов.
+
+        Args:
+            connection: Соединение
+            table: Основная таблица
+            columns: Колонки строк
+            rows: Строки
+            key: Колонки ключа; строки с существующим ключом обновляют
+                остальные колонки (None — существующие строки не меняются)
+        """
+        staging = f"{table}_staging"
+        column_list = ', '.join(columns)
+        conflict = "ON CONFLICT DO NOTHING"
+        if key is not None:
+            # В одной команде строка обновляется не больше одного раза:
+            # из повторов ключа в пакете остается последний
+            positions = [columns.index(name) for name in key]
+            rows = list({tuple(row[i] for i in positions): row for row in rows}.values())
+            updates = ', '.join(f"{name} = EXCLUDED.{name}" for name in columns if name not in key)
+            conflict = f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}"
+
+        async with connection.transaction():
+            await connection.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            await connection.copy_records_to_table(staging, records=rows, columns=columns)
+            await connection.execute(
+                f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} {conflict}"
+            )
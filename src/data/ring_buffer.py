@@ -0,0 +1,122 @@
+"""
+Кольцевой буфер последних свечей инструмента.
+
+Буфер фиксированной емкости хранит свечи в заранее выделенном
+структурированном массиве CANDLE_DTYPE. Каждая запись пишется дважды —
+в позицию i и i + capacity, поэтому последние N свечей всегда лежат в
+памяти подряд и отдаются срезом без копирования, а добавление свечи не
+выделяет память.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from src.data.candle_store import CANDLE_DTYPE
+
+# Емкость буфера по умолчанию (свечей на инструмент)
+DEFAULT_DEPTH = 100
+
+
+class CandleRingBuffer:
+    """
+    Буфер последних свечей.
+
+    Память буфера — 2 * capacity * 48 байт и не меняется после создания.
+
+    Attributes:
+        capacity (int): Максимальное количество хранимых свечей
+    """
+
+    def __init__(self, capacity: int = DEFAULT_DEPTH):
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=CANDLE_DTYPE)
+        self._position = 0  # индекс следующей записи в [0, capacity)
+        self._size = 0
+        self._last_time: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, time: int, open: float, high: float, low: float, close: float, volume: int) -> bool:
+        """
+        Добавление свечи за O(1).
+
+        Свеча с тем же временем, что и последняя, заменяет ее (обновление
+        формирующейся свечи из потока). Свеча старше последней (запоздавшее
+        обновление) пропускается, чтобы буфер оставался упорядоченным.
+
+        Args:
+            time: Время открытия свечи в наносекундах UTC
+            open: Цена открытия
+            high: Максимум
+            low: Минимум
+            close: Цена закрытия
+            volume: Объем
+
+        Returns:
+            False, если свеча пропущена
+        """
+        if self._last_time is not None and time < self._last_time:
+            return False
+        if self._last_time == time:
+            index = (self._position - 1) % self.capacity
+        else:
+            index = self._position
+            self._position = (self._position + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+        record = (time, open, high, low, close, volume)
+        self._data[index] = record
+        self._data[index + self.capacity] = record
+        self._last_time = time
+        return True
+
+    def extend(self, candles: np.ndarray):
+        """
+        Добавление пакета свечей (например, загруженной истории).
+
+        Свечи не новее последней в буфере пропускаются.
+
+        Args:
+            candles: Свечи с типом CANDLE_DTYPE по возрастанию времени
+        """
+        candles = np.asarray(candles, dtype=CANDLE_DTYPE)
+        if self._last_time is not None:
+            candles = candles[candles['time'] > self._last_time]
+        candles = candles[-self.capacity:]
+        count = len(candles)
+        if not count:
+            return
+
+        indices = (self._position + np.arange(count)) % self.capacity
+        self._data[indices] = candles
+        self._data[indices + self.capacity] = candles
+        self._position = (self._position + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self._last_time = int(candles['time'][-1])
+
+    def last(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Последние свечи по возрастанию времени.
+
+        Результат — срез внутреннего массива без копирования: обновление
+        формирующейся свечи видно в нем сразу, а остальные записи не
+        меняются, пока не добавлено `capacity - n` новых свечей.
+
+        Args:
+            n: Количество свечей (None — все в буфере)
+
+        Returns:
+            Массив CANDLE_DTYPE; колонки доступны как view['close'] и т.п.
+        """
+        n = self._size if n is None else min(n, self._size)
+        end = self._position + self.capacity
+        return self._data[end - n:end]
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Время последней свечи или None для пустого буфера."""
+        return self._last_time
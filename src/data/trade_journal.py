@@ -0,0 +1,234 @@
+"""
+Журнал сделок с упреждающей записью.
+
+Каждое изменение сделки дописывается в конец файла JSON Lines одним
+событием, ключ события — `order_id`:
+- `open` — первая запись сделки со всеми полями
+- `update` — изменившиеся поля
+- `close` — изменившиеся поля при переходе в статус "closed"
+
+Стоимость записи не зависит от объема истории: запись только дописывает
+строку в файл. Сброс на диск (fsync) и сжатие журнала до одного события
+`open` на сделку выполняет периодическая задача `run` в пуле потоков,
+вне пути исполнения ордеров.
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# Интервал между сбросами журнала на диск, секунды
+SYNC_INTERVAL = 1.0
+
+# Журнал сжимается, когда событий больше, чем сделок, в COMPACT_RATIO раз
+COMPACT_RATIO = 4
+# Минимальное количество событий для сжатия
+COMPACT_MIN_EVENTS = 1024
+
+
+def _normalize(trade: Dict) -> Dict:
+    """Приведение полей сделки к значениям JSON (даты и перечисления — строки)."""
+    return json.loads(json.dumps(trade, default=str))
+
+
+class TradeJournal:
+    """
+    Журнал сделок в файле JSON Lines.
+
+    Текущее состояние сделок хранится в памяти и восстанавливается при
+    открытии журнала проигрыванием событий. Незавершенная последняя строка
+    после сбоя отбрасывается.
+
+    Attributes:
+        path (Path): Путь к файлу журнала
+        sync_interval (float): Интервал между сбросами на диск в `run`, секунды
+        events (int): Количество событий в файле
+        pending (int): Количество событий, еще не сброшенных на диск
+    """
+
+    def __init__(self, path: str = 'data/trades.jsonl', sync_interval: float = SYNC_INTERVAL):
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.events = 0
+        self.pending = 0
+        self._trades: Dict[str, Dict] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record(self, trade: Dict) -> Optional[str]:
+        """
+        Запись нового состояния сделки.
+
+        Args:
+            trade: Поля сделки (обязателен `order_id`)
+
+        Returns:
+            Тип записанного события или None, если сделка не изменилась
+        """
+        trade = _normalize(trade)
+        order_id = trade.get('order_id')
+        if order_id is None:
+            raise ValueError("Trade must have an order_id to be journaled")
+        order_id = str(order_id)
+
+        current = self._trades.get(order_id)
+        if current is None:
+            event, changes = 'open', trade
+            self._trades[order_id] = dict(trade)
+        else:
+            changes = {key: value for key, value in trade.items() if current.get(key) != value}
+            if not changes:
+                return None
+            event = 'close' if changes.get('status') == 'closed' else 'update'
+            current.update(changes)
+
+        self._write({'event': event, 'order_id': order_id, 'fields': changes})
+        return event
+
+    def history(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Текущее состояние сделок в порядке открытия.
+
+        Args:
+            limit: Количество последних сделок (None — все)
+
+        Returns:
+            Список словарей сделок
+        """
+        trades = [dict(trade) for trade in self._trades.values()]
+        return trades[-limit:] if limit else trades
+
+    def get(self, order_id: str) -> Optional[Dict]:
+        """Текущее состояние сделки по `order_id`."""
+        trade = self._trades.get(str(order_id))
+        return dict(trade) if trade is not None else None
+
+    def sync(self):
+        """Сброс записанных событий на диск."""
+        pending, self.pending = self.pending, 0
+        try:
+            os.fsync(self._file.fileno())
+        except OSError:
+            self.pending += pending
+            raise
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Событий в файле заметно больше, чем сделок."""
+        return self.events >= COMPACT_MIN_EVENTS and self.events > COMPACT_RATIO * len(self._trades)
+
+    def compact(self):
+        """
+        Сжатие журнала: по одному событию `open` с текущим состоянием на сделку.
+
+        Новый файл пишется рядом и атомарно заменяет старый.
+        """
+        self._replace(self._write_snapshot(self._snapshot()))
+
+    async def maintain(self):
+        """
+        Сброс на диск и при необходимости сжатие журнала.
+
+        Запись на диск выполняется в пуле потоков. Счетчик `pending`
+        меняется только в потоке цикла событий: он обнуляется до передачи
+        fsync в пул, поэтому события, записанные во время сброса, остаются
+        в `pending`. Если за время записи сжатого файла в журнал добавились
+        события, сжатие откладывается до следующего вызова.
+        """
+        loop = asyncio.get_running_loop()
+        if self.pending:
+            pending, self.pending = self.pending, 0
+            try:
+                await loop.run_in_executor(None, os.fsync, self._file.fileno())
+            except OSError:
+                self.pending += pending
+                raise
+
+        if self.needs_compaction:
+            events = self.events
+            temporary = await loop.run_in_executor(None, self._write_snapshot, self._snapshot())
+            if self.events == events and not self._file.closed:
+                self._replace(temporary)
+            else:
+                temporary.unlink(missing_ok=True)
+
+    async def run(self):
+        """Периодическое обслуживание журнала (`maintain`) до отмены задачи."""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.maintain()
+            except OSError as e:
+                logger.error(f"Ошибка сброса журнала сделок {self.path}: {e}")
+
+    def close(self):
+        """Сброс на диск и закрытие файла."""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _write(self, event: Dict):
+        """Добавление события в конец файла (без сброса на диск)."""
+        self._file.write(json.dumps(event) + '\n')
+        self._file.flush()
+        self.events += 1
+        self.pending += 1
+
+    def _snapshot(self) -> List[Tuple[str, Dict]]:
+        """Копия текущего состояния сделок для сжатия."""
+        return [(order_id, dict(trade)) for order_id, trade in self._trades.items()]
+
+    def _write_snapshot(self, snapshot: List[Tuple[str, Dict]]) -> Path:
+        """Запись сжатого журнала во временный файл рядом с журналом."""
+        temporary = self.path.with_name(self.path.name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            for order_id, trade in snapshot:
+                f.write(json.dumps({'event': 'open', 'order_id': order_id, 'fields': trade}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return temporary
+
+    def _replace(self, temporary: Path):
+        """Атомарная замена журнала сжатым файлом."""
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.events = len(self._trades)
+        self.pending = 0
+
+    def _replay(self):
+        """Восстановление состояния сделок из файла журнала."""
+        if not self.path.exists():
+            return
+
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("incomplete line")
+                    event = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Отброшен поврежденный хвост журнала сделок {self.path}")
+                    break
+                valid_size += len(line)
+                self._apply(event)
+
+        if valid_size < self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def _apply(self, event: Dict):
+        """Применение события к состоянию сделок."""
+        order_id = event['order_id']
+        if event['event'] == 'open' or order_id not in self._trades:
+            self._trades[order_id] = dict(event['fields'])
+        else:
+            self._trades[order_id].update(event['fields'])
+        self.events += 1
@@ -36,4 +36,45 @@ def set_parameters(self, **params):
     """
     for key, value in params.items():
         if hasattr(self, key):
-            setattr(self, key, value)
\ No newline at end of file
+            setattr(self, key, value)
+
+def generate_signals_batch(self, figi: str, bars: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    """
+    Пакетная генерация сигналов по всей истории инструмента.
+
+    Стратегии с простыми правилами могут переопределить метод и рассчитать
+    сигналы для всех баров за один проход NumPy. Бэктестер использует этот
+    путь вместо вызова generate_signals на каждом баре. Значение для бара i
+    должно зависеть только от баров 0..i.
+
+    Args:
+        figi: Идентификатор инструмента
+        bars: Массивы колонок свечей ('time' в наносекундах, 'open', 'high',
+            'low', 'close', 'volume')
+
+    Returns:
+        Массив размеров сделок по барам (>0 — покупка, <0 — продажа,
+        0 — нет сигнала) или None, если пакетный режим не поддерживается
+    """
+    return None
+
+
+def generate_signals_grid(self, figi: str, bars: Dict[str, np.ndarray], grid: List[Dict]) -> Optional[np.ndarray]:
+    """
+    Пакетная генерация сигналов сразу для всех точек сетки параметров.
+
+    Векторный перебор вызывает метод до `generate_signals_batch`:
+    стратегия может посчитать индикаторы один раз на каждое значение
+    параметров окна и сравнить их со всеми порогами сразу. Строка i должна
+    совпадать с `generate_signals_batch` при параметрах grid[i].
+
+    Args:
+        figi: Идентификатор инструмента
+        bars: Массивы колонок свечей (как в generate_signals_batch)
+        grid: Точки сетки параметров
+
+    Returns:
+        Матрица размеров сделок формы (точка × бар) или None, если
+        стратегия считает сигналы по одной точке
+    """
+    return None
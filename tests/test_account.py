@@ -0,0 +1,38 @@
+"""
+Тесты счета симуляции.
+"""
+
+import pytest
+
+from src.core.account import SimulatedAccount
+
+
+def test_realized_profit_on_partial_close_and_reversal():
+    account = SimulatedAccount(1000)
+
+    assert account.update_position('EURUSD', 10, 1.0) == 0
+    assert account.update_position('EURUSD', 10, 1.2) == 0
+    assert account.positions['EURUSD']['average_price'] == pytest.approx(1.1)
+
+    # Сокращение не меняет среднюю цену входа
+    assert account.update_position('EURUSD', -5, 1.3) == pytest.approx(5 * 0.2)
+    assert account.positions['EURUSD']['average_price'] == pytest.approx(1.1)
+
+    # Разворот закрывает остаток, новая позиция открыта по цене сделки
+    assert account.update_position('EURUSD', -20, 1.0) == pytest.approx(15 * -0.1)
+    assert account.positions['EURUSD']['quantity'] == -5
+    assert account.positions['EURUSD']['average_price'] == 1.0
+
+    assert account.update_position('EURUSD', 5, 0.9) == pytest.approx(5 * 0.1)
+    assert 'EURUSD' not in account.positions
+    assert account.total_equity() == account.get_balance('USD') == 1000
+
+
+def test_equity_marks_open_positions_to_market():
+    account = SimulatedAccount(1000)
+    account.update_position('EURUSD', 10, 1.1)
+    account.update_position('GBPUSD', -5, 1.3)
+    account.update_balance('USD', -10 * 1.1 + 5 * 1.3)
+
+    assert account.total_equity() == account.get_balance('USD')
+    assert account.total_equity({'EURUSD': 1.2, 'GBPUSD': 1.25}) == pytest.approx(1000 + 10 * 0.1 + 5 * 0.05)
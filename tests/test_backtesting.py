@@ -2,17 +2,37 @@
 Тесты для модуля бэктестинга.
 """
 
+import asyncio
+
+import numpy as np
+import pandas as pd
 import pytest
 from datetime import datetime, timedelta
-from src.core.backtesting import Backtester
-from src.strategies.mean_reversion import MeanReversionStrategy
-from src.data.data_manager import DataManager
-from src.utils.config import Config
+from types import SimpleNamespace
+from sklearn.model_selection import ParameterGrid
+
+from src.core.account import SimulatedAccount
+from src.core.backtesting import BacktestJob, Backtester, BacktestResultCache
+from src.core.execution import ExecutionModel, RealisticExecution
+from src.core.ledger import TradeLedger, closed_trade_profits, load_ledger
+from src.core.metrics import OnlineMetrics
+from src.core.replay import NS_PER_YEAR, time_index_ns
+from src.core.sweep import mean_reversion_grid, mean_reversion_positions
+
+
+class Config:
+    """Настройки бэктеста, которые читает Backtester."""
+
+    risk_per_trade = 0.01
 
 
 @pytest.fixture
 def backtester():
-    config = Config()
+    # Полный бот: SDK брокера, стратегии и конфигурация приложения
+    pytest.importorskip('tinkoff.invest')
+    MeanReversionStrategy = pytest.importorskip('src.strategies.mean_reversion').MeanReversionStrategy
+    DataManager = pytest.importorskip('src.data.data_manager').DataManager
+    config = pytest.importorskip('src.utils.config').Config()
     data_manager = DataManager(config, None)
     strategy = MeanReversionStrategy(config, data_manager)
     return Backtester(strategy, data_manager, config)
@@ -44,4 +64,662 @@ async def test_optimization(backtester):
     )
 
     assert isinstance(best_params, dict)
-    assert len(best_params) > 0
\ No newline at end of file
+    assert len(best_params) > 0
+
+
+class RecordingStrategy:
+    """Стратегия-заглушка, запоминающая окна данных и торгующая по z-score."""
+
+    def __init__(self, instruments):
+        self.instruments = instruments
+        self.calls = []
+
+    async def generate_signals(self, figi, data):
+        self.calls.append((figi, data.copy()))
+        close = data['close'].to_numpy()[-10:]
+        z = (close[-1] - close.mean()) / (close.std() or 1)
+        if abs(z) < 1.0:
+            return []
+        return [{'figi': figi, 'direction': 'sell' if z > 0 else 'buy', 'size': 10}]
+
+
+class FrameDataManager:
+    """Менеджер данных, отдающий заранее подготовленные свечи."""
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    async def get_historical_candles(self, figi, start_date, end_date, interval='1h'):
+        return self.frames[figi]
+
+
+async def boolean_scan_backtest(backtester, frames, initial_balance=10000):
+    """Эталонный прогон: окна булевой маской по всей истории на каждом шаге."""
+    times = frames['EURUSD']['time']
+    portfolio = SimulatedAccount(initial_balance)
+    tracker = OnlineMetrics(len(times), (len(times) - 1) * NS_PER_YEAR / (times.iloc[-1] - times.iloc[0]).value)
+    backtester.ledger = TradeLedger(list(frames))
+
+    for current_date in times:
+        orders = []
+        prices = {}
+        for figi, data in frames.items():
+            current_data = data[data['time'] <= current_date].tail(100)
+            prices[figi] = current_data['close'].iloc[-1]
+            if len(current_data) < 20:
+                continue
+            close = current_data['close'].to_numpy(dtype=float)
+            bar = SimpleNamespace(
+                close=close, high=close, low=close,
+                volume=np.full(len(close), np.nan), position=len(close),
+            )
+            for signal in await backtester.strategy.generate_signals(figi, current_data):
+                side = 1.0 if signal['direction'] == 'buy' else -1.0
+                orders.append((signal['figi'], side, signal['size'], bar))
+
+        if orders:
+            backtester._execute_signals(current_date.value, orders, portfolio, tracker)
+        tracker.update(current_date.value, portfolio.get_balance('USD'), portfolio.total_equity(prices))
+
+    return tracker.snapshot()
+
+
+@pytest.mark.asyncio
+async def test_backtest_parity_with_boolean_scan():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 20)
+    times = pd.date_range(start_date, end_date, freq='1h')
+    frames = {
+        figi: pd.DataFrame({
+            'time': times,
+            'close': (1.1 + 0.01 * np.sin(np.arange(len(times)) / (5 + i))) * (i + 1),
+        })
+        for i, figi in enumerate(['EURUSD', 'GBPUSD'])
+    }
+    strategy = RecordingStrategy(list(frames))
+    backtester = Backtester(strategy, FrameDataManager(frames), Config())
+
+    metrics = await backtester.run_backtest(start_date, end_date, skip_closed=False)
+    calls, strategy.calls = strategy.calls, []
+    trades = backtester.ledger.trades.copy()
+
+    reference = Backtester(strategy, FrameDataManager(frames), Config())
+    expected_metrics = await boolean_scan_backtest(reference, frames)
+
+    assert len(calls) == len(strategy.calls)
+    for (figi, window), (expected_figi, expected_window) in zip(calls, strategy.calls):
+        assert figi == expected_figi
+        pd.testing.assert_frame_equal(window, expected_window)
+
+    assert len(trades) > 0
+    np.testing.assert_array_equal(trades, reference.ledger.trades)
+    assert metrics == pytest.approx(expected_metrics)
+
+
+class ThresholdStrategy:
+    """Простая стратегия для проверки оптимизации."""
+
+    def __init__(self, config, data_manager):
+        self.instruments = []
+        self.window = 10
+        self.threshold = 1.0
+
+    def get_parameter_grid(self):
+        return {'window': [10, 20], 'threshold': [0.5, 1.0]}
+
+    def suggest_parameters(self, trial):
+        return {
+            'window': trial.suggest_int('window', 10, 20),
+            'threshold': trial.suggest_float('threshold', 0.5, 1.0),
+        }
+
+    def set_parameters(self, **params):
+        for key, value in params.items():
+            setattr(self, key, value)
+
+    async def generate_signals(self, figi, data):
+        close = data['close'].to_numpy()[-self.window:]
+        z = (close[-1] - close.mean()) / (close.std() or 1)
+        if abs(z) < self.threshold:
+            return []
+        return [{'figi': figi, 'direction': 'sell' if z > 0 else 'buy', 'size': 10}]
+
+
+def make_threshold_backtester(start_date, end_date):
+    times = pd.date_range(start_date, end_date, freq='1h')
+    frames = {
+        'EURUSD': pd.DataFrame({
+            'time': times,
+            'close': 1.1 + 0.01 * np.sin(np.arange(len(times)) / 5),
+        })
+    }
+    strategy = ThresholdStrategy(Config(), None)
+    strategy.instruments = list(frames)
+    return Backtester(strategy, FrameDataManager(frames), Config())
+
+
+@pytest.mark.asyncio
+async def test_backtest_reports_closed_trade_statistics():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    backtester = make_threshold_backtester(start_date, end_date)
+
+    metrics = await backtester.run_backtest(start_date, end_date)
+
+    assert metrics['num_trades'] > 0
+    assert 0 < metrics['win_rate'] <= 1
+    assert metrics['profit_factor'] > 0
+    assert metrics['avg_trade'] != 0
+
+
+@pytest.mark.asyncio
+async def test_parallel_grid_matches_sequential():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 10)
+
+    results = {}
+    for n_jobs in (1, 2):
+        backtester = make_threshold_backtester(start_date, end_date)
+        results[n_jobs] = await backtester.optimize_parameters(
+            start_date, end_date, optimization_method='grid', n_jobs=n_jobs
+        )
+
+    assert results[1] == results[2]
+
+
+class SizedThresholdStrategy(ThresholdStrategy):
+    """Стратегия с настраиваемым размером сделки вне сетки параметров."""
+
+    def __init__(self, config, data_manager):
+        super().__init__(config, data_manager)
+        self.size = 10
+
+    async def generate_signals(self, figi, data):
+        return [
+            {**signal, 'size': self.size}
+            for signal in await super().generate_signals(figi, data)
+        ]
+
+
+@pytest.mark.asyncio
+async def test_workers_receive_configured_strategy():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    jobs = [
+        BacktestJob('first week', start_date, datetime(2024, 1, 8)),
+        BacktestJob('second week', datetime(2024, 1, 8), end_date),
+    ]
+
+    def make_backtester(size):
+        backtester = make_threshold_backtester(start_date, end_date)
+        strategy = SizedThresholdStrategy(Config(), None)
+        strategy.instruments = backtester.strategy.instruments
+        strategy.size = size
+        backtester.strategy = strategy
+        return backtester
+
+    default = await make_backtester(10).run_backtests(jobs)
+    sequential = await make_backtester(3).run_backtests(jobs)
+    parallel = await make_backtester(3).run_backtests(jobs, n_jobs=2)
+
+    assert not default['total_return'].equals(sequential['total_return'])
+    pd.testing.assert_frame_equal(sequential, parallel)
+
+
+@pytest.mark.asyncio
+async def test_parallel_optuna_keeps_event_loop_responsive():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 10)
+    backtester = make_threshold_backtester(start_date, end_date)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    best_params = await backtester.optimize_parameters(
+        start_date, end_date, optimization_method='optuna', n_trials=6, n_jobs=2
+    )
+    task.cancel()
+
+    assert 10 <= best_params['window'] <= 20
+    assert ticks > 1
+
+
+class MomentumStrategy:
+    """Стратегия импульса с поштучным расчетом сигналов."""
+
+    def __init__(self, config, data_manager):
+        self.instruments = []
+        self.window = 5
+        self.threshold = 0.002
+
+    async def generate_signals(self, figi, data):
+        close = data['close'].to_numpy()
+        change = close[-1] - close[-1 - self.window]
+        if change > self.threshold:
+            return [{'figi': figi, 'direction': 'buy', 'size': 10}]
+        if change < -self.threshold:
+            return [{'figi': figi, 'direction': 'sell', 'size': 10}]
+        return []
+
+
+class BatchMomentumStrategy(MomentumStrategy):
+    """Та же стратегия с пакетным расчетом сигналов."""
+
+    def generate_signals_batch(self, figi, bars):
+        close = bars['close']
+        change = np.zeros_like(close)
+        change[self.window:] = close[self.window:] - close[:-self.window]
+        return np.where(change > self.threshold, 10, np.where(change < -self.threshold, -10, 0))
+
+
+@pytest.mark.asyncio
+async def test_batch_signals_match_per_bar_signals():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    times = pd.date_range(start_date, end_date, freq='1h')
+    frames = {
+        figi: pd.DataFrame({
+            'time': times,
+            'close': 1.1 + 0.01 * np.sin(np.arange(len(times)) / (4 + i)),
+        })
+        for i, figi in enumerate(['EURUSD', 'GBPUSD'])
+    }
+
+    results = []
+    for strategy_cls in (MomentumStrategy, BatchMomentumStrategy):
+        strategy = strategy_cls(Config(), None)
+        strategy.instruments = list(frames)
+        backtester = Backtester(strategy, FrameDataManager(frames), Config())
+        results.append(await backtester.run_backtest(start_date, end_date))
+
+    assert results[0]['num_trades'] > 0
+    assert results[0] == results[1]
+
+
+class BatchMeanReversionStrategy(ThresholdStrategy):
+    """Возврат к среднему с пакетным расчетом сигналов."""
+
+    def get_parameter_grid(self):
+        return {'window': [10, 20], 'threshold': [0.5, 1.0, 1.5]}
+
+    def generate_signals_batch(self, figi, bars):
+        return 10 * mean_reversion_positions(bars['close'], [self.window], [self.threshold])[0]
+
+
+class GridMeanReversionStrategy(BatchMeanReversionStrategy):
+    """Та же стратегия с сигналами сразу для всей сетки."""
+
+    def generate_signals_grid(self, figi, bars, grid):
+        windows = [params['window'] for params in grid]
+        thresholds = [params['threshold'] for params in grid]
+        return 10 * mean_reversion_grid(bars['close'], windows, thresholds)
+
+
+@pytest.mark.asyncio
+async def test_sweep_matches_run_backtest():
+    times = pd.date_range(datetime(2024, 1, 1), datetime(2024, 1, 20), freq='1h')
+    frames = {}
+    for i, figi in enumerate(['EURUSD', 'GBPUSD']):
+        close = 1.1 + 0.01 * np.sin(np.arange(len(times[i::2])) / (3 + i))
+        frames[figi] = pd.DataFrame({
+            'time': times[i::2], 'close': close, 'high': close + 0.001, 'low': close - 0.001, 'volume': 500.0,
+        })
+    start_date, end_date = datetime(2024, 1, 5), datetime(2024, 1, 15)
+
+    def make_backtester(strategy_cls=BatchMeanReversionStrategy):
+        strategy = strategy_cls(Config(), None)
+        strategy.instruments = list(frames)
+        return Backtester(strategy, FrameDataManager(frames), Config(), execution=RealisticExecution())
+
+    backtester = make_backtester()
+    historical_data = await backtester._load_historical_data(start_date, end_date)
+    table = backtester._sweep_grid(historical_data, start_date, end_date)
+
+    assert len(table) == 6
+    pd.testing.assert_frame_equal(
+        make_backtester(GridMeanReversionStrategy)._sweep_grid(historical_data, start_date, end_date), table,
+    )
+    for row in table.to_dict('records'):
+        single = make_backtester()
+        single.strategy.set_parameters(window=row['window'], threshold=row['threshold'])
+        metrics = await single.run_backtest(start_date, end_date)
+        assert row['num_trades'] == metrics['num_trades'] > 0
+        for name in ('sharpe_ratio', 'total_return', 'max_drawdown', 'sortino_ratio',
+                     'win_rate', 'profit_factor', 'avg_trade'):
+            assert np.isclose(row[name], metrics[name]), name
+
+    best = await make_backtester().optimize_parameters(start_date, end_date, optimization_method='sweep')
+    assert best == {
+        'window': table.loc[table['sharpe_ratio'].idxmax(), 'window'],
+        'threshold': table.loc[table['sharpe_ratio'].idxmax(), 'threshold'],
+    }
+
+
+@pytest.mark.asyncio
+async def test_sweep_requires_batch_signals():
+    backtester = make_threshold_backtester(datetime(2024, 1, 1), datetime(2024, 1, 10))
+
+    with pytest.raises(ValueError):
+        await backtester.optimize_parameters(datetime(2024, 1, 1), datetime(2024, 1, 10), optimization_method='sweep')
+
+
+@pytest.mark.asyncio
+async def test_result_cache_reuses_and_invalidates(tmp_path):
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 10)
+    cache = BacktestResultCache(str(tmp_path))
+    backtester = make_threshold_backtester(start_date, end_date)
+    backtester.cache = cache
+
+    metrics = await backtester.run_backtest(start_date, end_date)
+    entries = list(tmp_path.glob('*/*.pkl'))
+    assert len(entries) == 1
+
+    backtester._simulate = None  # Повторный запуск не должен симулировать
+    assert await backtester.run_backtest(start_date, end_date) == metrics
+    assert len(backtester.results) > 0
+
+    backtester.strategy.version = 'v2'
+    assert cache.invalidate_stale(backtester.strategy) == 1
+    assert not list(tmp_path.glob('*/*.pkl'))
+
+
+@pytest.mark.asyncio
+async def test_result_cache_entries_from_grid_serve_backtests(tmp_path):
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 10)
+    backtester = make_threshold_backtester(start_date, end_date)
+    backtester.cache = BacktestResultCache(str(tmp_path))
+
+    best = await backtester.optimize_parameters(start_date, end_date, optimization_method='grid', n_jobs=2)
+    assert len(list(tmp_path.glob('*/*.pkl'))) == 4
+
+    backtester.strategy.set_parameters(**best)
+    simulate, backtester._simulate = backtester._simulate, None
+    await backtester.run_backtest(start_date, end_date)
+    assert backtester.ledger is not None and backtester.ledger.size > 0
+
+    # Другой риск на сделку — другой ключ: запись не переиспользуется
+    backtester.config.risk_per_trade = 0.02
+    backtester._simulate = simulate
+    await backtester.run_backtest(start_date, end_date)
+    assert len(list(tmp_path.glob('*/*.pkl'))) == 5
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    cache = BacktestResultCache(str(tmp_path), max_bytes=1)
+    strategy = ThresholdStrategy(Config(), None)
+    curve = pd.DataFrame({'equity': np.ones(10)})
+
+    first = cache.key(strategy, {'window': 10}, 'data', 'a', 'b', {})
+    second = cache.key(strategy, {'window': 20}, 'data', 'a', 'b', {})
+    cache.put(first, {'sharpe_ratio': 1.0}, curve)
+    cache.put(second, {'sharpe_ratio': 2.0}, curve)
+
+    assert cache.get(first) is None
+    assert len(list(tmp_path.glob('*/*.pkl'))) <= 1
+
+
+@pytest.mark.asyncio
+async def test_walk_forward_parallel_matches_sequential():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 29)
+
+    results = {}
+    for n_jobs in (1, 2):
+        backtester = make_threshold_backtester(start_date, end_date)
+        results[n_jobs] = await backtester.walk_forward(
+            start_date, end_date, timedelta(days=7), timedelta(days=7), n_jobs=n_jobs
+        )
+
+    assert len(results[1]['folds']) == 3
+    assert results[1]['equity_curve']['date'].is_unique
+    assert [fold['params'] for fold in results[1]['folds']] == [fold['params'] for fold in results[2]['folds']]
+    pd.testing.assert_frame_equal(results[1]['equity_curve'], results[2]['equity_curve'])
+
+
+@pytest.mark.asyncio
+async def test_simulation_reports_checkpoints():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 10)
+    backtester = make_threshold_backtester(start_date, end_date)
+    historical_data = await backtester._load_historical_data(start_date, end_date)
+
+    reported = []
+    await backtester._simulate(
+        historical_data, start_date, end_date,
+        checkpoint=lambda checkpoint, metrics: reported.append((checkpoint, metrics['sharpe_ratio'])),
+        n_checkpoints=5,
+    )
+
+    assert 4 <= len(reported) <= 5
+    assert [checkpoint for checkpoint, _ in reported] == list(range(1, len(reported) + 1))
+
+
+@pytest.mark.asyncio
+async def test_optuna_pruning_and_halving():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 20)
+    backtester = make_threshold_backtester(start_date, end_date)
+
+    pruned = await backtester.optimize_parameters(
+        start_date, end_date, optimization_method='optuna', n_trials=10, pruner='median'
+    )
+    halving = await backtester.optimize_parameters(
+        start_date, end_date, optimization_method='halving'
+    )
+
+    assert set(pruned) == {'window', 'threshold'}
+    assert halving in list(ParameterGrid(backtester.strategy.get_parameter_grid()))
+
+
+@pytest.mark.asyncio
+async def test_portfolio_backtest_trades_all_instruments():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    times = pd.date_range(start_date, end_date, freq='1h')
+    frames = {
+        figi: pd.DataFrame({
+            'time': times[i::2],
+            'close': 1.1 + 0.01 * np.sin(np.arange(len(times[i::2])) / (4 + i)),
+        })
+        for i, figi in enumerate(['EURUSD', 'GBPUSD'])
+    }
+    strategy = BatchMomentumStrategy(Config(), None)
+    strategy.instruments = list(frames)
+    backtester = Backtester(strategy, FrameDataManager(frames), Config())
+
+    metrics = await backtester.run_portfolio_backtest(start_date, end_date)
+
+    assert metrics['num_trades'] > 0
+    assert len(backtester.results) == len(backtester._tracker.equity_curve())
+
+    backtester.strategy = MomentumStrategy(Config(), None)
+    with pytest.raises(ValueError):
+        await backtester.run_portfolio_backtest(start_date, end_date)
+
+
+@pytest.mark.asyncio
+async def test_portfolio_backtest_matches_run_backtest_fills():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    times = pd.date_range(start_date, end_date, freq='1h')
+    frames = {}
+    for i, figi in enumerate(['EURUSD', 'GBPUSD']):
+        close = 1.1 + 0.01 * np.sin(np.arange(len(times)) / (4 + i))
+        frames[figi] = pd.DataFrame({
+            'time': times, 'close': close, 'high': close + 0.002, 'low': close - 0.002, 'volume': 50.0,
+        })
+
+    results = []
+    for run in ('run_backtest', 'run_portfolio_backtest'):
+        strategy = BatchMomentumStrategy(Config(), None)
+        strategy.instruments = list(frames)
+        backtester = Backtester(strategy, FrameDataManager(frames), Config(), execution=RealisticExecution())
+        kwargs = {'max_leverage': 1e9} if run == 'run_portfolio_backtest' else {}
+        metrics = await getattr(backtester, run)(start_date, end_date, **kwargs)
+        results.append((metrics, backtester.results))
+
+    (single, single_curve), (portfolio, portfolio_curve) = results
+    assert single['num_trades'] == portfolio['num_trades'] > 0
+    assert np.isclose(single['win_rate'], portfolio['win_rate'])
+    assert np.isclose(single['avg_trade'], portfolio['avg_trade'])
+    # Оба прогона переоценивают открытые позиции по последней цене закрытия
+    np.testing.assert_allclose(single_curve['balance'], portfolio_curve['balance'])
+    np.testing.assert_allclose(single_curve['equity'], portfolio_curve['equity'])
+    assert np.isclose(single['sharpe_ratio'], portfolio['sharpe_ratio'])
+    assert np.isclose(single['max_drawdown'], portfolio['max_drawdown'])
+
+
+@pytest.mark.asyncio
+async def test_assess_robustness_after_backtest():
+    backtester = make_threshold_backtester(datetime(2024, 1, 1), datetime(2024, 1, 15))
+
+    with pytest.raises(ValueError):
+        backtester.assess_robustness()
+
+    await backtester.run_backtest(datetime(2024, 1, 1), datetime(2024, 1, 15))
+    robustness = backtester.assess_robustness(n_simulations=1000, seed=0)
+
+    assert robustness['n_simulations'] == 1000
+    assert 0 <= robustness['probability_of_ruin'] <= 1
+    assert robustness['max_drawdown'][0] <= robustness['max_drawdown'][2]
+
+
+@pytest.mark.asyncio
+async def test_assess_robustness_resamples_closed_trades():
+    backtester = make_threshold_backtester(datetime(2024, 1, 1), datetime(2024, 1, 15))
+    metrics = await backtester.run_backtest(datetime(2024, 1, 1), datetime(2024, 1, 15))
+
+    profits = closed_trade_profits(backtester.ledger.trades)
+    assert np.isclose(profits.mean(), metrics['avg_trade'])
+    assert np.isclose((profits > 0).mean(), metrics['win_rate'])
+
+    robustness = backtester.assess_robustness(n_simulations=1000, method='shuffle', seed=0, level='trades')
+    # Перестановка сделок не меняет итоговую прибыль
+    low, median, high = robustness['total_return']
+    assert np.isclose(low, high) and np.isclose(median, profits.sum() / backtester.results['equity'].iloc[0])
+
+    with pytest.raises(ValueError):
+        backtester.assess_robustness(level='bars')
+
+
+@pytest.mark.asyncio
+async def test_realistic_execution_costs_reduce_returns():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    times = pd.date_range(start_date, end_date, freq='1h')
+    close = 1.1 + 0.01 * np.sin(np.arange(len(times)) / 4)
+    frames = {
+        'EURUSD': pd.DataFrame({
+            'time': times, 'close': close, 'high': close + 0.002, 'low': close - 0.002, 'volume': 1000.0,
+        })
+    }
+
+    results = []
+    for execution in (ExecutionModel(), RealisticExecution()):
+        strategy = BatchMomentumStrategy(Config(), None)
+        strategy.instruments = list(frames)
+        backtester = Backtester(strategy, FrameDataManager(frames), Config(), execution=execution)
+        results.append(await backtester.run_backtest(start_date, end_date))
+
+    assert results[0]['num_trades'] == results[1]['num_trades'] > 0
+    assert results[1]['total_return'] < results[0]['total_return']
+
+
+@pytest.mark.asyncio
+async def test_commission_is_deducted_from_balance():
+    # Изменение поведения: прежний бэктестер считал комиссию, но не списывал ее.
+    # ExecutionModel(commission=0) воспроизводит прежний баланс.
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+
+    balances = {}
+    for commission in (0.0, 0.0005):
+        backtester = make_threshold_backtester(start_date, end_date)
+        backtester.execution = ExecutionModel(commission=commission)
+        await backtester.run_backtest(start_date, end_date)
+        balances[commission] = backtester.results['balance'].iloc[-1]
+        commissions = backtester.ledger.trades['commission'].sum()
+
+    assert commissions > 0
+    assert np.isclose(balances[0.0] - balances[0.0005], commissions)
+
+
+@pytest.mark.asyncio
+async def test_ledger_uses_simulated_time(tmp_path):
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 15)
+    backtester = make_threshold_backtester(start_date, end_date)
+
+    metrics = await backtester.run_backtest(start_date, end_date)
+    trades = backtester.ledger.trades
+
+    assert len(trades) == metrics['num_trades'] > 0
+    assert np.all(np.isin(trades['time'], time_index_ns(backtester.results['date'])))
+
+    backtester.save_results(str(tmp_path / 'run'))
+    loaded = load_ledger(str(tmp_path / 'run'))
+    np.testing.assert_array_equal(loaded['trades'], trades)
+    assert len(loaded['equity']) == len(backtester.results)
+
+
+class CountingDataManager(FrameDataManager):
+    """Менеджер данных, считающий запросы свечей."""
+
+    def __init__(self, frames):
+        super().__init__(frames)
+        self.requests = 0
+
+    async def get_historical_candles(self, figi, start_date, end_date, interval='1h'):
+        self.requests += 1
+        return await super().get_historical_candles(figi, start_date, end_date, interval)
+
+
+@pytest.mark.asyncio
+async def test_run_backtests_matches_individual_runs():
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 1, 29)
+    times = pd.date_range(start_date, end_date, freq='1h')
+    frames = {
+        figi: pd.DataFrame({
+            'time': times,
+            'close': 1.1 + 0.01 * np.sin(np.arange(len(times)) / (4 + i)),
+        })
+        for i, figi in enumerate(['EURUSD', 'GBPUSD'])
+    }
+    jobs = [
+        BacktestJob('first half', datetime(2024, 1, 1), datetime(2024, 1, 15)),
+        BacktestJob('second half', datetime(2024, 1, 15), datetime(2024, 1, 29)),
+        {'name': 'gbp only', 'start_date': start_date, 'end_date': end_date, 'instruments': ['GBPUSD']},
+    ]
+
+    def make_backtester(data_manager):
+        strategy = BatchMomentumStrategy(Config(), None)
+        strategy.instruments = list(data_manager.frames)
+        return Backtester(strategy, data_manager, Config())
+
+    expected = []
+    for job in jobs[:2]:
+        expected.append(await make_backtester(FrameDataManager(frames)).run_backtest(job.start_date, job.end_date))
+    expected.append(await make_backtester(FrameDataManager({'GBPUSD': frames['GBPUSD']})).run_backtest(
+        start_date, end_date
+    ))
+
+    data_manager = CountingDataManager(frames)
+    sequential = await make_backtester(data_manager).run_backtests(jobs)
+    parallel = await make_backtester(FrameDataManager(frames)).run_backtests(jobs, n_jobs=2)
+
+    assert data_manager.requests == len(frames)
+    assert list(sequential['job']) == ['first half', 'second half', 'gbp only']
+    assert list(sequential['instruments']) == ['EURUSD,GBPUSD', 'EURUSD,GBPUSD', 'GBPUSD']
+    for row, metrics in zip(sequential.to_dict('records'), expected):
+        assert row['sharpe_ratio'] == metrics['sharpe_ratio']
+        assert row['num_trades'] == metrics['num_trades']
+    pd.testing.assert_frame_equal(sequential, parallel)
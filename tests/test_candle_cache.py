@@ -0,0 +1,72 @@
+"""
+Тесты кэша исторических свечей.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+
+from src.data.candle_cache import CandleCache, Coverage
+
+HOUR = SimpleNamespace(name='CANDLE_INTERVAL_HOUR')
+
+
+class FakeApi:
+    def __init__(self):
+        self.requests = []
+
+    async def get_candles(self, figi, interval, from_dt, to_dt):
+        self.requests.append((pd.Timestamp(from_dt), pd.Timestamp(to_dt)))
+        times = pd.date_range(from_dt, to_dt, freq='1h', inclusive='left')
+        return [
+            SimpleNamespace(time=time, open=1.0, high=1.0, low=1.0, close=float(time.hour), volume=1)
+            for time in times
+        ]
+
+
+def test_coverage_merges_ranges_and_reports_gaps():
+    coverage = Coverage([(10, 20), (30, 40)])
+    coverage.add(20, 25)
+    assert coverage.ranges == [(10, 25), (30, 40)]
+    assert coverage.missing(0, 50) == [(0, 10), (25, 30), (40, 50)]
+    assert coverage.missing(12, 24) == []
+
+
+def test_only_missing_ranges_are_fetched(tmp_path):
+    api = FakeApi()
+    cache = CandleCache(api.get_candles, root=str(tmp_path))
+
+    async def scenario():
+        first = await cache.get('EURUSD', HOUR, pd.Timestamp('2024-01-10'), pd.Timestamp('2024-01-12'))
+        again = await cache.get('EURUSD', HOUR, pd.Timestamp('2024-01-10'), pd.Timestamp('2024-01-12'))
+        wider = await cache.get('EURUSD', HOUR, pd.Timestamp('2024-01-09'), pd.Timestamp('2024-01-13'))
+        return first, again, wider
+
+    first, again, wider = asyncio.run(scenario())
+    assert len(first) == len(again) == 48
+    assert len(wider) == 96
+    assert wider['time'].is_monotonic_increasing
+    assert api.requests == [
+        (pd.Timestamp('2024-01-10', tz='UTC'), pd.Timestamp('2024-01-12', tz='UTC')),
+        (pd.Timestamp('2024-01-09', tz='UTC'), pd.Timestamp('2024-01-10', tz='UTC')),
+        (pd.Timestamp('2024-01-12', tz='UTC'), pd.Timestamp('2024-01-13', tz='UTC')),
+    ]
+
+    # Покрытие переживает перезапуск
+    restarted = CandleCache(api.get_candles, root=str(tmp_path))
+    asyncio.run(restarted.get('EURUSD', HOUR, pd.Timestamp('2024-01-09'), pd.Timestamp('2024-01-13')))
+    assert restarted.network_requests == 0
+
+
+def test_forming_candle_is_fetched_again(tmp_path):
+    api = FakeApi()
+    cache = CandleCache(api.get_candles, root=str(tmp_path))
+    end = pd.Timestamp.now(tz='UTC').ceil('1h')
+    start = end - pd.Timedelta(hours=5)
+
+    asyncio.run(cache.get('EURUSD', HOUR, start, end))
+    asyncio.run(cache.get('EURUSD', HOUR, start, end))
+
+    assert cache.network_requests == 2
+    assert api.requests[1] == (end - pd.Timedelta(hours=1), end)
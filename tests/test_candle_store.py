@@ -0,0 +1,73 @@
+"""
+Тесты сегментного хранилища свечей.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.candle_store import CANDLE_DTYPE, INDEX_STRIDE, CandleStore
+
+
+def make_candles(start, periods, freq='1min'):
+    times = pd.date_range(start, periods=periods, freq=freq, tz='UTC')
+    candles = np.zeros(periods, dtype=CANDLE_DTYPE)
+    candles['time'] = times.as_unit('ns').asi8
+    candles['close'] = np.arange(periods, dtype=float)
+    candles['volume'] = 1
+    return candles
+
+
+def test_append_splits_months_and_reads_ranges(tmp_path):
+    store = CandleStore(str(tmp_path))
+    candles = make_candles('2024-01-31 20:00', 10000)
+
+    assert store.append('EURUSD', candles[:6000]) == 6000
+    assert store.append('EURUSD', candles[5000:]) == 4000  # повторы пропускаются
+    assert store.segments('EURUSD') == ['2024-01', '2024-02']
+
+    np.testing.assert_array_equal(store.read('EURUSD'), candles)
+    for low, high in [(0, 10), (100, 5000), (237, 238), (INDEX_STRIDE * 3, 9999)]:
+        result = store.read('EURUSD', int(candles['time'][low]), int(candles['time'][high]))
+        np.testing.assert_array_equal(result, candles[low:high + 1])
+
+    frame = store.read_frame('EURUSD', int(candles['time'][-5]))
+    assert len(frame) == 5
+    assert str(frame['time'].dt.tz) == 'UTC'
+
+
+def test_single_segment_read_is_memory_mapped(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append('EURUSD', make_candles('2024-03-01', 100))
+
+    result = store.read('EURUSD')
+    assert isinstance(result, np.memmap) or isinstance(result.base, np.memmap)
+
+
+def test_partial_record_is_truncated_on_reopen(tmp_path):
+    candles = make_candles('2024-03-01', 300)
+    CandleStore(str(tmp_path)).append('EURUSD', candles[:200])
+    with open(tmp_path / 'EURUSD' / '2024-03.bin', 'ab') as f:
+        f.write(b'\x01' * 10)
+
+    store = CandleStore(str(tmp_path))
+    assert store.last_time('EURUSD') == candles['time'][199]
+    store.append('EURUSD', candles[200:])
+
+    np.testing.assert_array_equal(store.read('EURUSD'), candles)
+
+
+def test_merge_inserts_earlier_candles_in_order(tmp_path):
+    store = CandleStore(str(tmp_path))
+    candles = make_candles('2024-01-31 20:00', 1000)
+    store.append('EURUSD', candles[600:])
+
+    updated = candles[100:650].copy()
+    updated['close'][-1] = -1.0  # новая версия уже сохраненной свечи
+    assert store.merge('EURUSD', updated) == 550
+    store.merge('EURUSD', candles[:100])
+
+    expected = candles.copy()
+    expected['close'][649] = -1.0
+    np.testing.assert_array_equal(store.read('EURUSD'), expected)
+    np.testing.assert_array_equal(CandleStore(str(tmp_path)).read('EURUSD', int(candles['time'][300])),
+                                  expected[300:])
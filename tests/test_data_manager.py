@@ -0,0 +1,214 @@
+"""
+Тесты обновления и сохранения индикаторов в DataManager.
+
+Проверяется, что пересчитываются и записываются только инструменты с
+новыми закрытыми свечами, а счетчики работы это отражают.
+"""
+
+import asyncio
+import enum
+import importlib
+import sys
+from collections import namedtuple
+from types import ModuleType, SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+FIGIS = ['EURUSD', 'GBPUSD', 'USDJPY']
+START = pd.Timestamp('2024-01-01', tz='UTC')
+
+
+class FakeDatabase:
+    """Хранилище, запоминающее сохраненные инструменты."""
+
+    def __init__(self, config=None):
+        self.saved_indicators = []
+        self.saved_candles = []
+        self.fail_on = None
+
+    async def save_indicators(self, figi, indicators):
+        if figi == self.fail_on:
+            raise OSError("disk full")
+        self.saved_indicators.append(figi)
+
+    async def save_candles(self, figi, candles):
+        self.saved_candles.append((figi, len(candles)))
+
+
+class CandleInterval(enum.Enum):
+    """Интервалы свечей SDK брокера, которые использует DataManager."""
+
+    CANDLE_INTERVAL_1_MIN = 1
+    CANDLE_INTERVAL_5_MIN = 2
+    CANDLE_INTERVAL_15_MIN = 3
+    CANDLE_INTERVAL_HOUR = 4
+    CANDLE_INTERVAL_DAY = 5
+
+
+def stub_module(name, **attributes):
+    module = ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+
+def import_data_manager():
+    """
+    Импорт DataManager; недоступные SDK брокера и модули бота заменяются
+    заглушками только на время импорта.
+    """
+    stubs = {
+        'tinkoff': stub_module('tinkoff'),
+        'tinkoff.invest': stub_module('tinkoff.invest', CandleInterval=CandleInterval),
+        'src.api.tinkoff_api': stub_module('src.api.tinkoff_api', TinkoffAPI=object),
+        'src.utils': stub_module('src.utils'),
+        'src.utils.config': stub_module('src.utils.config', Config=object),
+        'src.data.schemas': stub_module(
+            'src.data.schemas',
+            CandleData=namedtuple('CandleData', 'time open high low close volume'),
+            IndicatorData=namedtuple('IndicatorData', 'name values time'),
+        ),
+        'src.data.database': stub_module('src.data.database', DatabaseManager=FakeDatabase),
+    }
+    missing = {}
+    for name, module in stubs.items():
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing[name] = module
+
+    sys.modules.update(missing)
+    try:
+        return importlib.import_module('src.data.data_manager')
+    finally:
+        for name in missing:
+            sys.modules.pop(name, None)
+
+
+data_manager = import_data_manager()
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = SimpleNamespace(DB_BACKEND='files', HOT_CACHE_ENABLED=False)
+    api = SimpleNamespace(instruments={figi: SimpleNamespace(name=figi) for figi in FIGIS})
+    manager = data_manager.DataManager(config, api)
+    manager.db = FakeDatabase()
+
+    times = pd.date_range(START, periods=60, freq='1h')
+    for number, figi in enumerate(FIGIS):
+        manager.historical_data[figi] = pd.DataFrame(
+            {'close': 1.1 + number + np.arange(len(times)) / 1000}, index=times
+        )
+        manager._calculate_indicators(figi)
+    return manager
+
+
+def candle(hours, close=1.2):
+    return SimpleNamespace(time=(START + pd.Timedelta(hours=hours)).to_pydatetime(), close=close)
+
+
+def cycle(manager):
+    async def main():
+        await manager._update_indicators()
+        await manager._save_data()
+    asyncio.run(main())
+
+
+def test_only_instruments_with_new_candles_are_written(manager):
+    cycle(manager)
+    assert sorted(manager.db.saved_indicators) == sorted(FIGIS)
+    manager.db.saved_indicators.clear()
+
+    manager.on_candle('EURUSD', candle(60))
+    cycle(manager)
+
+    assert manager.db.saved_indicators == ['EURUSD']
+    assert manager.db.saved_candles == [('EURUSD', 1)]
+    latest = manager.indicators['EURUSD']['sma_20'].time[-1]
+    assert latest == (START + pd.Timedelta(hours=60)).tz_localize(None).to_datetime64()
+    assert len(manager.indicators['GBPUSD']['sma_20'].values) == 60
+
+    cycle(manager)
+    assert manager.db.saved_indicators == ['EURUSD']
+
+
+def test_work_counters(manager):
+    cycle(manager)
+    manager.on_candle('EURUSD', candle(60))
+    manager.on_candle('USDJPY', candle(60))
+    cycle(manager)
+    cycle(manager)
+
+    assert manager.work_counters == {
+        'indicators_processed': 2,
+        'indicators_skipped': 3 * len(FIGIS) - 2,
+        'saves_processed': len(FIGIS) + 2,
+        'saves_skipped': 3 * len(FIGIS) - (len(FIGIS) + 2),
+    }
+
+
+def test_failed_save_is_retried_next_cycle(manager):
+    cycle(manager)
+    manager.db.saved_indicators.clear()
+
+    manager.on_candle('EURUSD', candle(60))
+    manager.on_candle('GBPUSD', candle(60))
+    manager.on_candle('USDJPY', candle(60))
+    manager.db.fail_on = 'GBPUSD'
+    # Ошибка одного инструмента не прерывает цикл сохранения
+    cycle(manager)
+    assert sorted(manager.db.saved_indicators) == ['EURUSD', 'USDJPY']
+
+    manager.db.fail_on = None
+    manager.db.saved_indicators.clear()
+    cycle(manager)
+    assert manager.db.saved_indicators == ['GBPUSD']
+    cycle(manager)
+    assert manager.db.saved_indicators == ['GBPUSD']
+
+
+def test_stale_stream_candle_is_ignored(manager):
+    cycle(manager)
+    manager.on_candle('EURUSD', candle(59))
+    cycle(manager)
+
+    assert manager.indicator_engine.instruments['EURUSD'].size == 60
+    assert manager.work_counters['indicators_processed'] == 0
+
+
+def test_stream_prices_are_published_to_hot_cache(manager):
+    manager.config.redis_url = 'redis://127.0.0.1:1'
+    manager.hot_cache = data_manager.HotCache.from_url(manager.config.redis_url)
+
+    async def main():
+        # Без сервера Redis кэш переключается на память процесса
+        await manager._connect_hot_cache()
+        manager.on_price('EURUSD', 1.25)
+        await manager._save_data()
+        return await manager.hot_cache.last_prices(FIGIS)
+
+    assert asyncio.run(main()) == {'EURUSD': 1.25}
+    assert isinstance(manager.hot_cache.client, data_manager.InMemoryRedis)
+
+
+def test_cached_history_is_served_without_api(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = SimpleNamespace(DB_BACKEND='files', HOT_CACHE_ENABLED=False)
+    manager = data_manager.DataManager(config, None)
+    interval = data_manager.HISTORY_INTERVALS['1h']
+    start = START.to_pydatetime()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(manager.get_historical_candles('EURUSD', start, start + pd.Timedelta(hours=2)))
+
+    async def fetch(figi, interval, from_dt, to_dt):
+        return [SimpleNamespace(time=from_dt, open=1.1, high=1.1, low=1.1, close=1.1, volume=1)]
+
+    manager.candle_cache.fetch = fetch
+    asyncio.run(manager.candle_cache.get('EURUSD', interval, start, start + pd.Timedelta(hours=1)))
+    offline = data_manager.DataManager(config, None)
+    candles = asyncio.run(offline.get_historical_candles('EURUSD', start, start + pd.Timedelta(hours=1)))
+    assert candles['close'].tolist() == [1.1]
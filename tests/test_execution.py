@@ -0,0 +1,69 @@
+"""
+Тесты моделей исполнения ордеров.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.core.execution import ExecutionModel, RealisticExecution, rollover_days
+
+
+def make_bar():
+    return (
+        np.array([1.0, -1.0, 1.0]),
+        np.array([10.0, 10.0, 10.0]),
+        np.array([1.1, 1.1, 1.1]),
+        np.array([1.2, 1.2, 1.2]),
+        np.array([1.0, 1.0, 1.0]),
+        np.array([np.nan, np.nan, 20.0]),
+    )
+
+
+def test_flat_model_fills_at_close_with_commission():
+    fills = ExecutionModel().fill(*make_bar())
+
+    np.testing.assert_array_equal(fills.size, [10, 10, 10])
+    np.testing.assert_array_equal(fills.price, [1.1, 1.1, 1.1])
+    np.testing.assert_allclose(fills.commission, 1.1 * 10 * 0.0005)
+
+
+def test_realistic_model_spread_slippage_and_partial_fill():
+    model = RealisticExecution(spread_factor=0.1, slippage_factor=0.5, max_participation=0.1)
+    fills = model.fill(*make_bar())
+
+    # Без объема: полный объем, только половина спреда
+    np.testing.assert_allclose(fills.price[:2], [1.11, 1.09])
+    # Объем 20: исполняется 10% объема, к спреду добавляется проскальзывание
+    assert fills.size[2] == 2
+    np.testing.assert_allclose(fills.price[2], 1.1 + 0.2 * (0.05 + 0.5 * np.sqrt(0.1)))
+
+
+def test_single_fills_match_array_fills():
+    bar = make_bar()
+    for model in (ExecutionModel(), RealisticExecution()):
+        fills = model.fill(*bar)
+        for number, signal in enumerate(zip(*(values.tolist() for values in bar))):
+            np.testing.assert_allclose(
+                model.fill_one(*signal),
+                (fills.size[number], fills.price[number], fills.commission[number]),
+                rtol=1e-15,
+            )
+
+
+def test_rollover_days_triple_on_wednesday_and_none_on_weekend():
+    def ns(text):
+        return pd.Timestamp(text).value
+
+    assert rollover_days(ns('2024-01-08 21:00'), ns('2024-01-08 23:00')) == 1  # понедельник
+    assert rollover_days(ns('2024-01-10 21:00'), ns('2024-01-10 23:00')) == 3  # среда
+    assert rollover_days(ns('2024-01-08 23:00'), ns('2024-01-09 21:00')) == 0
+    assert rollover_days(ns('2024-01-12 21:00'), ns('2024-01-15 21:00')) == 1  # только пятница
+    assert rollover_days(ns('2024-01-08 21:00'), ns('2024-01-15 21:00')) == 7
+
+
+def test_swap_charges_both_sides():
+    model = RealisticExecution(swap_long=0.0365, swap_short=0.073)
+    swap = model.swap(np.array([100.0, -100.0]), np.array([2.0, 2.0]), days=1)
+
+    np.testing.assert_allclose(swap, [0.02, 0.04])
+    np.testing.assert_array_equal(ExecutionModel().swap(np.array([100.0]), np.array([2.0]), 3), [0])
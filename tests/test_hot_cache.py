@@ -0,0 +1,101 @@
+"""
+Тесты общего кэша актуальных данных.
+
+По умолчанию используется InMemoryRedis; если задана переменная
+окружения TEST_REDIS_URL, те же тесты выполняются и против сервера Redis.
+"""
+
+import asyncio
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.candle_store import CANDLE_DTYPE
+from src.data.hot_cache import HotCache, InMemoryRedis
+
+REDIS_URL = os.environ.get('TEST_REDIS_URL')
+
+
+def make_candles(start, periods):
+    candles = np.zeros(periods, dtype=CANDLE_DTYPE)
+    candles['time'] = pd.date_range(start, periods=periods, freq='1min', tz='UTC').as_unit('ns').asi8
+    candles['close'] = 1.1 + np.arange(periods) / 1000
+    candles['volume'] = 100
+    return candles
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def cache(request):
+    if request.param == 'memory':
+        return HotCache(InMemoryRedis(), prefix='test', depth=5)
+    if not REDIS_URL:
+        pytest.skip("TEST_REDIS_URL is not set")
+    return HotCache.from_url(REDIS_URL, prefix=f'test-{os.getpid()}', depth=5)
+
+
+def run(cache, scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await cache.client.aclose()
+
+    return asyncio.run(main())
+
+
+def test_publish_keeps_latest_candles_prices_and_indicators(cache):
+    candles = make_candles('2024-01-02', 8)
+
+    async def scenario():
+        await cache.publish({'EURUSD': candles[:3]}, {'EURUSD': {'sma_20': 1.1, 'rsi_14': np.nan}})
+        await cache.publish({'EURUSD': candles[3:]}, {'EURUSD': {'sma_20': 1.2}})
+        return (
+            await cache.latest_candles('EURUSD'),
+            await cache.latest_candles('EURUSD', count=2),
+            await cache.last_prices(['EURUSD', 'GBPUSD']),
+            await cache.indicators('EURUSD'),
+        )
+
+    latest, last_two, prices, indicators = run(cache, scenario)
+    np.testing.assert_array_equal(latest, candles[3:])
+    np.testing.assert_array_equal(last_two, candles[-2:])
+    assert prices == {'EURUSD': candles['close'][-1]}
+    assert indicators['sma_20'] == 1.2
+    assert np.isnan(indicators['rsi_14'])
+
+
+def test_subscribers_are_notified_of_new_bars(cache):
+    candles = make_candles('2024-01-02', 2)
+
+    async def scenario():
+        received = []
+
+        async def listen():
+            async for figi, time in cache.bars():
+                received.append((figi, time))
+                return
+
+        listener = asyncio.create_task(listen())
+        # Подписка должна успеть выполниться до публикации
+        while not await cache.client.publish(cache.channel, b'') and not listener.done():
+            await asyncio.sleep(0.01)
+        await cache.publish({'EURUSD': candles})
+        await asyncio.wait_for(listener, timeout=5)
+        return received
+
+    received = run(cache, scenario)
+    assert received[-1] == ('EURUSD', int(candles['time'][-1]))
+
+
+def test_stream_prices_override_bar_close(cache):
+    candles = make_candles('2024-01-02', 2)
+
+    async def scenario():
+        assert await cache.ping()
+        await cache.publish({'EURUSD': candles})
+        await cache.set_prices({'EURUSD': 1.5, 'GBPUSD': 1.3})
+        return await cache.last_prices(['EURUSD', 'GBPUSD'])
+
+    assert run(cache, scenario) == {'EURUSD': 1.5, 'GBPUSD': 1.3}
@@ -0,0 +1,104 @@
+"""
+Тесты колоночного хранилища индикаторов.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.indicator_store import IndicatorStore
+
+
+def make_points(periods):
+    times = pd.date_range('2024-01-01', periods=periods, freq='1min').to_numpy()
+    return times, {'sma_20': np.arange(periods, dtype=float), 'rsi_14': np.full(periods, 50.0)}
+
+
+def test_only_new_points_are_appended(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    times, columns = make_points(100)
+
+    assert store.append('FIGI', times[:60], {name: values[:60] for name, values in columns.items()}) == 60
+    assert store.append('FIGI', times, columns) == 40
+    assert store.append('FIGI', times, columns) == 0
+    assert (tmp_path / 'FIGI' / 'sma_20.bin').stat().st_size == 100 * 8
+
+    loaded = IndicatorStore(str(tmp_path)).load('FIGI')
+    assert isinstance(loaded['sma_20'], np.memmap)
+    np.testing.assert_array_equal(loaded['time'], times)
+    np.testing.assert_array_equal(loaded['sma_20'], columns['sma_20'])
+
+
+def test_interrupted_write_is_trimmed(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    times, columns = make_points(10)
+    store.append('FIGI', times, columns)
+
+    # Значение записано, а время и второй индикатор — нет
+    with open(tmp_path / 'FIGI' / 'sma_20.bin', 'ab') as f:
+        f.write(np.array([99.0]).tobytes())
+
+    reopened = IndicatorStore(str(tmp_path))
+    assert reopened.last_time('FIGI') == times[-1].astype('datetime64[ns]').astype(np.int64)
+    assert len(reopened.load('FIGI', ['sma_20'])['sma_20']) == 10
+
+
+def test_late_indicator_is_padded(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    times, columns = make_points(10)
+    store.append('FIGI', times[:5], {'sma_20': columns['sma_20'][:5]})
+    store.append('FIGI', times, columns)
+
+    loaded = store.load('FIGI')
+    assert np.isnan(loaded['rsi_14'][:5]).all()
+    np.testing.assert_array_equal(loaded['rsi_14'][5:], 50.0)
+
+
+def test_omitted_indicator_is_padded_at_the_end(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    times, columns = make_points(10)
+    store.append('FIGI', times[:5], {name: values[:5] for name, values in columns.items()})
+    store.append('FIGI', times, {'sma_20': columns['sma_20']})
+
+    assert (tmp_path / 'FIGI' / 'rsi_14.bin').stat().st_size == 10 * 8
+    loaded = IndicatorStore(str(tmp_path)).load('FIGI')
+    np.testing.assert_array_equal(loaded['rsi_14'][:5], 50.0)
+    assert np.isnan(loaded['rsi_14'][5:]).all()
+    np.testing.assert_array_equal(loaded['sma_20'], columns['sma_20'])
+
+
+def test_short_column_is_padded_at_the_end(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    times, columns = make_points(10)
+    store.append('FIGI', times, columns)
+    # Колонка, записанная без выравнивания длин, короче колонки времени
+    with open(tmp_path / 'FIGI' / 'rsi_14.bin', 'r+b') as f:
+        f.truncate(6 * 8)
+
+    loaded = store.load('FIGI', ['rsi_14'])
+    np.testing.assert_array_equal(loaded['rsi_14'][:6], 50.0)
+    assert np.isnan(loaded['rsi_14'][6:]).all()
+
+
+def test_failed_append_is_rolled_back(tmp_path, monkeypatch):
+    store = IndicatorStore(str(tmp_path))
+    times, columns = make_points(10)
+    store.append('FIGI', times[:5], {name: values[:5] for name, values in columns.items()})
+
+    write = store._write
+
+    def failing_write(path, values):
+        if path.stem == 'rsi_14':
+            raise OSError("disk full")
+        write(path, values)
+
+    monkeypatch.setattr(store, '_write', failing_write)
+    with pytest.raises(OSError):
+        store.append('FIGI', times, columns)
+    assert (tmp_path / 'FIGI' / 'sma_20.bin').stat().st_size == 5 * 8
+
+    monkeypatch.setattr(store, '_write', write)
+    assert store.append('FIGI', times, columns) == 5
+    loaded = IndicatorStore(str(tmp_path)).load('FIGI')
+    np.testing.assert_array_equal(loaded['time'], times)
+    np.testing.assert_array_equal(loaded['sma_20'], columns['sma_20'])
@@ -0,0 +1,66 @@
+"""
+Тесты инкрементального расчета индикаторов.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data.indicators import IndicatorEngine, RollingStats
+
+
+def batch_indicators(close: pd.Series) -> dict:
+    """Пакетный расчет, как в DataManager._calculate_indicators."""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    sma = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    return {
+        'sma_20': sma.values,
+        'sma_50': close.rolling(window=50).mean().values,
+        'rsi_14': (100 - (100 / (1 + gain / loss))).values,
+        'bollinger_upper': (sma + 2 * std).values,
+        'bollinger_lower': (sma - 2 * std).values,
+    }
+
+
+def test_incremental_indicators_match_batch_formulas():
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2024-01-01', periods=3000, freq='1h')
+    close = pd.Series(1.1 + np.cumsum(rng.normal(0, 0.001, len(times))))
+
+    engine = IndicatorEngine()
+    engine.warm_up('EURUSD', times[:100], close[:100])
+    for time, value in zip(times[100:], close[100:]):
+        latest = engine.update('EURUSD', time, value)
+
+    state = engine.instruments['EURUSD']
+    assert state.size == len(close)
+    np.testing.assert_array_equal(state.times, times.values)
+    for name, expected in batch_indicators(close).items():
+        np.testing.assert_allclose(state.values(name), expected, rtol=1e-9, atol=1e-9, err_msg=name)
+        np.testing.assert_allclose(latest[name], expected[-1], rtol=1e-9)
+
+
+def test_rolling_stats_window():
+    stats = RollingStats(3)
+    for value in [1.0, 2.0, 3.0, 10.0]:
+        stats.update(value)
+
+    assert stats.ready
+    assert stats.mean == 5.0
+    np.testing.assert_allclose(stats.std, np.std([2.0, 3.0, 10.0], ddof=1))
+
+
+def test_warm_up_skips_forming_candle():
+    times = pd.date_range('2024-01-01', periods=60, freq='1h', tz='UTC')
+    close = np.linspace(1.0, 1.1, len(times))
+
+    engine = IndicatorEngine()
+    engine.warm_up('EURUSD', times, close, until=times[-1] + pd.Timedelta(minutes=30))
+    assert engine.instruments['EURUSD'].size == len(times)
+
+    engine.warm_up('EURUSD', times, close, until=pd.Timestamp(times[-1]).tz_localize(None))
+    state = engine.instruments['EURUSD']
+    assert state.size == len(times) - 1
+    np.testing.assert_array_equal(state.times, times[:-1].tz_localize(None).values)
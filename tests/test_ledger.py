@@ -0,0 +1,87 @@
+"""
+Тесты колоночного журнала сделок.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.ledger import TradeLedger, closed_trade_profits, equity_records, load_ledger, save_ledger
+
+
+def make_ledger():
+    ledger = TradeLedger(['EURUSD'], capacity=2)
+    ledger.record(1, ['EURUSD', 'GBPUSD'], np.array([1, -1]), np.array([10.0, 5.0]),
+                  np.array([1.1, 1.3]), np.array([0.01, 0.02]))
+    ledger.record(2, ['GBPUSD'], np.array([1]), np.array([5.0]), np.array([1.2]), np.array([0.02]))
+    return ledger
+
+
+def make_equity():
+    return equity_records(pd.DataFrame({
+        'date': pd.to_datetime([1, 2]),
+        'balance': [100.0, 101.0],
+        'equity': [100.0, 101.0],
+        'drawdown': [0.0, -0.01],
+    }))
+
+
+def test_ledger_grows_and_maps_instruments():
+    ledger = make_ledger()
+
+    assert ledger.size == 3
+    assert ledger.instruments == ['EURUSD', 'GBPUSD']
+    np.testing.assert_array_equal(ledger.trades['instrument'], [0, 1, 1])
+    np.testing.assert_array_equal(ledger.trades['time'], [1, 1, 2])
+
+    frame = ledger.to_frame()
+    assert list(frame['figi']) == ['EURUSD', 'GBPUSD', 'GBPUSD']
+    assert list(frame['direction']) == ['buy', 'sell', 'buy']
+
+
+@pytest.mark.parametrize('name', ['ledger', 'ledger.npz'])
+def test_save_and_load_round_trip(tmp_path, name):
+    ledger = make_ledger()
+    equity = make_equity()
+    save_ledger(str(tmp_path / name), ledger.trades, equity, ledger.instruments, {'params': {'window': 10}})
+
+    loaded = load_ledger(str(tmp_path / name))
+
+    np.testing.assert_array_equal(loaded['trades'], ledger.trades)
+    np.testing.assert_array_equal(loaded['equity'], equity)
+    assert loaded['instruments'] == ['EURUSD', 'GBPUSD']
+    assert loaded['metadata'] == {'params': {'window': 10}}
+    if name == 'ledger':
+        assert isinstance(loaded['trades'], np.memmap)
+
+
+def test_save_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    ledger = make_ledger()
+    save_ledger(str(tmp_path / 'run.parquet'), ledger.trades, make_equity(), ledger.instruments)
+
+    trades = pd.read_parquet(tmp_path / 'run.trades.parquet')
+    assert list(trades['figi']) == ['EURUSD', 'GBPUSD', 'GBPUSD']
+    assert len(pd.read_parquet(tmp_path / 'run.equity.parquet')) == 2
+
+
+def test_single_trades_keep_order_with_blocks():
+    ledger = TradeLedger(['EURUSD'], capacity=1)
+    ledger.append(1, 'EURUSD', 1.0, 10.0, 1.1, 0.01)
+    ledger.append(1, 'GBPUSD', -1.0, 5.0, 1.3, 0.02)
+    ledger.record(2, ['EURUSD'], np.array([-1]), np.array([10.0]), np.array([1.2]), np.array([0.01]))
+    ledger.append(3, 'GBPUSD', 1.0, 5.0, 1.25, 0.02)
+
+    assert ledger.size == 4
+    np.testing.assert_array_equal(ledger.trades['time'], [1, 1, 2, 3])
+    np.testing.assert_array_equal(ledger.trades['instrument'], [0, 1, 0, 1])
+    np.testing.assert_array_equal(ledger.trades['side'], [1, -1, -1, 1])
+    assert ledger.instruments == ['EURUSD', 'GBPUSD']
+
+
+def test_closed_trade_profits():
+    ledger = make_ledger()
+    ledger.append(3, 'EURUSD', -1, 4.0, 1.2, 0.008)
+
+    # GBPUSD: шорт 5 по 1.3 закрыт по 1.2; EURUSD: частичное закрытие 4 из 10
+    np.testing.assert_allclose(closed_trade_profits(ledger.trades), [5 * 0.1 - 0.02, 4 * 0.1 - 0.008])
@@ -0,0 +1,81 @@
+"""
+Тесты потокового расчета метрик.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.core.metrics import EMPTY_METRICS, OnlineMetrics
+
+
+def reference_metrics(trades, equity_curve, periods_per_year=252):
+    """Расчет метрик по DataFrame, как это делал бэктестер раньше."""
+    trades_df = pd.DataFrame(trades)
+    equity_df = pd.DataFrame(equity_curve).set_index('date')
+    equity_df['returns'] = equity_df['equity'].pct_change()
+    equity_df['cum_returns'] = (1 + equity_df['returns']).cumprod()
+
+    returns = equity_df['returns']
+    drawdown = equity_df['cum_returns'] / equity_df['cum_returns'].cummax() - 1
+    gross_profit = trades_df[trades_df['profit'] > 0]['profit'].sum()
+    gross_loss = abs(trades_df[trades_df['profit'] < 0]['profit'].sum())
+
+    return {
+        'sharpe_ratio': np.sqrt(periods_per_year) * returns.mean() / returns.std(),
+        'max_drawdown': drawdown.min(),
+        'win_rate': (trades_df['profit'].dropna() > 0).mean(),
+        'profit_factor': gross_profit / gross_loss if gross_loss > 0 else np.inf,
+        'total_return': (equity_df.iloc[-1]['equity'] - equity_df.iloc[0]['equity']) / equity_df.iloc[0]['equity'],
+        'sortino_ratio': np.sqrt(periods_per_year) * returns.mean() / returns[returns < 0].std(),
+        'num_trades': len(trades_df),
+        'avg_trade': trades_df['profit'].mean(),
+    }
+
+
+def test_online_metrics_match_dataframe_calculation():
+    rng = np.random.default_rng(3)
+    equity = 10000 * np.cumprod(1 + rng.normal(0.0002, 0.005, 500))
+    times = pd.date_range('2024-01-01', periods=500, freq='1h')
+    trades = [{'profit': p} for p in rng.normal(5, 50, 40)] + [{'figi': 'EURUSD'}] * 5
+
+    tracker = OnlineMetrics(capacity=100, periods_per_year=6048)
+    for time, value in zip(times, equity):
+        tracker.update(time.value, value, value)
+    for trade in trades:
+        tracker.record_trade(trade)
+
+    expected = reference_metrics(
+        trades,
+        [{'date': t, 'balance': v, 'equity': v} for t, v in zip(times, equity)],
+        periods_per_year=6048,
+    )
+    snapshot = tracker.snapshot()
+
+    assert snapshot.keys() == expected.keys()
+    for name, value in expected.items():
+        assert np.isclose(snapshot[name], value), name
+    assert len(tracker.equity_curve()) == 500
+
+
+def test_online_metrics_without_trades_are_empty():
+    tracker = OnlineMetrics(capacity=4)
+    tracker.update(0, 100.0, 100.0)
+    tracker.update(1, 101.0, 101.0)
+
+    assert tracker.snapshot() == EMPTY_METRICS
+
+
+def test_win_rate_counts_closed_trades_only():
+    tracker = OnlineMetrics(capacity=4)
+    tracker.update(0, 100.0, 100.0)
+    tracker.update(1, 108.0, 108.0)
+    # Два открытия позиции и три закрытия: два прибыльных, одно убыточное
+    for trade in [{'figi': 'EURUSD'}, {'profit': 10.0}, {'figi': 'EURUSD'}, {'profit': -5.0}, {'profit': 3.0}]:
+        tracker.record_trade(trade)
+
+    snapshot = tracker.snapshot()
+
+    assert snapshot['num_trades'] == 5
+    assert snapshot['win_rate'] == 2 / 3
+    assert snapshot['profit_factor'] == 13 / 5
+    assert snapshot['avg_trade'] == 8 / 3
@@ -0,0 +1,49 @@
+"""
+Тесты анализа устойчивости методом Монте-Карло.
+"""
+
+import numpy as np
+import pytest
+
+from src.core.monte_carlo import monte_carlo, resample, simulate
+
+
+def test_shuffle_preserves_values_and_total_return():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.001, 0.01, 50)
+
+    paths = resample(returns, 100, 'shuffle', rng)
+    np.testing.assert_allclose(np.sort(paths, axis=1), np.tile(np.sort(returns), (100, 1)))
+
+    result = simulate(returns, n_simulations=100, method='shuffle', seed=1)
+    np.testing.assert_allclose(result['total_return'], np.prod(1 + returns) - 1)
+
+
+def test_path_metrics_match_single_path():
+    returns = np.array([0.1, -0.2, 0.05, 0.1])
+    result = simulate(returns, n_simulations=3, method='shuffle', seed=0)
+
+    growth = np.cumprod(1 + returns)
+    assert np.all(result['max_drawdown'] <= 0)
+    np.testing.assert_allclose(
+        result['sharpe_ratio'],
+        np.sqrt(252) * returns.mean() / returns.std(ddof=1),
+    )
+    np.testing.assert_allclose(result['total_return'], growth[-1] - 1)
+
+
+def test_monte_carlo_intervals_and_ruin():
+    profits = np.array([-3000.0, -3000.0, 1000.0, 500.0])
+    result = monte_carlo(profits=profits, initial_balance=10000, n_simulations=10000, seed=0)
+
+    low, median, high = result['sharpe_ratio']
+    assert low <= median <= high
+    assert 0 < result['probability_of_ruin'] < 1
+    assert result['max_drawdown'][0] <= result['max_drawdown'][2] <= 0
+
+
+def test_monte_carlo_rejects_bad_input():
+    with pytest.raises(ValueError):
+        monte_carlo()
+    with pytest.raises(ValueError):
+        monte_carlo(np.array([0.1, 0.2]), method='jackknife')
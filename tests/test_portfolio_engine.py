@@ -0,0 +1,82 @@
+"""
+Тесты портфельного бэктеста на общей матрице цен.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.core.execution import ExecutionModel
+from src.core.portfolio_engine import PortfolioBacktest, align_instruments, decision_rows
+
+
+def make_prices():
+    return align_instruments({
+        'EURUSD': pd.DataFrame({
+            'time': pd.to_datetime(['2024-01-01 00:00', '2024-01-01 01:00', '2024-01-01 03:00']),
+            'close': [1.0, 2.0, 4.0],
+            'volume': [10, 20, 40],
+        }),
+        'GBPUSD': pd.DataFrame({
+            'time': pd.to_datetime(['2024-01-01 01:00', '2024-01-01 02:00']),
+            'close': [5.0, 6.0],
+        }),
+    })
+
+
+def test_align_instruments_forward_fills_on_union_of_times():
+    prices = make_prices()
+
+    assert prices.figis == ['EURUSD', 'GBPUSD']
+    assert len(prices.times) == 4
+    np.testing.assert_array_equal(prices.close[:, 0], [1.0, 2.0, 2.0, 4.0])
+    np.testing.assert_array_equal(prices.close[1:, 1], [5.0, 6.0, 6.0])
+    assert np.isnan(prices.close[0, 1])
+    np.testing.assert_array_equal(prices.observed[:, 1], [False, True, True, False])
+    np.testing.assert_array_equal(prices.volume[:, 0], [10, 20, 0, 40])
+    np.testing.assert_array_equal(prices.bar_count[-1], [3, 2])
+
+
+def test_portfolio_marks_positions_and_realizes_profit():
+    prices = make_prices()
+    orders = np.zeros(prices.close.shape)
+    orders[0, 0] = 100
+    orders[3, 0] = -100
+    engine = PortfolioBacktest(prices, risk_per_trade=1.0, execution=ExecutionModel(commission=0.0), min_bars=1)
+
+    tracker = engine.run(orders, np.arange(len(prices.times)), initial_balance=1000)
+
+    np.testing.assert_allclose(tracker.equity[:tracker.size], [1000, 1100, 1100, 1300])
+    np.testing.assert_allclose(tracker.balance[tracker.size - 1], 1300)
+    metrics = tracker.snapshot()
+    assert metrics['num_trades'] == 2
+    assert metrics['avg_trade'] == 300
+
+
+def test_portfolio_margin_limit_scales_orders():
+    prices = make_prices()
+    orders = np.zeros(prices.close.shape)
+    orders[1] = [1000, 1000]
+    engine = PortfolioBacktest(prices, risk_per_trade=10.0, execution=ExecutionModel(commission=0.0), max_leverage=2.0, min_bars=1)
+
+    tracker = engine.run(orders, decision_rows(prices, prices.times), initial_balance=1000)
+
+    # Обе позиции длинные, поэтому потраченные деньги равны валовой экспозиции
+    exposure = 1000 - tracker.balance[1]
+    np.testing.assert_allclose(exposure, 2.0 * tracker.equity[1])
+    assert tracker.num_trades == 2
+
+
+def test_duplicate_timestamps_use_last_bar_and_its_signal():
+    prices = align_instruments({
+        'EURUSD': pd.DataFrame({
+            'time': pd.to_datetime(['2024-01-01 00:00', '2024-01-01 01:00', '2024-01-01 01:00', '2024-01-01 02:00']),
+            'close': [1.0, 2.0, 3.0, 4.0],
+        }),
+    })
+
+    assert len(prices.times) == 3
+    np.testing.assert_array_equal(prices.close[:, 0], [1.0, 3.0, 4.0])
+    np.testing.assert_array_equal(prices.bar_count[:, 0], [1, 3, 4])
+
+    orders = PortfolioBacktest.orders_from_signals(prices, {'EURUSD': np.array([1.0, 2.0, 3.0, 4.0])})
+    np.testing.assert_array_equal(orders[:, 0], [1.0, 3.0, 4.0])
@@ -0,0 +1,52 @@
+"""
+Тесты адаптивного ограничителя частоты запросов.
+"""
+
+import asyncio
+import time
+
+from src.api.rate_limiter import AdaptiveRateLimiter
+
+
+def test_requests_beyond_quota_wait_for_window():
+    limiter = AdaptiveRateLimiter(requests_per_minute=5, period=0.3)
+
+    async def scenario():
+        started = time.monotonic()
+        moments = []
+
+        async def request():
+            async with limiter:
+                moments.append(time.monotonic() - started)
+
+        await asyncio.gather(*(request() for _ in range(8)))
+        return sorted(moments)
+
+    moments = asyncio.run(scenario())
+    assert max(moments[:5]) < 0.1
+    assert min(moments[5:]) >= 0.29
+
+
+def test_throttling_halves_quota_and_success_restores_it():
+    limiter = AdaptiveRateLimiter(requests_per_minute=40, min_requests_per_minute=15, recovery=2)
+
+    limiter.throttled(retry_after=0)
+    assert limiter.rate == 20
+    limiter.throttled(retry_after=0)
+    assert limiter.rate == 15
+
+    for _ in range(20):
+        limiter.success()
+    assert limiter.rate == 40
+
+
+def test_retry_after_blocks_all_requests():
+    limiter = AdaptiveRateLimiter(requests_per_minute=100, period=1.0)
+
+    async def scenario():
+        limiter.throttled(retry_after=0.2)
+        started = time.monotonic()
+        async with limiter:
+            return time.monotonic() - started
+
+    assert asyncio.run(scenario()) >= 0.19
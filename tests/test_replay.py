@@ -0,0 +1,97 @@
+"""
+Тесты движка воспроизведения баров.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.replay import BarCursor, EventClock, ReplayEngine, time_index_ns
+
+
+def make_candles(periods: int, start: datetime = datetime(2024, 1, 1), freq: str = '1h') -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, periods))
+    return pd.DataFrame({
+        'time': pd.date_range(start, periods=periods, freq=freq),
+        'open': close,
+        'high': close + 0.0005,
+        'low': close - 0.0005,
+        'close': close,
+        'volume': rng.integers(100, 1000, periods),
+    })
+
+
+@pytest.mark.parametrize('step', [timedelta(minutes=30), timedelta(hours=1), timedelta(days=1)])
+def test_cursor_matches_boolean_scan(step):
+    data = make_candles(24 * 20)
+    cursor = BarCursor(data)
+
+    current_date = datetime(2023, 12, 31)
+    while current_date <= datetime(2024, 1, 22):
+        cursor.advance(current_date)
+        expected = data[data['time'] <= current_date].tail(100)
+        pd.testing.assert_frame_equal(cursor.view(), expected)
+        current_date += step
+
+
+def test_cursor_sorts_unordered_input():
+    data = make_candles(50)
+    shuffled = data.sample(frac=1, random_state=0)
+    cursor = BarCursor(shuffled)
+
+    cursor.advance(data['time'].iloc[29])
+
+    assert cursor.position == 30
+    assert cursor.last_close == data['close'].iloc[29]
+
+
+def test_replay_engine_skips_short_history():
+    engine = ReplayEngine({'A': make_candles(100), 'B': make_candles(10)})
+
+    ready = [figi for figi, _ in engine.step(datetime(2024, 1, 5))]
+
+    assert ready == ['A']
+
+
+def test_clock_walks_union_of_candle_times():
+    hourly = make_candles(48, start=datetime(2024, 1, 2))
+    half_hourly = make_candles(10, start=datetime(2024, 1, 2, 0, 30), freq='2h')
+    times = {'A': time_index_ns(hourly['time']), 'B': time_index_ns(half_hourly['time'])}
+
+    clock = EventClock(times, datetime(2024, 1, 2), datetime(2024, 1, 2, 23))
+
+    assert len(clock) == 24 + 10
+    assert np.all(np.diff(clock.events) > 0)
+
+    half_open = EventClock(times, datetime(2024, 1, 2), datetime(2024, 1, 2, 23), include_end=False)
+    np.testing.assert_array_equal(half_open.events, clock.events[:-1])
+
+
+def test_clock_skips_fx_weekend():
+    # Пятница 5 января 2024 — понедельник 8 января
+    data = make_candles(24 * 4, start=datetime(2024, 1, 5))
+    clock = EventClock({'A': time_index_ns(data['time'])}, datetime(2024, 1, 5), datetime(2024, 1, 9))
+
+    stamps = pd.to_datetime(clock.events)
+    assert stamps.min() == pd.Timestamp('2024-01-05 00:00')
+    assert not ((stamps > pd.Timestamp('2024-01-05 21:00')) & (stamps < pd.Timestamp('2024-01-07 22:00'))).any()
+    assert len(clock) == 22 + 2 + 24
+
+
+def test_clock_decision_interval_keeps_last_bar_of_bucket():
+    data = make_candles(24 * 3, start=datetime(2024, 1, 2))
+    clock = EventClock(
+        {'A': time_index_ns(data['time'])},
+        datetime(2024, 1, 2),
+        datetime(2024, 1, 5),
+        decision_interval=timedelta(days=1),
+    )
+
+    assert list(pd.to_datetime(clock.events)) == [
+        pd.Timestamp('2024-01-02 23:00'),
+        pd.Timestamp('2024-01-03 23:00'),
+        pd.Timestamp('2024-01-04 23:00'),
+    ]
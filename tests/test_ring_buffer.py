@@ -0,0 +1,71 @@
+"""
+Тесты кольцевого буфера свечей.
+"""
+
+import numpy as np
+import pytest
+
+from src.data.candle_store import CANDLE_DTYPE
+from src.data.ring_buffer import CandleRingBuffer
+
+
+def make_candles(count, start=0):
+    candles = np.zeros(count, dtype=CANDLE_DTYPE)
+    candles['time'] = np.arange(start, start + count) * 60_000_000_000
+    candles['close'] = np.arange(start, start + count, dtype=float)
+    candles['volume'] = 1
+    return candles
+
+
+def append_all(buffer, candles):
+    for record in candles:
+        buffer.append(*record.tolist())
+
+
+def test_last_returns_contiguous_views_in_time_order():
+    buffer = CandleRingBuffer(capacity=4)
+    candles = make_candles(10)
+    append_all(buffer, candles[:3])
+    np.testing.assert_array_equal(buffer.last(), candles[:3])
+
+    append_all(buffer, candles[3:])
+    assert len(buffer) == 4
+    np.testing.assert_array_equal(buffer.last(), candles[-4:])
+    np.testing.assert_array_equal(buffer.last(2)['close'], [8.0, 9.0])
+    assert buffer.last().base is not None
+    assert buffer.last_time == candles['time'][-1]
+
+
+def test_same_time_replaces_forming_candle():
+    buffer = CandleRingBuffer(capacity=3)
+    candles = make_candles(2)
+    append_all(buffer, candles)
+    buffer.append(int(candles['time'][-1]), 1.0, 2.0, 0.5, 42.0, 7)
+
+    assert len(buffer) == 2
+    assert buffer.last(1)['close'][0] == 42.0
+
+
+def test_extend_skips_older_candles_and_wraps():
+    buffer = CandleRingBuffer(capacity=5)
+    append_all(buffer, make_candles(3))
+    buffer.extend(make_candles(10))  # первые три уже в буфере
+
+    np.testing.assert_array_equal(buffer.last(), make_candles(5, start=5))
+    buffer.extend(make_candles(2, start=10))
+    np.testing.assert_array_equal(buffer.last(), make_candles(5, start=7))
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        CandleRingBuffer(capacity=0)
+
+
+def test_late_update_of_older_candle_is_ignored():
+    buffer = CandleRingBuffer(capacity=3)
+    candles = make_candles(3)
+    append_all(buffer, candles)
+
+    assert not buffer.append(int(candles['time'][1]), 1.0, 2.0, 0.5, 42.0, 7)
+    np.testing.assert_array_equal(buffer.last(), candles)
+    assert buffer.last_time == candles['time'][-1]
@@ -0,0 +1,40 @@
+"""
+Тесты публикации свечей для процессов оптимизации.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.core.shared_data import SharedCandles
+
+
+def test_published_candles_roundtrip_without_copy(tmp_path):
+    data = pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=48, freq='1h').as_unit('ns'),
+        'close': np.linspace(1.0, 1.1, 48),
+        'volume': np.arange(48),
+    })
+
+    candles = SharedCandles.publish({'EURUSD': data}, directory=str(tmp_path / 'candles'))
+    loaded = candles.load()['EURUSD']
+
+    pd.testing.assert_frame_equal(loaded, data)
+    base = loaded['close'].to_numpy()
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+    candles.close()
+    assert not (tmp_path / 'candles').exists()
+
+
+def test_published_candles_keep_timezone():
+    data = pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=3, freq='1h', tz='Europe/Moscow').as_unit('ns'),
+        'close': [1.0, 2.0, 3.0],
+    })
+
+    with SharedCandles.publish({'EURUSD': data}) as candles:
+        loaded = candles.load()['EURUSD']
+
+    pd.testing.assert_frame_equal(loaded, data)
@@ -0,0 +1,93 @@
+"""
+Тесты векторного перебора параметров.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.core.metrics import vectorized_metrics
+from src.core.execution import ExecutionModel
+from src.core.replay import ReplayEngine
+from src.core.sweep import (
+    grid_metrics, mean_reversion_grid, mean_reversion_positions, rolling_mean_std, simulate_grid,
+)
+
+
+def make_close(periods: int = 500) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    return 1.1 + np.cumsum(rng.normal(0, 0.001, periods))
+
+
+def test_rolling_mean_std_matches_pandas():
+    close = make_close()
+    means, stds = rolling_mean_std(close, [10, 20, 50])
+
+    for row, window in enumerate([10, 20, 50]):
+        series = pd.Series(close)
+        np.testing.assert_allclose(means[row], series.rolling(window).mean(), rtol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(stds[row], series.rolling(window).std(), rtol=1e-6, equal_nan=True)
+
+
+def test_simulate_grid_rows_are_independent():
+    close = make_close()
+    times = pd.date_range('2024-01-01', periods=len(close), freq='1h')
+    replay = ReplayEngine({'EURUSD': pd.DataFrame({'time': times, 'close': close})})
+    positions = 10 * mean_reversion_positions(close, [20], [1.0])[0]
+
+    equity, num_trades, trade_pnl = simulate_grid(
+        replay,
+        {'EURUSD': np.vstack([positions, np.zeros_like(positions), positions])},
+        replay.clock(times[0], times[-1], skip_closed=False).events,
+        ExecutionModel(),
+        risk_per_trade=0.01,
+    )
+    metrics = grid_metrics(equity, num_trades, trade_pnl)
+
+    assert num_trades[0] == num_trades[2] > 0
+    np.testing.assert_array_equal(equity[0], equity[2])
+    np.testing.assert_array_equal(trade_pnl[0], trade_pnl[2])
+    assert num_trades[1] == 0 and np.all(equity[1] == 10000)
+    assert np.isnan(trade_pnl[1]).all()
+    assert metrics['sharpe_ratio'][1] == metrics['win_rate'][1] == metrics['profit_factor'][1] == 0
+    assert metrics['sharpe_ratio'][0] == metrics['sharpe_ratio'][2]
+    assert metrics['win_rate'][0] == metrics['win_rate'][2] > 0
+
+
+def test_mean_reversion_grid_matches_single_points():
+    close = make_close()
+    windows = [20, 10, 20, 50]
+    thresholds = [1.0, 0.5, 1.5, 1.0]
+
+    positions = mean_reversion_grid(close, windows, thresholds)
+
+    for row, (window, threshold) in enumerate(zip(windows, thresholds)):
+        np.testing.assert_array_equal(positions[row], mean_reversion_positions(close, [window], [threshold])[0])
+
+
+def test_grid_metrics_trade_statistics():
+    equity = np.array([[100.0, 101.0, 100.5, 102.0], [100.0, 100.0, 100.0, 100.0]])
+    trade_pnl = np.array([[3.0, -1.0, 2.0, -2.0], [np.nan] * 4])
+
+    metrics = grid_metrics(equity, np.array([8, 2]), trade_pnl)
+
+    assert metrics['win_rate'][0] == 2 / 4
+    assert metrics['profit_factor'][0] == 5 / 3
+    assert metrics['avg_trade'][0] == 0.5
+    assert metrics['win_rate'][1] == metrics['profit_factor'][1] == metrics['avg_trade'][1] == 0
+
+
+def test_vectorized_metrics_match_pandas_formulas():
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0.0005, 0.01, (3, 200))
+
+    metrics = vectorized_metrics(returns, periods_per_year=252)
+
+    for row in range(3):
+        series = pd.Series(returns[row])
+        sharpe = np.sqrt(252) * series.mean() / series.std()
+        sortino = np.sqrt(252) * series.mean() / series[series < 0].std()
+        cum_returns = (1 + series).cumprod()
+        max_drawdown = (cum_returns / cum_returns.cummax() - 1).min()
+        assert np.isclose(metrics['sharpe_ratio'][row], sharpe)
+        assert np.isclose(metrics['sortino_ratio'][row], sortino)
+        assert np.isclose(metrics['max_drawdown'][row], max_drawdown)
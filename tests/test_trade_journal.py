@@ -0,0 +1,161 @@
+"""
+Тесты журнала сделок.
+"""
+
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+from src.data import trade_journal
+from src.data.trade_journal import TradeJournal
+
+
+def make_trade(order_id, **fields):
+    trade = {
+        'order_id': order_id,
+        'figi': 'BBG0013HGFT4',
+        'executed_price': 1.1,
+        'executed_quantity': 10,
+        'status': 'execution_report_status_fill',
+        'timestamp': datetime(2024, 1, 2, 10, 0),
+        'profit': None,
+    }
+    trade.update(fields)
+    return trade
+
+
+def read_events(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_events_store_only_changed_fields(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    journal = TradeJournal(str(path))
+
+    assert journal.record(make_trade('1')) == 'open'
+    assert journal.record(make_trade('1')) is None
+    assert journal.record(make_trade('1', exit_price=1.2, profit=1.0, status='closed')) == 'close'
+    journal.close()
+
+    events = read_events(path)
+    assert [event['event'] for event in events] == ['open', 'close']
+    assert events[1]['fields'] == {'exit_price': 1.2, 'profit': 1.0, 'status': 'closed'}
+
+    reopened = TradeJournal(str(path))
+    trade = reopened.get('1')
+    assert trade['status'] == 'closed'
+    assert trade['timestamp'] == '2024-01-02 10:00:00'
+    reopened.close()
+
+
+def test_incomplete_last_line_is_dropped(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    journal = TradeJournal(str(path))
+    journal.record(make_trade('1'))
+    journal.record(make_trade('2'))
+    journal.close()
+
+    with open(path, 'a') as f:
+        f.write('{"event": "update", "order_id": "1", "fie')
+
+    reopened = TradeJournal(str(path))
+    assert [trade['order_id'] for trade in reopened.history()] == ['1', '2']
+    reopened.record(make_trade('2', status='closed'))
+    reopened.close()
+
+    assert len(read_events(path)) == 3
+
+
+def test_compaction_keeps_current_state(tmp_path):
+    path = tmp_path / 'trades.jsonl'
+    journal = TradeJournal(str(path))
+    for number in range(3):
+        journal.record(make_trade(str(number)))
+        journal.record(make_trade(str(number), profit=float(number)))
+    journal.compact()
+    journal.close()
+
+    events = read_events(path)
+    assert [event['event'] for event in events] == ['open'] * 3
+    reopened = TradeJournal(str(path))
+    assert [trade['profit'] for trade in reopened.history(limit=2)] == [1.0, 2.0]
+    reopened.close()
+
+
+def count_fsyncs(monkeypatch):
+    calls = []
+    fsync = trade_journal.os.fsync
+    monkeypatch.setattr(trade_journal.os, 'fsync', lambda fd: (calls.append(fd), fsync(fd)))
+    return calls
+
+
+def test_record_does_not_sync(tmp_path, monkeypatch):
+    fsyncs = count_fsyncs(monkeypatch)
+    journal = TradeJournal(str(tmp_path / 'trades.jsonl'))
+    for number in range(100):
+        journal.record(make_trade(str(number)))
+
+    assert fsyncs == []
+    assert journal.pending == 100
+    journal.close()
+    assert len(fsyncs) == 1
+    assert journal.pending == 0
+
+
+def test_run_syncs_pending_events_periodically(tmp_path, monkeypatch):
+    fsyncs = count_fsyncs(monkeypatch)
+    journal = TradeJournal(str(tmp_path / 'trades.jsonl'), sync_interval=0.01)
+
+    async def main():
+        task = asyncio.create_task(journal.run())
+        journal.record(make_trade('1'))
+        await asyncio.sleep(0.1)
+        synced = len(fsyncs), journal.pending
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return synced
+
+    assert asyncio.run(main()) == (1, 0)
+    journal.close()
+
+
+def test_events_recorded_during_sync_stay_pending(tmp_path, monkeypatch):
+    journal = TradeJournal(str(tmp_path / 'trades.jsonl'))
+    journal.record(make_trade('1'))
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(trade_journal.os, 'fsync', lambda fd: (started.set(), release.wait(5)))
+
+    async def main():
+        task = asyncio.create_task(journal.maintain())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        journal.record(make_trade('2'))
+        journal.record(make_trade('3'))
+        release.set()
+        await task
+
+    asyncio.run(main())
+    assert journal.pending == 2
+    journal.close()
+    assert journal.pending == 0
+
+
+def test_maintain_compacts_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(trade_journal, 'COMPACT_MIN_EVENTS', 8)
+    path = tmp_path / 'trades.jsonl'
+    journal = TradeJournal(str(path))
+    for number in range(10):
+        journal.record(make_trade('1', profit=float(number)))
+    assert journal.needs_compaction
+    assert len(read_events(path)) == 10
+
+    asyncio.run(journal.maintain())
+    assert journal.events == 1
+    assert journal.pending == 0
+    journal.record(make_trade('2'))
+    journal.close()
+
+    assert [event['event'] for event in read_events(path)] == ['open', 'open']
+    reopened = TradeJournal(str(path))
+    assert reopened.get('1')['profit'] == 9.0
+    reopened.close()
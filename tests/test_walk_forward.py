@@ -0,0 +1,48 @@
+"""
+Тесты разбиения истории для walk-forward оптимизации.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.core.walk_forward import make_folds, slice_until, stitch_equity
+
+
+def test_rolling_folds_cover_history_without_overlap():
+    folds = make_folds(datetime(2024, 1, 1), datetime(2024, 4, 1), timedelta(days=30), timedelta(days=20))
+
+    assert folds[0].train_start == datetime(2024, 1, 1)
+    assert folds[-1].test_end == datetime(2024, 4, 1)
+    for previous, current in zip(folds, folds[1:]):
+        assert current.test_start == previous.test_end
+        assert current.train_end - current.train_start == timedelta(days=30)
+
+
+def test_anchored_folds_start_at_beginning():
+    folds = make_folds(datetime(2024, 1, 1), datetime(2024, 4, 1), timedelta(days=30), timedelta(days=20), anchored=True)
+
+    assert all(fold.train_start == datetime(2024, 1, 1) for fold in folds)
+    assert folds[1].train_end - folds[0].train_end == timedelta(days=20)
+
+
+def test_slice_until_is_a_view():
+    data = pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=100, freq='1h'),
+        'close': np.arange(100.0),
+    })
+
+    sliced = slice_until({'EURUSD': data}, datetime(2024, 1, 2, 3))['EURUSD']
+
+    assert len(sliced) == 28
+    assert np.shares_memory(sliced['close'].to_numpy(), data['close'].to_numpy())
+
+
+def test_stitch_equity_chains_segments():
+    first = pd.DataFrame({'date': [1, 2], 'balance': [100.0, 110.0], 'equity': [100.0, 110.0]})
+    second = pd.DataFrame({'date': [3, 4], 'balance': [100.0, 90.0], 'equity': [100.0, 90.0]})
+
+    stitched = stitch_equity([first, second])
+
+    np.testing.assert_allclose(stitched['equity'], [100.0, 110.0, 110.0, 99.0])